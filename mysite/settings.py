@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from dotenv import load_dotenv
+import importlib.util
 import os
+import sys
 from pathlib import Path
 
 load_dotenv()  # загружаем переменные из .env
@@ -28,6 +30,8 @@ SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG') == 'True'
+# manage.py test: тесты идут без собранной статики
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
 
 ALLOWED_HOSTS = ['*']
 
@@ -41,6 +45,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # Лукапы PostgreSQL (title__trigram_similar в нечётком поиске); на SQLite не влияет
+    'django.contrib.postgres',
 
     # Added apps
     'notes.apps.NotesConfig',
@@ -48,12 +54,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: задержка запроса включает все остальные middleware
+    'notes.metrics.metrics_middleware',
+    # До сессий и авторизации: их чтения тоже маршрутизируются
+    'notes.middleware.replica_routing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'notes.middleware.group_membership_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,10 +73,20 @@ ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга для /metrics
+        'BACKEND': 'notes.metrics.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны читаются и компилируются один раз на процесс, в том числе при DEBUG.
+            # Под runserver изменения подхватываются: django.template.autoreload
+            # сбрасывает кеш загрузчика при изменении файла в каталогах шаблонов.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -91,17 +112,98 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 #     }
 # }
 
+# Точка входа задаёт режим до загрузки настроек: mysite/wsgi.py - 'wsgi', mysite/asgi.py - 'asgi'
+SERVER_MODE = os.getenv('DJANGO_SERVER_MODE', 'wsgi')
+
+# Размеры пула соединений по умолчанию. Под WSGI запрос занимает поток воркера,
+# и пулу достаточно числа потоков. Под ASGI у каждого запроса свой поток для
+# sync_to_async, одновременно открытых соединений больше.
+DB_POOL_SIZES = {
+    'wsgi': {'min_size': 2, 'max_size': 4},
+    'asgi': {'min_size': 4, 'max_size': 16},
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': "appsdb",
-        'USER': "django_admin",
-        'PASSWORD': "password",
-        'HOST': "localhost",
-        'PORT': "5432",
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME', "appsdb"),
+        'USER': os.getenv('DB_USER', "django_admin"),
+        'PASSWORD': os.getenv('DB_PASSWORD', "password"),
+        'HOST': os.getenv('DB_HOST', "localhost"),
+        'PORT': os.getenv('DB_PORT', "5432"),
+        # Проверка соединения перед выдачей (для пула - ConnectionPool.check_connection)
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+if os.getenv('DB_POOL', 'True') == 'True' and importlib.util.find_spec('psycopg_pool'):
+    # Пул psycopg 3: соединение берётся из пула на запрос и возвращается после него
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', DB_POOL_SIZES[SERVER_MODE]['min_size'])),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', DB_POOL_SIZES[SERVER_MODE]['max_size'])),
+            # Сколько секунд ждать свободное соединение, потом - ошибка запроса
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 10 * 60)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 60 * 60)),
+        },
+    }
+else:
+    # Без psycopg_pool - постоянные соединения на поток
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+# Реплики только для чтения (потоковая репликация основной БД), через запятую:
+# DB_REPLICA_HOSTS=db-replica-1,db-replica-2. Остальные параметры - как у основной.
+# Чтения HTTP-запросов распределяются по репликам (notes/routers.py), записи и
+# чтения пользователя в течение REPLICA_PIN_SECONDS после его записи - в основную БД.
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['notes.routers.PrimaryReplicaRouter']
+# Должно быть больше типичного отставания реплики
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 15))
+
+# Общий для всех процессов кеш (наборы групп пользователей, страницы списка заметок).
+# Без REDIS_URL/CACHE_DIR используется кеш в памяти процесса - только для разработки:
+# счётчики версий в нём не видны другим процессам.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif os.getenv('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Отрендеренные карточки заметок ({% cache 3600 ... using="templates" %}). Ключ включает
+# все выводимые в карточке значения, поэтому устаревших записей не бывает, и кеш может
+# быть локальным для процесса (LRU) - без сетевого запроса на каждую карточку.
+# Время жизни ограничено на случай значения, не попавшего в ключ.
+CACHES['templates'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'templates',
+    'OPTIONS': {'MAX_ENTRIES': 20000},
+}
+
+# Сессии читаются из общего кеша, к БД - только при промахе и при записи.
+# SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies убирает таблицу сессий совсем.
+# Истёкшие сессии удаляет run_reminder_scheduler (или manage.py clearsessions по cron).
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -141,6 +243,28 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# Сюда manage.py build_static собирает статику: имена с хешем, .gz и .br копии
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+# Сгенерированные build_static файлы (урезанный шрифт иконок), перекрывают исходные из static/
+STATIC_BUILD_DIR = BASE_DIR / 'build' / 'static'
+STATICFILES_FINDERS = [
+    'notes.storage.BuildFinder',
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+]
+
+# Нет манифеста или записи в нём - {% static %} падает с ошибкой, а не отдаёт имя без хеша
+# (без долгого кеша и сжатых копий). Исходные имена допустимы только при разработке и в тестах
+STATIC_MANIFEST_STRICT = os.getenv('STATIC_MANIFEST_STRICT', str(not (DEBUG or TESTING))) == 'True'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'notes.storage.StaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -151,3 +275,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'notes:index'
 LOGOUT_REDIRECT_URL = 'login'
 
+
+# /metrics для Prometheus. С токеном нужен заголовок Authorization: Bearer <токен>,
+# без токена метрики открыты только сотрудникам (is_staff) или при DEBUG.
+# При нескольких процессах (воркеры, send_notes) задайте PROMETHEUS_MULTIPROC_DIR
+# - общий пустой каталог, очищаемый при перезапуске.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
@@ -19,10 +19,13 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from notes.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('django.contrib.auth.urls')),
     path("notes/", include("notes.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # handler404 = 'mysite.views.custom_404'
@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+# Настройки пула соединений с БД зависят от режима сервера
+os.environ.setdefault('DJANGO_SERVER_MODE', 'wsgi')
 
 application = get_wsgi_application()
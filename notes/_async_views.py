@@ -193,7 +193,7 @@ async def index(request):
 
         if reminder_filter:
             notes_list = [note for note in notes_list if
-                          note.reminder and note.reminder.date() == reminder_filter.date()]
+                          note.next_fire_at and note.next_fire_at.date() == reminder_filter.date()]
 
     return await render_async(
         request,
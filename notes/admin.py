@@ -1,14 +1,42 @@
 from django.contrib import admin
-from .models import Notes, Group
+from django.utils import timezone
+
+from .counts import EstimatedCountPaginator
+from .models import Notes, Group, ReminderOutbox
 
 
 @admin.register(Notes)
 class NoteAdmin(admin.ModelAdmin):
     list_display = ('title', 'user', 'group', 'created_at')
+    list_select_related = ('user', 'group')
     list_filter = ('user', 'group')
     search_fields = ('title', 'text')
+    readonly_fields = ('next_fire_at',)
+    # Без фильтров - оценка числа строк из pg_class вместо COUNT(*) по всей таблице
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # text в списке не показывается, поиск по нему работает и без загрузки
+        return super().get_queryset(request).defer('text', 'search_vector')
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('name',)
     filter_horizontal = ('members',)
+
+
+@admin.register(ReminderOutbox)
+class ReminderOutboxAdmin(admin.ModelAdmin):
+    list_display = ('note_id', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error')
+    list_filter = ('status',)
+    readonly_fields = ('note_id', 'chat_id', 'text', 'attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['requeue']
+
+    @admin.action(description="Отправить повторно")
+    def requeue(self, request, queryset):
+        # Например, dead после исправления токена или прав бота в канале
+        updated = queryset.exclude(status=ReminderOutbox.SENT).update(
+            status=ReminderOutbox.PENDING, attempts=0, next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"Поставлено в очередь: {updated}")
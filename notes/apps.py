@@ -6,3 +6,6 @@ class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
 
+    def ready(self):
+        # Подключаем обработчики сигналов
+        from . import signals  # noqa: F401
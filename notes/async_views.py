@@ -1,26 +1,49 @@
-from django.contrib.auth.decorators import login_required
-from django.utils.decorators import method_decorator
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseRedirect
-from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.urls import reverse
 from django.contrib import messages
-from asgiref.sync import sync_to_async
-from django.views.generic import CreateView, UpdateView, DeleteView, DetailView
+from . import conditional, list_cache, routers
+from .counts import all_categories_query
+from .membership import agroup_ids, version
+from .metrics import timed_sync_to_async
 from .models import Notes
 from .forms import NotesForm, NoteSearchForm
+from .pagination import KeysetPaginator, page_querystring
+from .preferences import get_view_type, set_view_type, toggled_view_type
 from django.views.generic.base import View
 
-get_object_or_404_async = sync_to_async(get_object_or_404, thread_sensitive=True)
-render_async = sync_to_async(render, thread_sensitive=True)
-redirect_async = sync_to_async(redirect, thread_sensitive=True)
-messages_success_async = sync_to_async(messages.success, thread_sensitive=True)
-reverse_lazy_async = sync_to_async(reverse_lazy, thread_sensitive=True)
+# Явный переход в синхронный поток - рендеринг шаблона (context processors, проверка
+# perms и ленивые querysets в шаблоне - синхронный код); синхронная работа до него
+# (кеш, проверка формы) собирается в один переход, а не по переходу на вызов.
+# Всё остальное - через асинхронный ORM и асинхронный API сессий.
+render_async = timed_sync_to_async(render)
+
+
+def async_login_required(view_func):
+    """
+    Асинхронный аналог login_required.
+
+    Стандартный декоратор вызывает проверку через sync_to_async, а request.user
+    после request.auser() загружается повторно. Здесь пользователь загружается
+    один раз и подставляется в request.user для шаблонов и context processors.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
 
 class AsyncLoginRequiredMixin:
-    @method_decorator(login_required)
     async def dispatch(self, request, *args, **kwargs):
-        return await super().dispatch(request, *args, **kwargs)
+        return await async_login_required(super().dispatch)(request, *args, **kwargs)
 
 
 class AsyncView(View):
@@ -34,300 +57,201 @@ class AsyncView(View):
         return HttpResponseRedirect("/")
 
 
-class AsyncAddNotesView(AsyncLoginRequiredMixin, AsyncView):
+class AsyncNoteFormMixin:
+    """Общая обработка формы заметки для создания и редактирования"""
     template_name = 'notes/notes_form.html'
+    title = None
+    success_message = None
 
-    async def get_success_url(self):
-        # Используем обертку sync_to_async для reverse_lazy
-        return await sync_to_async(reverse_lazy)('notes:index')
-
-    async def get_form(self, request):
-        # Оборачиваем создание формы в sync_to_async
-        if request.method == 'POST':
-            form_class = sync_to_async(NotesForm)
-            return await form_class(request.POST)
-        else:
-            form_class = sync_to_async(NotesForm)
-            return await form_class()
+    def get_success_url(self):
+        return reverse('notes:index')
 
-    async def get_context_data(self, form=None):
-        context = {
+    def get_context_data(self, form=None):
+        return {
             'form': form,
-            'title': 'Добавить новую заметку'
+            'title': self.title,
         }
 
-        # Получаем группы пользователя асинхронно
-        @sync_to_async
-        def get_user_groups():
-            return list(self.request.user.note_groups.all())
-
-        context['user_groups'] = await get_user_groups()
-        return context
-
-    async def get(self, request, *args, **kwargs):
-        # Используем функцию для безопасного создания формы
-        @sync_to_async
-        def create_form():
-            return NotesForm()
+    async def make_form(self, *args, **kwargs):
+        # Набор групп - из кеша членства; request.note_group_ids синхронный, здесь - agroup_ids
+        return NotesForm(*args, group_ids=await agroup_ids(self.request.user), **kwargs)
 
-        form = await create_form()
-        context = await self.get_context_data(form=form)
-        return await render_async(request, self.template_name, context)
+    def process_form(self, form):
+        """
+        Валидация, сохранение и рендеринг ошибок - синхронно, одним переходом.
 
-    async def post(self, request, *args, **kwargs):
-        # Используем функцию для безопасного создания формы с данными
-        @sync_to_async
-        def create_and_process_form():
-            form = NotesForm(request.POST)
-            form.instance.user = request.user
-            return form, form.is_valid()
+        ModelChoiceField проверяет значения запросом к БД, поэтому валидацию
+        формы нельзя выполнить в event loop.
+        """
+        if form.is_valid():
+            form.save()
+            return None
+        return render(self.request, self.template_name, self.get_context_data(form=form))
 
-        form, is_valid = await create_and_process_form()
+    async def post_form(self, form):
+        response = await timed_sync_to_async(self.process_form)(form)
+        if response is not None:
+            return response
+        messages.success(self.request, self.success_message)
+        return HttpResponseRedirect(self.get_success_url())
 
-        if is_valid:
-            # Сохраняем форму асинхронно
-            @sync_to_async
-            def save_form():
-                form.save()
 
-            await save_form()
+class AsyncAddNotesView(AsyncLoginRequiredMixin, AsyncNoteFormMixin, AsyncView):
+    title = 'Добавить новую заметку'
+    success_message = 'Заметка успешно создана!'
 
-            # Добавляем сообщение об успехе
-            await messages_success_async(request, 'Заметка успешно создана!')
+    async def get(self, request, *args, **kwargs):
+        return await render_async(request, self.template_name, self.get_context_data(form=await self.make_form()))
 
-            # Получаем URL для перенаправления
-            success_url = await self.get_success_url()
-            return HttpResponseRedirect(success_url)
-        else:
-            # Форма не валидна, показываем ошибки
-            context = await self.get_context_data(form=form)
-            return await render_async(request, self.template_name, context)
+    async def post(self, request, *args, **kwargs):
+        form = await self.make_form(request.POST)
+        form.instance.user = request.user
+        return await self.post_form(form)
 
 
-class AsyncNoteUpdateView(AsyncLoginRequiredMixin, AsyncView):
-    template_name = 'notes/notes_form.html'
+class AsyncOwnedNoteMixin:
+    """Загрузка заметки, которую может менять только её автор"""
+    permission_denied_message = None
 
     async def get_object(self):
-        obj = await get_object_or_404_async(Notes, pk=self.kwargs['pk'])
-
-        # Проверяем права доступа
-        @sync_to_async
-        def check_permissions():
-            if obj.user != self.request.user:
-                raise PermissionDenied("У вас нет прав для редактирования этой заметки")
-
-        await check_permissions()
+        obj = await aget_object_or_404(Notes, pk=self.kwargs['pk'])
+        if obj.user_id != self.request.user.pk:
+            raise PermissionDenied(self.permission_denied_message)
         return obj
 
-    async def get_form(self, obj=None):
-        # Оборачиваем создание формы в sync_to_async
-        @sync_to_async
-        def create_form_get():
-            return NotesForm(instance=obj)
-
-        @sync_to_async
-        def create_form_post(post_data):
-            return NotesForm(post_data, instance=obj)
 
-        if self.request.method == 'POST':
-            return await create_form_post(self.request.POST)
-        return await create_form_get()
-
-    async def get_context_data(self, form=None):
-        context = {
-            'form': form,
-            'title': 'Редактирование заметки'
-        }
-
-        # Получаем группы пользователя асинхронно
-        @sync_to_async
-        def get_user_groups():
-            return list(self.request.user.note_groups.all())
-
-        context['user_groups'] = await get_user_groups()
-        return context
-
-    async def get_success_url(self):
-        return await sync_to_async(reverse_lazy)('notes:index')
+class AsyncNoteUpdateView(AsyncLoginRequiredMixin, AsyncOwnedNoteMixin, AsyncNoteFormMixin, AsyncView):
+    title = 'Редактирование заметки'
+    success_message = 'Заметка успешно обновлена!'
+    permission_denied_message = "У вас нет прав для редактирования этой заметки"
 
     async def get(self, request, *args, **kwargs):
-        # Получаем объект
         obj = await self.get_object()
-        # Создаем форму с объектом
-        form = await self.get_form(obj)
-        # Получаем контекст
-        context = await self.get_context_data(form=form)
-        return await render_async(request, self.template_name, context)
+        return await render_async(request, self.template_name, self.get_context_data(form=await self.make_form(instance=obj)))
 
     async def post(self, request, *args, **kwargs):
-        # Получаем объект
         obj = await self.get_object()
-        # Создаем форму с данными запроса и объектом
-        form = await self.get_form(obj)
-
-        # Проверяем форму и сохраняем если валидна
-        @sync_to_async
-        def validate_and_save():
-            if form.is_valid():
-                form.save()
-                return True
-            return False
-
-        is_valid = await validate_and_save()
-
-        if is_valid:
-            # Добавляем сообщение об успехе
-            await messages_success_async(request, 'Заметка успешно обновлена!')
-            # Получаем URL для перенаправления
-            success_url = await self.get_success_url()
-            return HttpResponseRedirect(success_url)
-        else:
-            # Форма не валидна, показываем ошибки
-            context = await self.get_context_data(form=form)
-            return await render_async(request, self.template_name, context)
+        return await self.post_form(await self.make_form(request.POST, instance=obj))
 
 
-class AsyncNoteDeleteView(AsyncLoginRequiredMixin, AsyncView):
+class AsyncNoteDeleteView(AsyncLoginRequiredMixin, AsyncOwnedNoteMixin, AsyncView):
     template_name = 'notes/note_confirm_delete.html'
+    permission_denied_message = "У вас нет прав для удаления этой заметки"
 
-    async def get_object(self):
-        obj = await get_object_or_404_async(Notes, pk=self.kwargs['pk'])
-
-        # Проверяем права доступа
-        @sync_to_async
-        def check_permissions():
-            if obj.user != self.request.user:
-                raise PermissionDenied("У вас нет прав для удаления этой заметки")
-
-        await check_permissions()
-        return obj
-
-    async def get_context_data(self, obj=None):
+    def get_context_data(self, obj=None):
         return {
             'object': obj,
             'title': 'Удаление заметки'
         }
 
-    async def get_success_url(self):
-        return await sync_to_async(reverse_lazy)('notes:index')
-
     async def get(self, request, *args, **kwargs):
         obj = await self.get_object()
-        context = await self.get_context_data(obj=obj)
-        return await render_async(request, self.template_name, context)
+        return await render_async(request, self.template_name, self.get_context_data(obj=obj))
 
     async def post(self, request, *args, **kwargs):
         obj = await self.get_object()
         title = obj.title  # Сохраняем заголовок перед удалением
-
-        # Удаляем объект
-        @sync_to_async
-        def delete_object():
-            obj.delete()
-
-        await delete_object()
-
-        # Добавляем сообщение об успехе
-        await messages_success_async(request, f'Заметка "{title}" успешно удалена!')
-
-        # Перенаправляем на страницу со списком заметок
-        success_url = await self.get_success_url()
-        return HttpResponseRedirect(success_url)
+        await obj.adelete()
+        messages.success(request, f'Заметка "{title}" успешно удалена!')
+        return HttpResponseRedirect(reverse('notes:index'))
 
 
 class AsyncNoteDetailView(AsyncLoginRequiredMixin, AsyncView):
     template_name = 'notes/note_detail.html'
 
     async def get_object(self):
-        obj = await get_object_or_404_async(Notes, pk=self.kwargs['pk'])
-
-        # Проверяем доступ пользователя к заметке
-        @sync_to_async
-        def check_access():
-            user_has_access = obj.user == self.request.user
-
-            # Проверяем принадлежность к группе
-            if obj.group:
-                user_groups = list(self.request.user.note_groups.all())
-                group_access = obj.group in user_groups
-                user_has_access = user_has_access or group_access
-
-            if not user_has_access:
-                raise PermissionDenied("У вас нет прав для просмотра этой заметки")
-
-        await check_access()
+        obj = await aget_object_or_404(Notes.objects.for_detail(), pk=self.kwargs['pk'])
+        # Проверяем доступ пользователя к заметке (автор или член группы)
+        if not await obj.ais_visible_to(self.request.user):
+            raise PermissionDenied("У вас нет прав для просмотра этой заметки")
         return obj
 
-    async def get_context_data(self, obj=None):
-        context = {
+    def get_context_data(self, obj=None):
+        return {
             'note': obj,  # Используем имя 'note' как в оригинальном коде
             'title': 'Просмотр заметки'
         }
 
-        # Получаем группы пользователя асинхронно
-        @sync_to_async
-        def get_user_groups():
-            return list(self.request.user.note_groups.all())
-
-        context['user_groups'] = await get_user_groups()
-        return context
-
     async def get(self, request, *args, **kwargs):
+        # Если у браузера актуальная копия - 304 без загрузки заметки и рендеринга
+        validators = await conditional.anote_validators(request, self.kwargs['pk'])
+        not_modified = conditional.not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
         obj = await self.get_object()
-        context = await self.get_context_data(obj=obj)
-        return await render_async(request, self.template_name, context)
+        response = await render_async(request, self.template_name, self.get_context_data(obj=obj))
+        return conditional.set_validators(response, validators)
 
 
-@login_required
-async def index(request):
-    view_type = request.session.get('view_type', 'personal')
+def _lookup_page(request, view_type, form):
+    """
+    Ключ и запись кеша страницы списка и версия членства для ETag - одним
+    переходом в синхронный поток.
 
-    @sync_to_async
-    def init_form():
-        return NoteSearchForm(request.GET or None)
+    При промахе там же проверяется форма: ModelChoiceField проверяет категорию
+    запросом к БД, а отдельный переход ради него нарушил бы правило одного перехода.
+    """
+    cache_key, entry = list_cache.lookup(request.user, view_type, request.GET)
+    if entry is None:
+        form.is_valid()
+    return cache_key, entry, version(request.user)
 
-    form = await init_form()
 
-    @sync_to_async
-    def get_notes():
-        if view_type == 'personal':
-            qs = Notes.objects.filter(user=request.user, group=None)
-        else:
-            user_groups = list(request.user.note_groups.all())
-            qs = Notes.objects.filter(group__in=user_groups)
+def _render_index(request, context, cache_key, entry, state):
+    """Фрагмент страницы (при промахе - рендеринг и запись в кеш) и вся страница - одним переходом"""
+    if entry is None:
+        entry = list_cache.render_page(cache_key, context, state)
+    context["notes_page_html"] = entry['html']
+    return render(request, "notes/notes_list.html", context)
 
-        if form.is_valid():
-            if form.cleaned_data.get('search_query'):
-                qs = qs.filter(title__icontains=form.cleaned_data['search_query'])
-            if form.cleaned_data.get('category'):
-                qs = qs.filter(category=form.cleaned_data['category'])
-            if form.cleaned_data.get('reminder_filter'):
-                qs = qs.filter(reminder__date=form.cleaned_data['reminder_filter'])
-
-        return list(qs.select_related('group', 'user'))
-
-    notes_list = await get_notes()
-
-    return await render_async(
-        request,
-        "notes/notes_list.html",
-        {
-            "notes": notes_list,
-            "form": form,
-            "title": "Ваши личные заметки" if view_type == 'personal' else "Групповые заметки",
-            "view_type": view_type
-        }
-    )
 
-@login_required
+@async_login_required
+async def index(request):
+    view_type = get_view_type(request)
+    form = NoteSearchForm(request.GET or None)
+    title = "Ваши личные заметки" if view_type == 'personal' else "Групповые заметки"
+    context = {"form": form, "title": title, "view_type": view_type}
+
+    # Версии данных, набор групп, страница из кеша, проверка формы и версия членства - одним переходом
+    cache_key, entry, membership_version = await timed_sync_to_async(_lookup_page)(request, view_type, form)
+    if entry is None:
+        # Страница пойдёт в общий кеш - выборка из основной БД, не из отстающей реплики
+        routers.pin_primary()
+        if view_type == 'personal':
+            qs = Notes.objects.personal(request.user)
+        else:
+            qs = Notes.objects.for_groups(request.user)
+        qs = form.filter_queryset(qs, category=False)
+        facets = await qs.afacets(form.category_id)
+        state = facets.state
+        if form.category_id is not None:
+            qs = qs.filter(category=form.category_id)
+    else:
+        state = entry['state']
+
+    validators = conditional.list_validators(request, cache_key, state, membership_version)
+    not_modified = conditional.not_modified(request, validators)
+    if not_modified is not None:
+        return not_modified
+
+    if entry is None:
+        page = await KeysetPaginator(qs.for_list(), ordering=form.ordering).aget_page(request.GET.get('cursor'))
+        context.update({
+            "notes": page,
+            "notes_count": state[1],
+            "facets": facets,
+            "categories": facets.categories(request.GET),
+            "all_categories_query": all_categories_query(request.GET),
+            "next_page_query": page_querystring(request.GET, page.next_cursor) if page.has_next else None,
+            "first_page_query": page_querystring(request.GET, None) if request.GET.get('cursor') else None,
+        })
+
+    response = await timed_sync_to_async(_render_index)(request, context, cache_key, entry, state)
+    return conditional.set_validators(response, validators)
+
+@async_login_required
 async def toggle_view(request):
-    @sync_to_async
-    def toggle():
-        current_view = request.session.get('view_type', 'personal')
-        request.session['view_type'] = 'group' if current_view == 'personal' else 'personal'
-
-    await toggle()
-    return await redirect_async('notes:index')
+    return set_view_type(redirect('notes:index'), toggled_view_type(request))
 
 def custom_404(request, exception):
     return render(request, '404.html', status=404)
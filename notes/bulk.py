@@ -0,0 +1,144 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from . import list_cache
+from .async_views import async_login_required
+from .membership import group_ids
+from .metrics import timed_sync_to_async
+from .models import Categories, Notes, ReminderOutbox
+
+# action -> поле с новым значением (None - значение не нужно)
+ACTIONS = {
+    'delete': None,
+    'move': 'group',
+    'recategorize': 'category',
+}
+# Ограничение размера запроса: id передаются одним списком в IN (...)
+MAX_IDS = 10000
+
+OK, FORBIDDEN, NOT_FOUND = 'ok', 'forbidden', 'not_found'
+
+
+def parse_payload(body):
+    """
+    Разбирает {"action": ..., "ids": [...], "group"/"category": id|null}.
+
+    Возвращает (action, ids без повторов, target) или бросает ValueError
+    с текстом для клиента.
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise ValueError("Тело запроса должно быть JSON-объектом")
+    if not isinstance(data, dict):
+        raise ValueError("Тело запроса должно быть JSON-объектом")
+
+    action = data.get('action')
+    if action not in ACTIONS:
+        raise ValueError(f"Неизвестное действие: {action}. Допустимо: {', '.join(ACTIONS)}")
+
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids \
+            or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ValueError("ids должен быть непустым списком целых чисел")
+    if len(ids) > MAX_IDS:
+        raise ValueError(f"Не больше {MAX_IDS} заметок за запрос")
+
+    target = None
+    field = ACTIONS[action]
+    if field is not None:
+        if field not in data:
+            raise ValueError(f"Для действия {action} нужно поле {field} (id или null)")
+        target = data[field]
+        if target is not None and (not isinstance(target, int) or isinstance(target, bool)):
+            raise ValueError(f"{field} должен быть id или null")
+    return action, list(dict.fromkeys(ids)), target
+
+
+def _check_target(user, action, target):
+    if target is None:
+        return
+    if action == 'move' and target not in group_ids(user):
+        raise ValueError("Можно перенести заметки только в свою группу")
+    if action == 'recategorize' and not Categories.objects.filter(pk=target).exists():
+        raise ValueError("Категория не найдена")
+
+
+def apply_action(user, action, ids, target=None):
+    """
+    Применяет действие к заметкам пользователя.
+
+    Владельцы всех заметок проверяются одним запросом, изменение - один
+    UPDATE/DELETE ... WHERE id IN (...) AND user_id = ... Возвращает
+    (число изменённых строк, {id: ok|forbidden|not_found}).
+    """
+    _check_target(user, action, target)
+    with transaction.atomic():
+        owners = {pk: (user_id, group_id) for pk, user_id, group_id
+                  in Notes.objects.filter(pk__in=ids).order_by().values_list('pk', 'user_id', 'group_id')}
+        owned = [pk for pk in ids if pk in owners and owners[pk][0] == user.pk]
+        owned_set = set(owned)
+        results = {pk: OK if pk in owned_set else FORBIDDEN if pk in owners else NOT_FOUND for pk in ids}
+        if not owned:
+            return 0, results
+
+        queryset = Notes.objects.filter(pk__in=owned, user=user)
+        if action == 'delete':
+            # delete() отправляет post_delete (кеш списков, планировщик напоминаний);
+            # загружаются только колонки, которые нужны обработчикам сигналов
+            _, deleted = queryset.only('id', 'user', 'group').delete()
+            affected = deleted.get(Notes._meta.label, 0)
+            ReminderOutbox.cancel_for_notes(owned)
+            return affected, results
+
+        # update() не трогает auto_now, дату изменения ставим сами
+        affected = queryset.update(**{f'{ACTIONS[action]}_id': target, 'updated_at': timezone.now()})
+
+    # update() не отправляет post_save - сбрасываем кеш списков вручную
+    groups = {owners[pk][1] for pk in owned}
+    if action == 'move':
+        groups.add(target)
+    list_cache.invalidate(user_ids=[user.pk], group_ids=groups)
+    return affected, results
+
+
+def _response(action, affected, results):
+    return JsonResponse({
+        'action': action,
+        'affected': affected,
+        'results': {str(pk): status for pk, status in results.items()},
+    })
+
+
+def _bad_request(error):
+    return JsonResponse({'error': str(error)}, status=400, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@require_POST
+def bulk_notes(request):
+    """Массовые действия над заметками: удаление, перенос в группу, смена категории"""
+    try:
+        action, ids, target = parse_payload(request.body)
+        affected, results = apply_action(request.user, action, ids, target)
+    except ValueError as e:
+        return _bad_request(e)
+    return _response(action, affected, results)
+
+
+@async_login_required
+async def abulk_notes(request):
+    """Асинхронный вариант: проверка и запись - один переход в синхронный поток"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        action, ids, target = parse_payload(request.body)
+        affected, results = await timed_sync_to_async(apply_action)(request.user, action, ids, target)
+    except ValueError as e:
+        return _bad_request(e)
+    return _response(action, affected, results)
@@ -0,0 +1,98 @@
+import hashlib
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .membership import group_ids, version
+from .metrics import timed_sync_to_async
+from .models import Notes
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: object  # datetime или None
+
+
+def _etag(*parts):
+    return '"%s"' % hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _request_parts(request, membership_version):
+    # Страница зависит и от пользователя (шапка, права), и от CSRF-токена в формах
+    return (request.user.pk, membership_version, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+
+
+def _note_validators(request, pk, row, user_groups, membership_version):
+    if row is None:
+        return None
+    updated_at, user_id, group_id, category_title = row
+    # Нет доступа - обычный путь представления ответит 403
+    if user_id != request.user.pk and (group_id is None or group_id not in user_groups):
+        return None
+    # Название категории выводится на странице, а его изменение не меняет updated_at
+    etag = _etag('note', pk, updated_at.isoformat(), category_title,
+                 *_request_parts(request, membership_version))
+    return Validators(etag, updated_at)
+
+
+def _note_row(pk):
+    return Notes.objects.filter(pk=pk).order_by().values_list(
+        'updated_at', 'user_id', 'group_id', 'category__title',
+    )[:1]
+
+
+def note_validators(request, pk):
+    """ETag/Last-Modified страницы заметки - одним запросом по первичному ключу (с названием категории)"""
+    row = next(iter(_note_row(pk)), None)
+    return _note_validators(request, pk, row, group_ids(request.user), version(request.user))
+
+
+async def anote_validators(request, pk):
+    # Строка заметки, набор групп и версия членства - одним переходом в синхронный
+    # поток, а не переходом на каждый запрос и обращение к кешу. Набор групп
+    # запоминается на request.user - проверка доступа после неё переходов не делает
+    return await timed_sync_to_async(note_validators)(request, pk)
+
+
+def list_validators(request, page_key, state, membership_version=None):
+    """
+    Валидаторы страницы списка.
+
+    state - (max(updated_at), число строк) текущей выборки с фильтрами; page_key -
+    ключ страницы из list_cache (тип списка, фильтры, курсор и версии данных).
+    membership_version - версия членства, если уже прочитана (асинхронный список
+    читает её вместе со страницей из кеша); иначе читается здесь.
+    """
+    if membership_version is None:
+        membership_version = version(request.user)
+    last_modified, count = state
+    etag = _etag('list', page_key, last_modified and last_modified.isoformat(), count,
+                 *_request_parts(request, membership_version))
+    return Validators(etag, last_modified)
+
+
+def not_modified(request, validators):
+    """Ответ 304, если у клиента актуальная копия, иначе None"""
+    if validators is None or request.method not in ('GET', 'HEAD'):
+        return None
+    # Непоказанные сообщения должны попасть на страницу - отдаём её целиком
+    if len(get_messages(request)):
+        return None
+    last_modified = validators.last_modified and int(validators.last_modified.timestamp())
+    response = get_conditional_response(request, etag=validators.etag, last_modified=last_modified)
+    return set_validators(response, validators) if response is not None else None
+
+
+def set_validators(response, validators):
+    if validators is None or not 200 <= response.status_code < 400:
+        return response
+    response.headers['ETag'] = validators.etag
+    if validators.last_modified:
+        response.headers['Last-Modified'] = http_date(validators.last_modified.timestamp())
+    # Браузер хранит копию, но каждый раз спрашивает сервер, актуальна ли она
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -1,16 +1,67 @@
+import threading
+import time
+
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import Permission
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
 
-def group_permissions(request):
-    context = {}
+# Права группы Editor меняются редко: результат живёт в памяти процесса,
+# сбрасывается сигналами (см. notes/signals.py) и на всякий случай по TTL
+GROUP_PERMISSIONS_TTL = 300
+
+# Ключ записи включает поколение; сброс увеличивает поколение, и записи прежних
+# поколений перестают читаться - как версии ключей в membership
+_cache = {}
+_generation = 0
+_lock = threading.Lock()
+
+
+def _query_can_group_add_notes():
     try:
         group = Group.objects.get(name='Editor')
         # Based on your screenshot, permissions seem to be in format "app_label | category | action"
         # Looking for "Notes | Заметка | Can add notes"
-        context['can_group_add_notes'] = group.permissions.filter(
+        return group.permissions.filter(
             content_type__app_label='Notes',
             codename='add_notes'  # Django typically uses add_modelname format
         ).exists()
     except Group.DoesNotExist:
-        context['can_group_add_notes'] = False
-    return context
\ No newline at end of file
+        return False
+
+
+def can_group_add_notes():
+    now = time.monotonic()
+    with _lock:
+        key = ('can_group_add_notes', _generation)
+        cached = _cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+    value = _query_can_group_add_notes()
+    with _lock:
+        # Если права сбросили, пока шёл запрос, запись уходит под прежнее поколение и не читается
+        _cache[key] = (now + GROUP_PERMISSIONS_TTL, value)
+    return value
+
+
+def _next_generation():
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+def invalidate_group_permissions():
+    """
+    Сбрасывает закешированные права групп (новое поколение ключей).
+
+    Поколение меняется после фиксации транзакции: иначе параллельный запрос
+    успел бы прочитать ещё старые права и закешировать их под новым поколением.
+    Вне транзакции - сразу.
+    """
+    transaction.on_commit(_next_generation)
+
+
+def group_permissions(request):
+    # Вычисляется, только если шаблон обращается к can_group_add_notes
+    return {'can_group_add_notes': SimpleLazyObject(can_group_add_notes)}
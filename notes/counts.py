@@ -0,0 +1,114 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Ниже этого размера таблицы точный COUNT(*) дешёвый и оценка не нужна
+ESTIMATE_THRESHOLD = 100_000
+
+
+class NoteFacets:
+    """
+    Счётчики списка заметок из одного GROUP BY (категория, группа).
+
+    Строки считаются по выборке без фильтра по категории: так боковая панель
+    показывает, сколько заметок в каждой категории при остальных фильтрах, а
+    число найденных, заметки с напоминанием и счётчики групп - суммы по строкам
+    выбранной категории. Тексты заметок не загружаются.
+    """
+
+    def __init__(self, rows, category_id=None):
+        self.category_id = category_id
+        self.count = 0
+        self.with_reminder = 0
+        self.last_modified = None
+        self._categories = {}
+        self._groups = {}
+        for row in rows:
+            title, count = self._categories.get(row['category_id'], (row['category__title'], 0))
+            self._categories[row['category_id']] = (title, count + row['count'])
+            if category_id is not None and row['category_id'] != category_id:
+                continue
+            self.count += row['count']
+            self.with_reminder += row['with_reminder']
+            if self.last_modified is None or row['last_modified'] > self.last_modified:
+                self.last_modified = row['last_modified']
+            if row['group_id'] is not None:
+                name, count = self._groups.get(row['group_id'], (row['group__name'], 0))
+                self._groups[row['group_id']] = (name, count + row['count'])
+
+    @property
+    def state(self):
+        """(max(updated_at), число строк) - меняется при любом изменении выборки"""
+        return self.last_modified, self.count
+
+    @property
+    def total(self):
+        """Число заметок во всех категориях (без фильтра по категории)"""
+        return sum(count for _, count in self._categories.values())
+
+    def categories(self, query_dict):
+        """Пункты боковой панели: сначала крупные категории, «Без категории» - последней"""
+        items = []
+        for pk, (title, count) in self._categories.items():
+            if pk is None:
+                continue
+            params = query_dict.copy()
+            params.pop('cursor', None)
+            params['category'] = str(pk)
+            items.append({'title': title, 'count': count, 'query': params.urlencode(),
+                          'selected': pk == self.category_id})
+        items.sort(key=lambda item: (-item['count'], item['title']))
+        if None in self._categories:
+            items.append({'title': "Без категории", 'count': self._categories[None][1], 'query': None,
+                          'selected': False})
+        return items
+
+    def groups(self):
+        return sorted(
+            ({'name': name, 'count': count} for name, count in self._groups.values()),
+            key=lambda item: (-item['count'], item['name']),
+        )
+
+
+def all_categories_query(query_dict):
+    """GET-параметры ссылки «Все категории»: текущие фильтры без категории и курсора"""
+    params = query_dict.copy()
+    params.pop('cursor', None)
+    params.pop('category', None)
+    return params.urlencode()
+
+
+def estimated_count(model, using='default'):
+    """
+    Оценка числа строк таблицы из статистики PostgreSQL (pg_class.reltuples).
+
+    Обновляется VACUUM/ANALYZE и autovacuum, погрешность - доли процента.
+    None - оценки нет: другая СУБД или таблица ещё не анализировалась.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для большой таблицы без фильтров берёт оценку вместо COUNT(*).
+
+    COUNT(*) по всей таблице - последовательное чтение всех строк; с фильтрами
+    и поиском число считается как обычно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,42 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import JsonResponse
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    Состояние пула соединений psycopg или None, если пул не настроен.
+
+    checked_out - соединения, выданные запросам прямо сейчас; wait_ms_avg -
+    среднее ожидание свободного соединения. Счётчики накапливаются с запуска
+    процесса (get_stats() их не сбрасывает).
+    """
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+    raw = pool.get_stats()
+    size, available = raw.get('pool_size', 0), raw.get('pool_available', 0)
+    requests, wait_ms = raw.get('requests_num', 0), raw.get('requests_wait_ms', 0)
+    opened, connect_ms = raw.get('connections_num', 0), raw.get('connections_ms', 0)
+    return {
+        'min_size': raw.get('pool_min', 0),
+        'max_size': raw.get('pool_max', 0),
+        'size': size,
+        'available': available,
+        'checked_out': size - available,
+        'waiting': raw.get('requests_waiting', 0),
+        'requests': requests,
+        'wait_ms_total': wait_ms,
+        'wait_ms_avg': wait_ms / requests if requests else 0.0,
+        'timeouts': raw.get('requests_errors', 0),
+        'connections_opened': opened,
+        'connect_ms_avg': connect_ms / opened if opened else 0.0,
+        'connections_lost': raw.get('connections_lost', 0),
+        'returned_bad': raw.get('returns_bad', 0),
+    }
+
+
+@staff_member_required
+def db_pool_stats(request):
+    """Счётчики пула соединений этого процесса для администраторов"""
+    return JsonResponse({alias: pool_stats(alias) for alias in connections})
@@ -0,0 +1,141 @@
+import datetime
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .async_views import async_login_required
+from .models import Notes
+
+# Строк за одно обращение к серверному курсору: память не зависит от числа заметок
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder с полной точностью дат.
+
+    DjangoJSONEncoder обрезает время до миллисекунд, а updated_at из выгрузки
+    клиент передаёт обратно как since: обрезанное значение не равно записанному,
+    и курсор (updated_at, id) повторял бы уже полученные строки.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+_encoder = ExportJSONEncoder(ensure_ascii=False)
+
+
+def export_queryset(user, since=None, since_id=None):
+    """
+    Личные и групповые заметки пользователя в порядке (updated_at, id), только колонки выгрузки.
+
+    Продолжение выгрузки - курсор (updated_at, id) последней полученной строки:
+    строки с тем же updated_at и большим id не теряются. Без since_id берутся
+    строки с updated_at >= since (граничные могут прийти повторно).
+    """
+    queryset = Notes.objects.visible_to(user)
+    if since is not None and since_id is not None:
+        queryset = queryset.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_id))
+    elif since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset.order_by('updated_at', 'id').values(
+        'id', 'title', 'text', 'reminder', 'recurrence', 'next_fire_at', 'created_at', 'updated_at', 'user_id',
+        'category_id', 'group_id', category_title=F('category__title'), group_name=F('group__name'),
+    )
+
+
+def parse_params(query_dict):
+    """Возвращает (format, since, since_id) или бросает ValueError с текстом для клиента"""
+    fmt = query_dict.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}. Допустимо: {', '.join(FORMATS)}")
+    since = query_dict.get('since')
+    if since:
+        parsed = parse_datetime(since)
+        if parsed is None:
+            raise ValueError("Параметр since должен быть датой-временем ISO 8601")
+        since = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+    since_id = query_dict.get('since_id')
+    if since_id:
+        if not since:
+            raise ValueError("Параметр since_id используется вместе с since")
+        if not since_id.isdigit():
+            raise ValueError("Параметр since_id должен быть целым числом")
+        since_id = int(since_id)
+    return fmt, since or None, since_id or None
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield _encoder.encode(row) + '\n'
+
+
+def _json_array(rows):
+    # Массив собирается по частям: «[», элементы через запятую, «]»
+    yield '['
+    separator = '\n'
+    for row in rows:
+        yield separator + _encoder.encode(row)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+async def _ndjson_async(rows):
+    async for row in rows:
+        yield _encoder.encode(row) + '\n'
+
+
+async def _json_array_async(rows):
+    yield '['
+    separator = '\n'
+    async for row in rows:
+        yield separator + _encoder.encode(row)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def _response(stream, fmt):
+    response = StreamingHttpResponse(stream, content_type=FORMATS[fmt])
+    filename = f"notes-{timezone.now():%Y-%m-%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _bad_request(error):
+    return JsonResponse({'error': str(error)}, status=400, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def export_notes(request):
+    """Потоковая выгрузка заметок: ?format=ndjson|json&since=<updated_at>&since_id=<id>"""
+    try:
+        fmt, since, since_id = parse_params(request.GET)
+    except ValueError as e:
+        return _bad_request(e)
+    rows = export_queryset(request.user, since, since_id).iterator(chunk_size=CHUNK_SIZE)
+    return _response(_ndjson(rows) if fmt == 'ndjson' else _json_array(rows), fmt)
+
+
+@async_login_required
+async def aexport_notes(request):
+    """Асинхронный вариант для ASGI: строки читаются aiterator() без блокировки event loop"""
+    try:
+        fmt, since, since_id = parse_params(request.GET)
+    except ValueError as e:
+        return _bad_request(e)
+    rows = export_queryset(request.user, since, since_id).aiterator(chunk_size=CHUNK_SIZE)
+    return _response(_ndjson_async(rows) if fmt == 'ndjson' else _json_array_async(rows), fmt)
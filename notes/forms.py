@@ -1,5 +1,10 @@
+import datetime
+
 from django import forms
-from .models import Categories, Notes
+from django.utils import timezone
+from .models import Categories, Group, Notes
+from .recurrence import PRESETS
+from .search import RANKED_ORDERING, search_notes
 
 
 class NotesForm(forms.ModelForm):
@@ -12,24 +17,35 @@ class NotesForm(forms.ModelForm):
 
     class Meta:
         model = Notes
-        fields = ['title', 'text', 'category', 'reminder', 'group']
+        fields = ['title', 'text', 'category', 'reminder', 'recurrence', 'group']
 
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Название заметки'}),
             'text': forms.Textarea(attrs={'class': 'form-control','placeholder': 'Текст заметки'}),
-            'reminder': forms.DateTimeInput(attrs={'class': 'form-control','type': 'date'})
+            'reminder': forms.DateTimeInput(attrs={'class': 'form-control','type': 'date'}),
+            'recurrence': forms.Select(attrs={'class': 'form-select'}),
         }
 
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user', None)
+        group_ids = kwargs.pop('group_ids', None)
         super(NotesForm, self).__init__(*args, **kwargs)
 
-        # Если пользователь передан, ограничиваем выбор групп только теми,
-        # в которых состоит пользователь
-        if user:
-            self.fields['group'].queryset = user.note_groups.all()
+        # Если передан набор групп пользователя (request.note_group_ids или
+        # await agroup_ids(user)), ограничиваем выбор этими группами. Членство
+        # берётся из кеша; остаётся один запрос за названиями групп для списка,
+        # и тот выполняется только при рендеринге или проверке поля.
+        # Текущая группа заметки остаётся в списке, даже если автор из неё вышел.
+        if group_ids is not None:
+            allowed = {*group_ids, self.instance.group_id} - {None}
+            self.fields['group'].queryset = Group.objects.filter(pk__in=allowed)
             self.fields['group'].empty_label = "Личная заметка (без группы)"
 
+        # Готовые варианты повторения; правило с INTERVAL/UNTIL (из API или импорта) сохраняем в списке
+        choices = list(PRESETS)
+        if self.instance.recurrence and self.instance.recurrence not in dict(PRESETS):
+            choices.append((self.instance.recurrence, self.instance.recurrence))
+        self.fields['recurrence'].widget.choices = choices
+
         # Добавляем CSS-классы и другие атрибуты для полей
         for field in self.fields:
             self.fields[field].widget.attrs['class'] = 'form-control'
@@ -39,9 +55,14 @@ class NoteSearchForm(forms.Form):
     search_query = forms.CharField(
         max_length=100,
         required=False,
-        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Поиск по заголовку'}),
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Поиск по заголовку и тексту'}),
         label="Поиск"
     )
+    fuzzy = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label="Нечёткий поиск"
+    )
     category = forms.ModelChoiceField(
         queryset=Categories.objects.all(),
         required=False,
@@ -53,4 +74,50 @@ class NoteSearchForm(forms.Form):
     reminder_filter=forms.DateTimeField(
         required=False,
         label="Напоминания",
-        widget=forms.DateTimeInput(attrs={'class': 'form-control',"type": "date"}))
\ No newline at end of file
+        widget=forms.DateTimeInput(attrs={'class': 'form-control',"type": "date"}))
+
+    def filter_queryset(self, queryset, category=True):
+        """
+        Применяет к queryset поиск и фильтры формы (общий код sync и async представлений).
+
+        category=False - без фильтра по категории: выборка для счётчиков по категориям.
+        """
+        if not self.is_valid():
+            return queryset
+
+        # Полнотекстовый поиск по заголовку и тексту с ранжированием
+        search_query = self.cleaned_data.get('search_query')
+        if search_query:
+            queryset = search_notes(queryset, search_query, fuzzy=self.cleaned_data.get('fuzzy'))
+
+        # Фильтр по категории
+        if category and self.category_id is not None:
+            queryset = queryset.filter(category=self.category_id)
+
+        reminder_filter = self.cleaned_data.get('reminder_filter')
+        if reminder_filter:
+            # Ближайшее срабатывание в этот день. Диапазон вместо next_fire_at__date:
+            # по выражению над колонкой индекс не используется
+            day_start = timezone.make_aware(
+                datetime.datetime.combine(reminder_filter.date(), datetime.time.min)
+            )
+            queryset = queryset.filter(
+                next_fire_at__gte=day_start,
+                next_fire_at__lt=day_start + datetime.timedelta(days=1),
+            )
+
+        return queryset
+
+    @property
+    def category_id(self):
+        """Выбранная категория или None"""
+        if not self.is_valid() or self.cleaned_data.get('category') is None:
+            return None
+        return self.cleaned_data['category'].pk
+
+    @property
+    def ordering(self):
+        """Порядок для пагинации: по релевантности при поиске, иначе от новых к старым"""
+        if self.is_valid() and self.cleaned_data.get('search_query'):
+            return RANKED_ORDERING
+        return ('-created_at', '-id')
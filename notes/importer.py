@@ -0,0 +1,244 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import list_cache
+from .models import Categories, Group, Notes, note_excerpt
+
+DEFAULT_BATCH_SIZE = 5000
+READ_SIZE = 1 << 16
+
+# Колонки notes_notes, которые переносятся из файла (search_vector заполняет триггер)
+COLUMNS = ('id', 'title', 'text', 'excerpt', 'reminder', 'recurrence', 'next_fire_at', 'created_at', 'updated_at',
+           'category_id', 'group_id', 'user_id')
+UPDATE_FIELDS = ['title', 'text', 'excerpt', 'reminder', 'recurrence', 'next_fire_at', 'created_at', 'updated_at',
+                 'category', 'group', 'user']
+
+_SEPARATORS = ' \t\r\n,[]'
+
+
+def iter_json_records(fp, read_size=READ_SIZE):
+    """
+    Потоковый разбор JSON-массива объектов (формат dumpdata) или NDJSON.
+
+    Файл читается кусками по read_size символов, объекты верхнего уровня
+    декодируются по одному через JSONDecoder.raw_decode, так что в памяти
+    одновременно только текущий кусок и один объект.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    while True:
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = fp.read(read_size), 0
+            eof = not buffer
+        if pos >= len(buffer):
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Некорректный JSON: {e}") from e
+            # Объект не поместился в текущий кусок - дочитываем
+            chunk = fp.read(read_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        if not isinstance(record, dict):
+            raise ValueError(f"Ожидался JSON-объект, получено: {record!r}")
+        yield record
+        pos = end
+
+
+def _datetime(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Некорректная дата: {value!r}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def note_row(record):
+    """
+    Строка notes_notes из записи dumpdata ({"model": "notes.notes", "pk", "fields"})
+    или из выгрузки /notes/api/export/. Записи других моделей - None.
+    """
+    if 'model' in record:
+        if record['model'] != 'notes.notes':
+            return None
+        fields = record['fields']
+        row = {
+            'id': record.get('pk'),
+            'category_id': fields.get('category'),
+            'group_id': fields.get('group'),
+            'user_id': fields.get('user'),
+        }
+    else:
+        fields = record
+        row = {
+            'id': record.get('id'),
+            'category_id': record.get('category_id'),
+            'group_id': record.get('group_id'),
+            'user_id': record.get('user_id'),
+            'category_title': record.get('category_title'),
+        }
+    created_at = _datetime(fields.get('created_at')) or timezone.now()
+    text = fields.get('text', '')
+    reminder = _datetime(fields.get('reminder'))
+    row.update(
+        title=fields['title'],
+        text=text,
+        excerpt=note_excerpt(text),
+        reminder=reminder,
+        recurrence=fields.get('recurrence') or None,
+        # В старых выгрузках next_fire_at нет - ближайшее срабатывание равно reminder
+        next_fire_at=_datetime(fields['next_fire_at']) if 'next_fire_at' in fields else reminder,
+        created_at=created_at,
+        updated_at=_datetime(fields.get('updated_at')) or created_at,
+    )
+    return row
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """Отключает auto_now/auto_now_add, чтобы сохранить даты из файла"""
+    fields = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class NotesImporter:
+    """
+    Пакетная загрузка заметок.
+
+    Внешние ключи проверяются по множествам id, загруженным одним запросом на
+    таблицу. Ссылка на отсутствующего пользователя или группу - ошибка
+    (ValueError), с null_missing_fk=True - обнуляется (все FK заметки допускают
+    NULL); отсутствующая категория ищется по названию, иначе обнуляется.
+    Обнулённые ссылки считаются в stats['fk_nulled']. Пакеты пишутся через COPY (PostgreSQL + psycopg 3) или
+    bulk_create, с upsert по первичному ключу при upsert=True. Сигналы при этом
+    не отправляются, поэтому кеш списков сбрасывается один раз в конце.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, upsert=False, method='auto', progress=None,
+                 null_missing_fk=False):
+        if method == 'copy' and not self.copy_supported():
+            raise ValueError("COPY доступен только для PostgreSQL с драйвером psycopg 3")
+        self.batch_size = batch_size
+        self.upsert = upsert
+        self.null_missing_fk = null_missing_fk
+        self.use_copy = method == 'copy' or (method == 'auto' and self.copy_supported())
+        self.progress = progress
+        self.stats = {'read': 0, 'imported': 0, 'skipped': 0, 'fk_nulled': 0, 'seconds': 0.0}
+
+    @staticmethod
+    def copy_supported():
+        # cursor.copy() есть только у psycopg 3, у psycopg2 другой интерфейс
+        return connection.vendor == 'postgresql' and connection.Database.__name__ == 'psycopg'
+
+    def _load_maps(self):
+        self.category_ids = set(Categories.objects.values_list('pk', flat=True))
+        self.category_by_title = dict(Categories.objects.values_list('title', 'pk'))
+        self.group_ids = set(Group.objects.values_list('pk', flat=True))
+        self.user_ids = set(Notes._meta.get_field('user').related_model.objects.values_list('pk', flat=True))
+
+    def _resolve(self, row):
+        title = row.pop('category_title', None)
+        if row['category_id'] not in self.category_ids:
+            referenced = row['category_id'] is not None or title is not None
+            row['category_id'] = self.category_by_title.get(title)
+            if referenced and row['category_id'] is None:
+                self.stats['fk_nulled'] += 1
+        for column, known, label in (('group_id', self.group_ids, "группы"), ('user_id', self.user_ids, "пользователя")):
+            if row[column] is not None and row[column] not in known:
+                if not self.null_missing_fk:
+                    raise ValueError(
+                        f"Заметка {row['id']}: нет {label} с id {row[column]}. "
+                        f"Загрузите сначала связанные записи или обнулите такие ссылки (--null-missing-fk)"
+                    )
+                row[column] = None
+                self.stats['fk_nulled'] += 1
+        return row
+
+    def run(self, records):
+        started = time.perf_counter()
+        self._load_maps()
+        explicit_ids = False
+        batch = []
+        with preserve_timestamps(Notes):
+            for record in records:
+                self.stats['read'] += 1
+                row = note_row(record)
+                if row is None:
+                    self.stats['skipped'] += 1
+                    continue
+                explicit_ids = explicit_ids or row['id'] is not None
+                batch.append(self._resolve(row))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, started)
+                    batch = []
+            if batch:
+                self._flush(batch, started)
+
+        if explicit_ids:
+            self._reset_sequence()
+        list_cache.invalidate_all()
+        self.stats['seconds'] = time.perf_counter() - started
+        return self.stats
+
+    def _flush(self, batch, started):
+        with transaction.atomic():
+            if self.use_copy and all(row['id'] is not None for row in batch):
+                self._copy(batch)
+            else:
+                self._bulk_create(batch)
+        self.stats['imported'] += len(batch)
+        if self.progress:
+            elapsed = time.perf_counter() - started
+            self.progress(self.stats['imported'], self.stats['imported'] / elapsed if elapsed else 0.0)
+
+    def _bulk_create(self, batch):
+        options = {}
+        if self.upsert:
+            options = {'update_conflicts': True, 'unique_fields': ['id'], 'update_fields': UPDATE_FIELDS}
+        Notes.objects.bulk_create([Notes(**row) for row in batch], batch_size=len(batch), **options)
+
+    def _copy(self, batch):
+        table = Notes._meta.db_table
+        columns = ', '.join(COLUMNS)
+        with connection.cursor() as cursor:
+            target = table
+            if self.upsert:
+                target = 'notes_import'
+                cursor.execute(f"CREATE TEMP TABLE {target} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            with cursor.copy(f"COPY {target} ({columns}) FROM STDIN") as copy:
+                for row in batch:
+                    copy.write_row([row[column] for column in COLUMNS])
+            if self.upsert:
+                updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in COLUMNS if column != 'id')
+                cursor.execute(
+                    f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {target} "
+                    f"ON CONFLICT (id) DO UPDATE SET {updates}"
+                )
+
+    def _reset_sequence(self):
+        # После вставки с явными id счётчик автоинкремента должен догнать максимум
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Notes]):
+                cursor.execute(sql)
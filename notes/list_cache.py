@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .membership import group_ids
+from .metrics import LIST_CACHE
+
+logger = logging.getLogger(__name__)
+
+# Готовый HTML счётчика, карточек и навигации (notes/_notes_page.html)
+PAGE_TEMPLATE = 'notes/_notes_page.html'
+PAGE_TIMEOUT = 10 * 60
+
+PAGE_KEY = 'notes:list:page:{digest}'
+# Счётчики версий: любое изменение данных увеличивает счётчик, и все страницы,
+# в ключ которых он входит, перестают читаться
+GLOBAL_VERSION_KEY = 'notes:list:version:global'
+USER_VERSION_KEY = 'notes:list:version:user:{user_id}'
+GROUP_VERSION_KEY = 'notes:list:version:group:{group_id}'
+
+# GET-параметры, от которых зависит содержимое страницы
+PAGE_PARAMS = ('search_query', 'fuzzy', 'category', 'reminder_filter', 'cursor')
+
+
+class ListCacheStats:
+    """Счётчики попаданий и промахов в памяти процесса"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit):
+        LIST_CACHE.labels('hit' if hit else 'miss').inc()
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hit_ratio}
+
+
+stats = ListCacheStats()
+
+
+def normalized_params(query_dict):
+    """Значимые параметры в постоянном порядке, без лишних пробелов и пустых значений"""
+    params = []
+    for name in PAGE_PARAMS:
+        value = ' '.join(query_dict.get(name, '').split())
+        if value:
+            params.append((name, value))
+    return urlencode(params)
+
+
+def _version_keys(user, view_type, groups):
+    keys = [GLOBAL_VERSION_KEY, USER_VERSION_KEY.format(user_id=user.pk)]
+    if view_type != 'personal':
+        keys += [GROUP_VERSION_KEY.format(group_id=group_id) for group_id in sorted(groups)]
+    return keys
+
+
+def _new_version():
+    # Начальная версия - время: после вытеснения счётчика старые страницы не оживут
+    return time.time_ns()
+
+
+def _page_key(user, view_type, query_dict, versions):
+    raw = f"{user.pk}|{view_type}|{normalized_params(query_dict)}|{versions}"
+    return PAGE_KEY.format(digest=hashlib.sha1(raw.encode()).hexdigest())
+
+
+def page_key(user, view_type, query_dict):
+    """Ключ страницы списка: пользователь, тип списка, фильтры и версии данных"""
+    keys = _version_keys(user, view_type, group_ids(user) if view_type != 'personal' else ())
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return _page_key(user, view_type, query_dict, [versions[key] for key in keys])
+
+
+def get_page(key):
+    """Запись кеша страницы: {'html': ..., 'state': (max(updated_at), число строк)} или None"""
+    entry = cache.get(key)
+    stats.record(entry is not None)
+    return entry
+
+
+def lookup(user, view_type, query_dict):
+    """
+    Ключ страницы и её запись в кеше (None при промахе).
+
+    Синхронная: асинхронный список вызывает её одним переходом в синхронный
+    поток - у асинхронного API кеша каждое обращение (aget, aadd, каждый ключ
+    aget_many) - отдельный переход.
+    """
+    key = page_key(user, view_type, query_dict)
+    return key, get_page(key)
+
+
+def note_url_parts():
+    """
+    Ссылка на заметку как (префикс, суффикс) вокруг pk.
+
+    Вычисляется один раз на страницу вместо {% url %} в цикле по карточкам.
+    Не кешируется между запросами: префикс зависит от SCRIPT_NAME запроса.
+    """
+    prefix, _, suffix = reverse('notes:note_detail', kwargs={'pk': 0}).rpartition('0')
+    return prefix, suffix
+
+
+def _entry(context, state):
+    context = {**context, 'note_url': note_url_parts()}
+    return {'html': render_to_string(PAGE_TEMPLATE, context), 'state': state}
+
+
+def render_page(key, context, state):
+    """Рендерит фрагмент страницы и кладёт его в кеш вместе с состоянием выборки"""
+    entry = _entry(context, state)
+    cache.set(key, entry, PAGE_TIMEOUT)
+    return entry
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _new_version(), None)
+
+
+def _bump_on_commit(keys):
+    # После фиксации: иначе параллельный запрос закеширует под новой версией
+    # страницу, собранную из ещё не зафиксированных (старых) данных. Вне транзакции - сразу
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate(user_ids=(), group_ids=()):
+    """Сбрасывает кешированные списки пользователей и групп"""
+    keys = [USER_VERSION_KEY.format(user_id=pk) for pk in set(user_ids) if pk is not None]
+    keys += [GROUP_VERSION_KEY.format(group_id=pk) for pk in set(group_ids) if pk is not None]
+    _bump_on_commit(keys)
+
+
+def invalidate_notes(notes):
+    """Сбрасывает списки, в которых могут быть показаны эти заметки"""
+    notes = list(notes)
+    invalidate(user_ids=[note.user_id for note in notes], group_ids=[note.group_id for note in notes])
+
+
+def invalidate_all():
+    """Изменились общие данные карточек (например, название категории)"""
+    _bump_on_commit([GLOBAL_VERSION_KEY])
@@ -0,0 +1,59 @@
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from notes.static_build import ICONS_CSS, ICONS_DIR, ICON_FONTS, subset_icons, used_icons
+
+# Файлы, которые подключает каждая страница (notes/index.html)
+PAGE_ASSETS = (
+    'css/bootstrap.min.css',
+    ICONS_CSS,
+    *ICON_FONTS,
+    'notes/css/notes.css',
+    'js/bootstrap.bundle.min.js',
+)
+
+# Исходники набора иконок, которые страницы не подключают: ~2000 SVG, SCSS, карта глифов.
+# Без них сборка в разы быстрее, а STATIC_ROOT меньше
+ICON_SOURCES = (
+    'icons/bootstrap-icons/*.svg',
+    f'{ICONS_DIR}/bootstrap-icons.scss',
+    f'{ICONS_DIR}/bootstrap-icons.json',
+    f'{ICONS_DIR}/bootstrap-icons.min.css',
+)
+
+
+class Command(BaseCommand):
+    help = 'Собирает статику: урезает шрифт иконок, добавляет хеши в имена, сжимает gzip и brotli'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-subset', action='store_true',
+                            help='Не урезать шрифт иконок и собрать исходники набора (SVG и т.д.)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Очистить STATIC_ROOT перед сборкой')
+
+    def handle(self, *args, **options):
+        ignore_patterns = []
+        if not options['no_subset']:
+            # fontTools предупреждает о несущественных особенностях исходного шрифта
+            logging.getLogger('fontTools').setLevel(logging.ERROR)
+            icons = used_icons()
+            self.stdout.write(f"Иконки в шаблонах: {', '.join(icons) or 'нет'}")
+            for name, (before, after) in subset_icons(icons, settings.STATIC_BUILD_DIR).items():
+                self.stdout.write(f"  {name}: {before} -> {after} байт")
+            ignore_patterns = list(ICON_SOURCES)
+            self.stdout.write("Файлы из STATIC_BUILD_DIR перекрывают исходные - "
+                              "сообщения collectstatic «Found another file» для них ожидаемы")
+
+        call_command('collectstatic', interactive=False, clear=options['clear'], ignore_patterns=ignore_patterns,
+                     verbosity=options['verbosity'], stdout=self.stdout)
+
+        self.stdout.write("Размеры файлов страницы (исходный / gzip / brotli):")
+        for name in PAGE_ASSETS:
+            path = staticfiles_storage.path(staticfiles_storage.stored_name(name))
+            sizes = [os.path.getsize(p) if os.path.exists(p) else None for p in (path, path + '.gz', path + '.br')]
+            self.stdout.write(f"  {name}: " + ' / '.join('-' if size is None else str(size) for size in sizes))
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from notes.importer import DEFAULT_BATCH_SIZE, NotesImporter, iter_json_records
+
+
+class Command(BaseCommand):
+    help = 'Загружает заметки из JSON (формат dumpdata) или NDJSON пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками, «-» - стандартный ввод')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Сколько строк вставлять за одну транзакцию')
+        parser.add_argument('--upsert', action='store_true',
+                            help='Обновлять заметки с уже существующим id вместо ошибки')
+        parser.add_argument('--method', choices=('auto', 'copy', 'bulk'), default='auto',
+                            help='COPY (PostgreSQL) или bulk_create; auto - COPY, если доступен')
+        parser.add_argument('--null-missing-fk', action='store_true',
+                            help='Обнулять ссылки на отсутствующих пользователей и группы вместо ошибки')
+
+    def handle(self, *args, **options):
+        def progress(imported, rate):
+            self.stdout.write(f"Загружено: {imported}, {rate:.0f} строк/с")
+
+        try:
+            importer = NotesImporter(
+                batch_size=options['batch_size'],
+                upsert=options['upsert'],
+                method=options['method'],
+                progress=progress,
+                null_missing_fk=options['null_missing_fk'],
+            )
+            if options['path'] == '-':
+                stats = importer.run(iter_json_records(sys.stdin))
+            else:
+                with open(options['path'], encoding='utf-8-sig') as fp:
+                    stats = importer.run(iter_json_records(fp))
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+        except IntegrityError as e:
+            raise CommandError(
+                f"Ошибка целостности: {e}. Если заметки с такими id уже загружены, "
+                f"повторите загрузку с --upsert"
+            )
+
+        rate = stats['imported'] / stats['seconds'] if stats['seconds'] else 0.0
+        self.stdout.write(
+            f"Готово: {stats['imported']} заметок за {stats['seconds']:.2f} с ({rate:.0f} строк/с), "
+            f"пропущено записей других моделей: {stats['skipped']}, "
+            f"обнулено ссылок на отсутствующие записи: {stats['fk_nulled']}"
+        )
@@ -0,0 +1,64 @@
+import datetime
+import logging
+import os
+import signal
+
+from django.core.management.base import BaseCommand
+from prometheus_client import start_http_server
+
+from notes.reminders import ReminderDispatcher, DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, DEFAULT_RATE, make_bot
+from notes.scheduler import ReminderScheduler
+from notes.sessions import clear_expired_sessions
+
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+CHANNEL_ID = os.getenv("TELEGRAM_CHANNEL_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
+
+class Command(BaseCommand):
+    help = 'Постоянно работающий планировщик напоминаний (вместо запуска send_notes по cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon-hours', type=float, default=6,
+                            help='На сколько часов вперёд держать напоминания в памяти')
+        parser.add_argument('--refresh-interval', type=int, default=600,
+                            help='Как часто (в секундах) перечитывать напоминания из БД')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+        parser.add_argument('--rate', type=float, default=DEFAULT_RATE)
+        parser.add_argument('--outbox-interval', type=int, default=30,
+                            help='Как часто (в секундах) повторять отложенные отправки из очереди')
+        parser.add_argument('--clear-sessions-interval', type=int, default=60 * 60,
+                            help='Как часто (в секундах) удалять истёкшие сессии; 0 - не удалять')
+        parser.add_argument('--metrics-port', type=int,
+                            help='Отдавать метрики Prometheus (notes_reminders) на этом порту')
+
+    def handle(self, *args, **options):
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+        dispatcher = ReminderDispatcher(
+            make_bot(TELEGRAM_TOKEN, options['concurrency'], TELEGRAM_API_URL),
+            CHANNEL_ID,
+            chunk_size=options['chunk_size'],
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+        )
+        scheduler = ReminderScheduler(
+            dispatcher,
+            horizon=datetime.timedelta(hours=options['horizon_hours']),
+            refresh_interval=options['refresh_interval'],
+        )
+        # Повторы с задержкой (и сообщения, оставшиеся после падения другого воркера)
+        scheduler.add_periodic(dispatcher.deliver, options['outbox_interval'])
+        if options['clear_sessions_interval']:
+            scheduler.add_periodic(clear_expired_sessions, options['clear_sessions_interval'])
+
+        if options['metrics_port']:
+            start_http_server(options['metrics_port'])
+
+        signal.signal(signal.SIGINT, scheduler.stop)
+        signal.signal(signal.SIGTERM, scheduler.stop)
+
+        self.stdout.write("Планировщик напоминаний запущен")
+        scheduler.run()
+        self.stdout.write(f"Планировщик остановлен: {scheduler.metrics.as_dict()}")
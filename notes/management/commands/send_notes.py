@@ -1,37 +1,37 @@
 import os
-import asyncio
 from django.core.management.base import BaseCommand
-from notes.models import Notes
-from django.utils import timezone
-from telegram import Bot
-from asgiref.sync import sync_to_async
+
+from notes.reminders import ReminderDispatcher, DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, DEFAULT_RATE, make_bot
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHANNEL_ID = os.getenv("TELEGRAM_CHANNEL_ID")
+# Другой адрес Bot API, например локальный telegram-bot-api сервер
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
 
 class Command(BaseCommand):
-    help = 'Отправляет заметки с напоминанием в телеграм'
-
-    def handle(self, *args, **kwargs):
-        asyncio.run(self.send_notes())
-
-    async def send_notes(self):
-        now = timezone.now()
-
-        # оборачиваем синхронный ORM-запрос
-        notes = await sync_to_async(list)(
-            Notes.objects.filter(reminder__lte=now, reminder__isnull=False)
+    help = 'Ставит наступившие напоминания в очередь и отправляет очередь в телеграм'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Сколько заметок захватывать за одну транзакцию')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help='Сколько сообщений отправлять одновременно')
+        parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                            help='Не больше сообщений в секунду')
+
+    def handle(self, *args, **options):
+        dispatcher = ReminderDispatcher(
+            make_bot(TELEGRAM_TOKEN, options['concurrency'], TELEGRAM_API_URL),
+            CHANNEL_ID,
+            chunk_size=options['chunk_size'],
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+        )
+        try:
+            stats = dispatcher.dispatch()
+        finally:
+            dispatcher.close()
+        self.stdout.write(
+            f"В очередь: {stats['enqueued']}, отправлено: {stats['sent']}, "
+            f"отложено: {stats['failed'] - stats['dead']}, не отправлено: {stats['dead']}"
         )
-
-        bot = Bot(token=TELEGRAM_TOKEN)
-
-        for note in notes:
-            text = f"📌 <b>{note.title}</b>\n\n{note.text}"
-
-            # отправляем сообщение
-            await bot.send_message(chat_id=CHANNEL_ID, text=text, parse_mode="HTML")
-
-            # сбрасываем напоминание
-            note.reminder = None
-            await sync_to_async(note.save)()
-
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Версия набора групп пользователя; при изменении состава групп увеличивается,
+# и старые записи кеша просто перестают читаться (истекут по таймауту)
+VERSION_KEY = 'notes:membership:version:{user_id}'
+GROUPS_KEY = 'notes:membership:groups:{user_id}'
+CACHE_TIMEOUT = 60 * 60
+
+# Атрибут пользователя, в котором набор запоминается на время запроса
+_MEMO_ATTR = '_note_group_ids'
+
+
+def group_ids(user):
+    """
+    Множество id групп, в которых состоит пользователь.
+
+    Вычисляется один раз на объект пользователя (то есть на запрос - request.user
+    один на весь запрос), между запросами берётся из общего кеша. Проверка
+    доступа к групповой заметке сводится к `group_id in group_ids(user)`.
+    Набор читается из основной БД, не из реплики: отстающая реплика закешировала
+    бы старый состав групп на весь CACHE_TIMEOUT.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    memo = getattr(user, _MEMO_ATTR, None)
+    if memo is None:
+        version = cache.get(VERSION_KEY.format(user_id=user.pk), 1)
+        key = GROUPS_KEY.format(user_id=user.pk)
+        memo = cache.get(key, version=version)
+        if memo is None:
+            memo = frozenset(user.note_groups.using(DEFAULT_DB_ALIAS).values_list('pk', flat=True))
+            cache.set(key, memo, CACHE_TIMEOUT, version=version)
+        setattr(user, _MEMO_ATTR, memo)
+    return memo
+
+
+async def agroup_ids(user):
+    if not user.is_authenticated:
+        return frozenset()
+    memo = getattr(user, _MEMO_ATTR, None)
+    if memo is None:
+        version = await cache.aget(VERSION_KEY.format(user_id=user.pk), 1)
+        key = GROUPS_KEY.format(user_id=user.pk)
+        memo = await cache.aget(key, version=version)
+        if memo is None:
+            memo = frozenset([pk async for pk in user.note_groups.using(DEFAULT_DB_ALIAS).values_list('pk', flat=True)])
+            await cache.aset(key, memo, CACHE_TIMEOUT, version=version)
+        setattr(user, _MEMO_ATTR, memo)
+    return memo
+
+
+def version(user):
+    """Версия набора групп пользователя: меняется при любом изменении его членства"""
+    if not user.is_authenticated:
+        return 0
+    return cache.get(VERSION_KEY.format(user_id=user.pk), 1)
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        key = VERSION_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Версии ещё нет в кеше: читалась версия по умолчанию 1
+            cache.set(key, 2, None)
+
+
+def invalidate(user_ids):
+    """
+    Сбрасывает закешированные наборы групп пользователей (новая версия ключа).
+
+    Версия меняется после фиксации транзакции: иначе параллельный запрос успел
+    бы прочитать ещё старый состав группы и закешировать его под новой версией.
+    Вне транзакции - сразу.
+    """
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
@@ -0,0 +1,218 @@
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    'notes_request_duration_seconds', 'Время обработки запроса до ответа представления',
+    ['view', 'route', 'method'],
+)
+REQUESTS = Counter('notes_requests', 'Запросы по коду ответа', ['view', 'route', 'method', 'status'])
+DB_QUERIES = Histogram(
+    'notes_request_db_queries', 'SQL-запросов за HTTP-запрос', ['view', 'route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_TIME = Histogram('notes_request_db_duration_seconds', 'Суммарное время SQL за HTTP-запрос', ['view', 'route'])
+TEMPLATE_RENDER = Histogram('notes_template_render_seconds', 'Время рендеринга шаблона', ['template'])
+SYNC_TO_ASYNC_WAIT = Histogram(
+    'notes_sync_to_async_wait_seconds', 'Ожидание свободного потока в sync_to_async', ['function'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+LIST_CACHE = Counter('notes_list_cache_lookups', 'Обращения к кешу страниц списка', ['result'])
+REMINDERS = Counter('notes_reminders', 'Отправка напоминаний в Telegram', ['result'])
+
+
+# --- SQL: число и время запросов текущего HTTP-запроса
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Контекст копируется в потоки sync_to_async, поэтому запросы из них тоже учитываются
+_request_stats = ContextVar('notes_request_stats', default=None)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: обёртка ставится на каждое соединение.
+
+    connection.execute_wrapper() действует только в своём потоке, а асинхронные
+    представления ходят в БД из потоков sync_to_async - у каждого своё соединение.
+    """
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+# --- задержка запросов
+
+def _labels(request):
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched', 'unmatched'
+    return match.view_name, match.route
+
+
+def _observe(request, response, started, stats):
+    view, route = _labels(request)
+    REQUEST_LATENCY.labels(view, route, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(view, route, request.method, response.status_code).inc()
+    DB_QUERIES.labels(view, route).observe(stats.queries)
+    DB_TIME.labels(view, route).observe(stats.db_time)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    Гистограммы задержки, числа и времени SQL по имени URL и маршруту.
+
+    Маршрут (resolver_match.route) различает синхронные и асинхронные
+    представления с одинаковым именем: notes/ и notes/a/. Для потоковых ответов
+    учитывается время до начала отдачи.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats, started = RequestStats(), time.perf_counter()
+            token = _request_stats.set(stats)
+            try:
+                response = await get_response(request)
+            finally:
+                _request_stats.reset(token)
+            _observe(request, response, started, stats)
+            return response
+    else:
+        def middleware(request):
+            stats, started = RequestStats(), time.perf_counter()
+            token = _request_stats.set(stats)
+            try:
+                response = get_response(request)
+            finally:
+                _request_stats.reset(token)
+            _observe(request, response, started, stats)
+            return response
+    return middleware
+
+
+# --- sync_to_async: сколько вызов ждал свободный поток
+
+def timed_sync_to_async(func, thread_sensitive=True):
+    """
+    sync_to_async, который записывает ожидание от вызова до начала выполнения.
+
+    При thread_sensitive=True все вызовы запроса идут в один поток, и очередь к
+    нему под нагрузкой - отдельная составляющая задержки асинхронных страниц.
+    """
+    name = getattr(func, '__qualname__', type(func).__name__)
+
+    def run(enqueued, *args, **kwargs):
+        SYNC_TO_ASYNC_WAIT.labels(name).observe(time.perf_counter() - enqueued)
+        return func(*args, **kwargs)
+
+    call = sync_to_async(run, thread_sensitive=thread_sensitive)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await call(time.perf_counter(), *args, **kwargs)
+    return wrapper
+
+
+# --- шаблоны
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            name = self.origin.template_name or 'from_string'
+            TEMPLATE_RENDER.labels(name).observe(time.perf_counter() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Бэкенд шаблонов Django с замером времени рендеринга (шаблоны верхнего уровня)"""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+# --- состояние процесса, которое не считается счётчиками: пул соединений
+
+class DatabasePoolCollector:
+    def collect(self):
+        from .dbpool import pool_stats
+
+        connections_gauge = GaugeMetricFamily(
+            'notes_db_pool_connections', 'Соединения пула по состоянию', labels=['alias', 'state'])
+        waiting = GaugeMetricFamily('notes_db_pool_waiting', 'Запросы в очереди за соединением', labels=['alias'])
+        wait_time = CounterMetricFamily(
+            'notes_db_pool_wait_seconds', 'Суммарное ожидание соединения', labels=['alias'])
+        timeouts = CounterMetricFamily('notes_db_pool_timeouts', 'Таймауты ожидания соединения', labels=['alias'])
+        for alias in connections:
+            stats = pool_stats(alias)
+            if stats is None:
+                continue
+            connections_gauge.add_metric([alias, 'checked_out'], stats['checked_out'])
+            connections_gauge.add_metric([alias, 'available'], stats['available'])
+            waiting.add_metric([alias], stats['waiting'])
+            wait_time.add_metric([alias], stats['wait_ms_total'] / 1000)
+            timeouts.add_metric([alias], stats['timeouts'])
+        yield from (connections_gauge, waiting, wait_time, timeouts)
+
+
+_pool_collector = DatabasePoolCollector()
+REGISTRY.register(_pool_collector)
+
+
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus.
+
+    С PROMETHEUS_MULTIPROC_DIR (несколько воркеров gunicorn/uvicorn, команды
+    send_notes и run_reminder_scheduler) счётчики собираются из файлов всех
+    процессов. При заданном METRICS_TOKEN нужен заголовок Authorization: Bearer,
+    без токена (кроме DEBUG) - вход под сотрудником (is_staff).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponseForbidden()
+    elif not settings.DEBUG and not request.user.is_staff:
+        return HttpResponseForbidden()
+    registry = REGISTRY
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_pool_collector)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
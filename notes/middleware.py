@@ -0,0 +1,72 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
+
+from . import routers
+from .membership import group_ids
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@sync_and_async_middleware
+def group_membership_middleware(get_response):
+    """
+    Ленивый request.note_group_ids - множество id групп текущего пользователя.
+
+    Запрос к кешу (и при промахе к БД) выполняется только при первом обращении.
+    Асинхронным представлениям вместо него нужен await agroup_ids(request.user):
+    набор запоминается на том же объекте пользователя.
+    """
+    def attach(request):
+        request.note_group_ids = SimpleLazyObject(lambda: group_ids(request.user))
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            attach(request)
+            return await get_response(request)
+    else:
+        def middleware(request):
+            attach(request)
+            return get_response(request)
+    return middleware
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Состояние для PrimaryReplicaRouter на время запроса.
+
+    POST и другие изменяющие запросы читают из основной БД: форма редактирования
+    не должна сохранить поверх свежих данных устаревшую копию из реплики.
+    Если запрос записал что-то в БД (создание, изменение или удаление заметки,
+    вход), ответ ставит cookie routers.PIN_COOKIE на REPLICA_PIN_SECONDS: пока
+    она есть, чтения этого пользователя идут в основную БД, и после редиректа
+    он видит свои изменения, даже если реплика отстаёт.
+    """
+    def pinned(request):
+        return request.method not in SAFE_METHODS or routers.PIN_COOKIE in request.COOKIES
+
+    def finish(response, state):
+        if state.wrote and routers.replicas():
+            response.set_cookie(routers.PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = routers.begin_request(pinned(request))
+            try:
+                response = await get_response(request)
+            finally:
+                routers.end_request(token)
+            return finish(response, state)
+    else:
+        def middleware(request):
+            state, token = routers.begin_request(pinned(request))
+            try:
+                response = get_response(request)
+            finally:
+                routers.end_request(token)
+            return finish(response, state)
+    return middleware
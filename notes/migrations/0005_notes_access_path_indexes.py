@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_notes_user_group_notes_group'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(condition=models.Q(('group__isnull', True)), fields=['user', '-created_at', '-id'], name='notes_personal_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(fields=['group', '-created_at', '-id'], name='notes_group_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(condition=models.Q(('reminder__isnull', False)), fields=['reminder'], name='notes_reminder_idx'),
+        ),
+    ]
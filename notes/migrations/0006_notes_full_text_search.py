@@ -0,0 +1,97 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:16
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION notes_notes_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER notes_notes_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, text ON notes_notes
+    FOR EACH ROW EXECUTE FUNCTION notes_notes_search_vector_update()
+    """,
+    # Заполняем вектор для уже существующих строк
+    "UPDATE notes_notes SET title = title",
+    "CREATE INDEX notes_search_vector_gin ON notes_notes USING gin (search_vector)",
+    "CREATE INDEX notes_title_trgm_gin ON notes_notes USING gin (title gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS notes_title_trgm_gin",
+    "DROP INDEX IF EXISTS notes_search_vector_gin",
+    "DROP TRIGGER IF EXISTS notes_notes_search_vector_trigger ON notes_notes",
+    "DROP FUNCTION IF EXISTS notes_notes_search_vector_update()",
+]
+
+# SQLite (dev/test): внешнее FTS5-содержимое поверх notes_notes, синхронизируется триггерами
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE notes_notes_fts USING fts5(
+        title, text, content='notes_notes', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_notes_fts_insert AFTER INSERT ON notes_notes BEGIN
+        INSERT INTO notes_notes_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_notes_fts_delete AFTER DELETE ON notes_notes BEGIN
+        INSERT INTO notes_notes_fts(notes_notes_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_notes_fts_update AFTER UPDATE OF title, text ON notes_notes BEGIN
+        INSERT INTO notes_notes_fts(notes_notes_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO notes_notes_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO notes_notes_fts(notes_notes_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS notes_notes_fts_update",
+    "DROP TRIGGER IF EXISTS notes_notes_fts_delete",
+    "DROP TRIGGER IF EXISTS notes_notes_fts_insert",
+    "DROP TABLE IF EXISTS notes_notes_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_notes_access_path_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='notes',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
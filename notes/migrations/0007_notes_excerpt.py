@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:04
+
+from django.db import migrations, models, transaction
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+# Копия notes.models.note_excerpt на момент миграции: миграция не должна
+# зависеть от текущего кода модели
+EXCERPT_WORDS = 30
+EXCERPT_CHARS = 500
+
+
+def note_excerpt(text):
+    return Truncator(Truncator(text).words(EXCERPT_WORDS, truncate=" …")).chars(EXCERPT_CHARS)
+
+
+def backfill_excerpt(apps, schema_editor):
+    """
+    Заполняет excerpt у существующих заметок порциями по первичному ключу.
+
+    Каждая порция - отдельная транзакция (миграция не атомарная): на большой
+    таблице не держим блокировки всех строк до конца миграции.
+    """
+    Notes = apps.get_model('notes', 'Notes')
+    db = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=db):
+            batch = list(
+                Notes.objects.using(db).filter(pk__gt=last_pk, excerpt__isnull=True)
+                .only('id', 'text').order_by('pk')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for note in batch:
+                note.excerpt = note_excerpt(note.text)
+            Notes.objects.using(db).bulk_update(batch, ['excerpt'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('notes', '0006_notes_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notes',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(backfill_excerpt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:15
+
+from django.db import migrations, models, transaction
+from django.db.models import F
+
+import notes.recurrence
+
+BATCH_SIZE = 1000
+
+
+def backfill_next_fire_at(apps, schema_editor):
+    """Переносит текущие напоминания в next_fire_at порциями по первичному ключу (как 0007)"""
+    Notes = apps.get_model('notes', 'Notes')
+    db = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=db):
+            pks = list(
+                Notes.objects.using(db).filter(pk__gt=last_pk, reminder__isnull=False, next_fire_at__isnull=True)
+                .order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE]
+            )
+            if not pks:
+                break
+            Notes.objects.using(db).filter(pk__in=pks).update(next_fire_at=F('reminder'))
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('notes', '0008_reminder_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notes',
+            name='next_fire_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Следующее напоминание'),
+        ),
+        migrations.AddField(
+            model_name='notes',
+            name='recurrence',
+            field=models.CharField(blank=True, max_length=100, null=True, validators=[notes.recurrence.validate_rule], verbose_name='Повторять'),
+        ),
+        # Старый индекс по reminder ещё нужен для выборки переносимых строк
+        migrations.RunPython(backfill_next_fire_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(condition=models.Q(('next_fire_at__isnull', False)), fields=['next_fire_at'], name='notes_next_fire_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='notes',
+            name='notes_reminder_idx',
+        ),
+    ]
@@ -1,9 +1,25 @@
 from django.utils import timezone
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
+from django.utils.text import Truncator
 
 from django.contrib.auth.models import User
 
+from .counts import NoteFacets
+from .membership import agroup_ids, group_ids
+from .recurrence import describe as describe_recurrence, validate_rule
+
+# Начало текста в карточке списка: столько слов, не длиннее EXCERPT_CHARS символов
+EXCERPT_WORDS = 30
+EXCERPT_CHARS = 500
+
+
+def note_excerpt(text):
+    """Начало текста для карточки - то же, что truncatewords:30, но считается при записи"""
+    return Truncator(Truncator(text).words(EXCERPT_WORDS, truncate=" …")).chars(EXCERPT_CHARS)
+
+
 # Create your models here.
 class Categories(models.Model):
     title = models.CharField(max_length=100, unique=True, verbose_name="Название категории")
@@ -28,11 +44,87 @@ class Group(models.Model):
         verbose_name = "Группа"
         verbose_name_plural = "Группы"
 
+class NotesQuerySet(models.QuerySet):
+    """Общие выборки заметок для sync/async представлений, админки и send_notes"""
+
+    # Колонки, которые нужны карточке в списке заметок
+    # updated_at входит в ключ кеша карточки (_notes_page.html)
+    # text не загружается: в карточке - excerpt
+    LIST_FIELDS = (
+        'id', 'title', 'excerpt', 'next_fire_at', 'recurrence', 'created_at', 'updated_at', 'category', 'group',
+        'category__title', 'group__name',
+    )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() не вызывается - excerpt и next_fire_at заполняем здесь
+        objs = list(objs)
+        for obj in objs:
+            if obj.excerpt is None:
+                obj.excerpt = note_excerpt(obj.text)
+            if obj.next_fire_at is None:
+                obj.next_fire_at = obj.reminder
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'text' in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.excerpt = note_excerpt(obj.text)
+            fields = [*fields, 'excerpt']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def personal(self, user):
+        """Личные заметки пользователя (без группы)"""
+        return self.filter(user=user, group=None)
+
+    def for_groups(self, user):
+        """Заметки групп, в которых состоит пользователь"""
+        return self.filter(group__in=Group.objects.filter(members=user).values('pk'))
+
+    def visible_to(self, user):
+        """Все заметки, которые пользователь может просматривать"""
+        return self.filter(
+            models.Q(user=user) | models.Q(group__in=Group.objects.filter(members=user).values('pk'))
+        )
+
+    def for_list(self):
+        """Карточки списка: только нужные колонки и связи одним JOIN"""
+        return self.select_related('category', 'group').only(*self.LIST_FIELDS)
+
+    def for_detail(self):
+        return self.select_related('category', 'group').defer('search_vector')
+
+    def _facet_rows(self):
+        return self.order_by().values('category_id', 'category__title', 'group_id', 'group__name').annotate(
+            count=models.Count('pk'),
+            with_reminder=models.Count('pk', filter=models.Q(next_fire_at__isnull=False)),
+            last_modified=models.Max('updated_at'),
+        )
+
+    def facets(self, category_id=None):
+        """Число заметок, счётчики категорий и групп и состояние выборки одним агрегирующим запросом"""
+        return NoteFacets(self._facet_rows(), category_id)
+
+    async def afacets(self, category_id=None):
+        return NoteFacets([row async for row in self._facet_rows()], category_id)
+
+    def due(self, now):
+        """Заметки, напоминание по которым уже наступило (диапазон по индексу notes_next_fire_idx)"""
+        return self.filter(next_fire_at__lte=now)
+
+
 class Notes(models.Model):
     category = models.ForeignKey(Categories, on_delete=models.SET_NULL, null=True, blank=True, related_name="notes", verbose_name="Категория")
     title = models.CharField(max_length=100, verbose_name="Заголовок")
     text  = models.TextField(verbose_name="Содержание")
     reminder = models.DateTimeField(null=True, blank=True, verbose_name="Напоминание")
+    # Правило повторения в духе RRULE (notes/recurrence.py), пусто - напоминание однократное.
+    # null вместо '' по умолчанию: в SQLite колонка добавляется без пересоздания таблицы
+    recurrence = models.CharField(max_length=100, null=True, blank=True, validators=[validate_rule],
+                                  verbose_name="Повторять")
+    # Ближайшее срабатывание напоминания. Задаётся равным reminder при его изменении,
+    # ReminderDispatcher после отправки сдвигает его по правилу или обнуляет
+    next_fire_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Следующее напоминание")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
 
@@ -40,13 +132,145 @@ class Notes(models.Model):
                            verbose_name="Автор")
     group = models.ForeignKey(Group, on_delete=models.SET_NULL, null=True, blank=True, related_name='notes', verbose_name="Группа")
 
+    # Поддерживается в save() и bulk_create()/bulk_update(), чтобы список не читал text
+    excerpt = models.TextField(null=True, blank=True, editable=False, verbose_name="Начало текста")
+
+    # Заполняется триггером БД из title и text (см. миграцию 0006), в SQLite не используется
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = NotesQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        extra_fields = set()
+        # При отложенном text (заметка из списка) Django сохранит только загруженные поля
+        if 'text' not in deferred and (update_fields is None or 'text' in update_fields):
+            self.excerpt = note_excerpt(self.text)
+            extra_fields.add('excerpt')
+        # Новое время или правило - следующее срабатывание считается заново.
+        # Иначе (например, изменили только заголовок) сдвинутое диспетчером не трогаем
+        if (not {'reminder', 'recurrence'} & deferred
+                and (update_fields is None or {'reminder', 'recurrence'} & set(update_fields))
+                and getattr(self, '_loaded_reminder', None) != (self.reminder, self.recurrence)):
+            self.next_fire_at = self.reminder
+            extra_fields.add('next_fire_at')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *extra_fields}
+        super().save(*args, **kwargs)
+        self._loaded_reminder = (self.reminder, self.recurrence)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Владелец на момент загрузки: при переносе заметки сбрасываем кеш списков
+        # и прежнего владельца (notes/signals.py). Отложенные поля не загружаем.
+        instance._loaded_owner = (instance.__dict__.get('user_id'), instance.__dict__.get('group_id'))
+        # Напоминание на момент загрузки: next_fire_at пересчитывается только при его изменении
+        if 'reminder' in instance.__dict__ and 'recurrence' in instance.__dict__:
+            instance._loaded_reminder = (instance.reminder, instance.recurrence)
+        return instance
+
+    def recurrence_display(self):
+        return describe_recurrence(self.recurrence)
+
+    def is_visible_to(self, user):
+        """Автор заметки или участник её группы"""
+        if self.user_id is not None and self.user_id == user.pk:
+            return True
+        return self.group_id is not None and self.group_id in group_ids(user)
+
+    async def ais_visible_to(self, user):
+        if self.user_id is not None and self.user_id == user.pk:
+            return True
+        return self.group_id is not None and self.group_id in await agroup_ids(user)
+
     def get_absolute_url(self):
         return reverse('notes:note_detail', kwargs={'pk': self.pk})
 
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        ReminderOutbox.cancel_for_notes([pk])
+        return result
+
     class Meta:
         verbose_name = "Заметка"
         verbose_name_plural = "Заметки"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Личные заметки: filter(user=..., group=None) ORDER BY -created_at, -id
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=models.Q(group__isnull=True),
+                name='notes_personal_created_idx',
+            ),
+            # Групповые заметки: filter(group__in=...) ORDER BY -created_at, -id
+            models.Index(fields=['group', '-created_at', '-id'], name='notes_group_created_idx'),
+            # Наступившие напоминания (next_fire_at <= now) и фильтр по дате напоминания.
+            # Повторяющиеся заметки - по одной строке индекса, сколько бы раз они ни срабатывали
+            models.Index(
+                fields=['next_fire_at'],
+                condition=models.Q(next_fire_at__isnull=False),
+                name='notes_next_fire_idx',
+            ),
+        ]
+
+class ReminderOutbox(models.Model):
+    """
+    Сообщение напоминания к отправке в Telegram (transactional outbox).
+
+    Строка создаётся в той же транзакции, в которой у заметки сбрасывается
+    reminder, поэтому напоминание не теряется и не ставится в очередь дважды.
+    Отправкой занимается ReminderDispatcher.deliver(): неудачные попытки
+    повторяются с экспоненциальной задержкой, после MAX_ATTEMPTS (или при
+    постоянной ошибке вроде «chat not found») сообщение остаётся со статусом dead.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, "Ожидает отправки"),
+        (SENT, "Отправлено"),
+        (DEAD, "Не отправлено"),
+    ]
+
+    # Без внешнего ключа: сообщение - снимок заметки на момент постановки в очередь,
+    # история отправок остаётся и после удаления заметки. Ещё не отправленные
+    # сообщения удалённой заметки помечаются dead (cancel_for_notes)
+    note_id = models.BigIntegerField(verbose_name="Заметка")
+    chat_id = models.CharField(max_length=64, verbose_name="Чат")
+    text = models.TextField(verbose_name="Текст сообщения")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    # Для pending - не раньше какого времени отправлять; при захвате воркером сдвигается
+    # на время аренды, чтобы другой воркер не взял то же сообщение
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    last_error = models.TextField(blank=True, default='', verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+
+    def __str__(self):
+        return f"{self.note_id}: {self.get_status_display()}"
+
+    @classmethod
+    def cancel_for_notes(cls, note_ids):
+        """Заметки удалены - их ожидающие сообщения больше не отправляются"""
+        return cls.objects.filter(note_id__in=note_ids, status=cls.PENDING).update(
+            status=cls.DEAD, last_error="Заметка удалена",
+        )
+
+    class Meta:
+        verbose_name = "Сообщение напоминания"
+        verbose_name_plural = "Очередь напоминаний"
+        indexes = [
+            # Выборка воркера: status='pending' AND next_attempt_at <= now ORDER BY next_attempt_at, id
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='notes_outbox_pending_idx',
+            ),
+        ]
@@ -0,0 +1,127 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+# Фиксированный размер страницы списка заметок
+PAGE_SIZE = 20
+
+
+class KeysetPage:
+    """Одна страница keyset-пагинации"""
+
+    def __init__(self, object_list, has_next, next_cursor=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Курсорная (keyset) пагинация.
+
+    Вместо OFFSET следующая страница начинается строго после последней строки
+    предыдущей: WHERE (created_at, id) < (<created_at>, <id>). Поэтому стоимость
+    любой страницы одинакова и не зависит от того, насколько далеко пользователь
+    пролистал список. Признак "есть ещё" считается выборкой per_page + 1 строк,
+    без материализации всего queryset.
+    """
+
+    def __init__(self, queryset, ordering=('-created_at', '-id'), per_page=PAGE_SIZE):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = []
+        for name, _ in self._fields():
+            value = getattr(obj, name)
+            if isinstance(value, (datetime.datetime, datetime.date)):
+                # isoformat() сохраняет микросекунды, в отличие от DjangoJSONEncoder
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает значения полей сортировки или бросает ValueError"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise ValueError("Некорректный курсор") from e
+
+        fields = self._fields()
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError("Некорректный курсор")
+
+        decoded = []
+        for (name, _), value in zip(fields, values):
+            try:
+                field = self.queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Аннотация (например, ранг поиска) - значение уже JSON-совместимое
+                decoded.append(value)
+                continue
+            try:
+                decoded.append(field.to_python(value))
+            except ValidationError as e:
+                raise ValueError("Некорректный курсор") from e
+        return decoded
+
+    def _after(self, values):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _page_queryset(self, cursor):
+        qs = self.queryset.order_by(*self.ordering)
+        if cursor:
+            try:
+                qs = qs.filter(self._after(self.decode_cursor(cursor)))
+            except ValueError:
+                # Битый курсор - просто показываем первую страницу
+                pass
+        return qs[:self.per_page + 1]
+
+    def _make_page(self, rows):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = self.encode_cursor(rows[-1]) if has_next else None
+        return KeysetPage(rows, has_next, next_cursor)
+
+    def get_page(self, cursor=None):
+        return self._make_page(list(self._page_queryset(cursor)))
+
+    async def aget_page(self, cursor=None):
+        rows = [obj async for obj in self._page_queryset(cursor)]
+        return self._make_page(rows)
+
+
+def page_querystring(query_dict, cursor):
+    """GET-параметры текущего запроса с заменённым курсором (фильтры сохраняются)"""
+    params = query_dict.copy()
+    params.pop('cursor', None)
+    if cursor:
+        params['cursor'] = cursor
+    return params.urlencode()
@@ -0,0 +1,20 @@
+# Тип списка (личные/групповые заметки) хранится в cookie, а не в сессии:
+# переключение не требует записи сессии в БД
+VIEW_TYPE_COOKIE = 'notes_view_type'
+VIEW_TYPES = ('personal', 'group')
+VIEW_TYPE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def get_view_type(request):
+    """Выбранный тип списка; неизвестное значение cookie - личные заметки"""
+    value = request.COOKIES.get(VIEW_TYPE_COOKIE)
+    return value if value in VIEW_TYPES else 'personal'
+
+
+def toggled_view_type(request):
+    return 'group' if get_view_type(request) == 'personal' else 'personal'
+
+
+def set_view_type(response, view_type):
+    response.set_cookie(VIEW_TYPE_COOKIE, view_type, max_age=VIEW_TYPE_MAX_AGE, httponly=True, samesite='Lax')
+    return response
@@ -0,0 +1,125 @@
+import calendar
+import datetime
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+# Частоты повторения. Шаг не меньше суток: планировщик перечитывает ближайшие
+# напоминания раз в несколько минут и успевает узнать о следующем срабатывании
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+# Варианты для формы; в поле можно записать и правило с INTERVAL/UNTIL
+PRESETS = [
+    ('', "Не повторять"),
+    ('FREQ=DAILY', "Каждый день"),
+    ('FREQ=WEEKLY', "Каждую неделю"),
+    ('FREQ=MONTHLY', "Каждый месяц"),
+    ('FREQ=YEARLY', "Каждый год"),
+]
+
+
+class Rule(NamedTuple):
+    freq: str
+    interval: int = 1
+    until: datetime.datetime | None = None
+
+
+def _parse_until(value):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            parsed = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if value.endswith('Z'):
+            return parsed.replace(tzinfo=datetime.timezone.utc)
+        return timezone.make_aware(parsed)
+    raise ValueError(f"Некорректная дата UNTIL: {value}")
+
+
+def parse_rule(value):
+    """
+    Разбирает правило в духе RRULE (RFC 5545): FREQ=WEEKLY;INTERVAL=2;UNTIL=20271231.
+
+    Поддерживаются FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL и UNTIL.
+    Пустое значение - None (напоминание не повторяется). Ошибка - ValueError.
+    """
+    if not value:
+        return None
+    parts = {}
+    for part in value.upper().removeprefix('RRULE:').split(';'):
+        if not part:
+            continue
+        name, sep, part_value = part.partition('=')
+        if not sep or not part_value:
+            raise ValueError(f"Некорректная часть правила: {part}")
+        parts[name] = part_value
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ должен быть одним из: {', '.join(FREQUENCIES)}")
+    interval = parts.pop('INTERVAL', '1')
+    if not interval.isdigit() or int(interval) < 1:
+        raise ValueError("INTERVAL должен быть целым числом больше нуля")
+    until = parts.pop('UNTIL', None)
+    if parts:
+        raise ValueError(f"Неподдерживаемые части правила: {', '.join(parts)}")
+    return Rule(freq, int(interval), _parse_until(until) if until else None)
+
+
+def validate_rule(value):
+    try:
+        parse_rule(value)
+    except ValueError as e:
+        raise ValidationError(str(e)) from e
+
+
+def _add_months(value, months):
+    """Сдвиг на months месяцев; 31 января + 1 месяц = 28 (29) февраля"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(rule, start, after):
+    """
+    Первое срабатывание правила позже after (или None, если правило закончилось).
+
+    Срабатывания отсчитываются от start - исходного времени напоминания, -
+    поэтому 31-е число не «съезжает» после короткого месяца. Номер нужного
+    срабатывания вычисляется арифметически, без перебора пропущенных, а
+    календарные шаги считаются по местному времени (не сдвигаются при переходе
+    на летнее время).
+    """
+    if isinstance(rule, str):
+        rule = parse_rule(rule)
+    if rule is None:
+        return None
+    local_start = timezone.localtime(start).replace(tzinfo=None)
+    local_after = timezone.localtime(after).replace(tzinfo=None)
+
+    if rule.freq in ('DAILY', 'WEEKLY'):
+        step = datetime.timedelta(days=rule.interval * (7 if rule.freq == 'WEEKLY' else 1))
+        steps = (local_after - local_start) // step + 1 if local_after >= local_start else 0
+        candidate = local_start + steps * step
+    else:
+        months = rule.interval * (12 if rule.freq == 'YEARLY' else 1)
+        elapsed = (local_after.year - local_start.year) * 12 + local_after.month - local_start.month
+        steps = max(elapsed // months, 0)
+        candidate = _add_months(local_start, steps * months)
+        while candidate <= local_after:
+            steps += 1
+            candidate = _add_months(local_start, steps * months)
+
+    candidate = timezone.make_aware(candidate)
+    if rule.until is not None and candidate > rule.until:
+        return None
+    return candidate
+
+
+def describe(value):
+    """Подпись правила для карточки заметки"""
+    for preset, label in PRESETS:
+        if preset and preset == value:
+            return label
+    return value or ''
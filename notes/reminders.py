@@ -0,0 +1,305 @@
+import asyncio
+import datetime
+import html
+import logging
+import random
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
+
+from . import list_cache
+from .metrics import REMINDERS
+from .models import Notes, ReminderOutbox
+from .recurrence import next_occurrence
+
+logger = logging.getLogger(__name__)
+
+# Глобальный лимит Bot API - около 30 сообщений в секунду
+DEFAULT_RATE = 25
+DEFAULT_CHUNK_SIZE = 200
+DEFAULT_CONCURRENCY = 10
+
+# Повторы через 30 с, 1, 2, 4 ... минуты (не больше часа), затем - dead
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30
+BACKOFF_MAX = 60 * 60
+# Сколько секунд захваченное сообщение недоступно другим воркерам. Если воркер
+# упал, сообщение уйдёт повторно после аренды (доставка «хотя бы раз»)
+LEASE_SECONDS = 5 * 60
+
+# Ошибки, которые повтор не исправит: чат не найден, бот заблокирован
+PERMANENT_ERRORS = (BadRequest, Forbidden)
+
+
+def format_reminder(note):
+    return f"📌 <b>{html.escape(note.title)}</b>\n\n{html.escape(note.text)}"
+
+
+def make_bot(token, concurrency=DEFAULT_CONCURRENCY, base_url=None):
+    """
+    Bot с пулом из concurrency HTTP-соединений.
+
+    По умолчанию у Bot одно соединение, и одновременные отправки ждут друг друга.
+    base_url - другой адрес Bot API (локальный сервер или замена в тестах).
+    """
+    kwargs = {'base_url': base_url} if base_url else {}
+    return Bot(token=token, request=HTTPXRequest(connection_pool_size=concurrency), **kwargs)
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: экспонента со случайным разбросом"""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return datetime.timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+class RateLimiter:
+    """Равномерно распределяет отправки: не больше rate сообщений в секунду"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Telegram вернул RetryAfter - все отправки ждут указанное время"""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+class ReminderDispatcher:
+    """
+    Отправка напоминаний в Telegram через таблицу ReminderOutbox.
+
+    enqueue_due() порциями захватывает наступившие заметки (SELECT ... FOR
+    UPDATE SKIP LOCKED) и в той же транзакции создаёт сообщения в outbox и
+    одним UPDATE на порцию сдвигает next_fire_at повторяющихся заметок на
+    следующее срабатывание, а у однократных сбрасывает напоминание. Сеть в
+    этой транзакции не участвует.
+
+    deliver() отправляет сообщения из outbox. Порция захватывается арендой
+    (next_attempt_at сдвигается на LEASE_SECONDS), отправляется пулом из
+    concurrency корутин с общим ограничением частоты, а результат записывается
+    после отправки. Пока идёт запись одной порции и захват следующей, отправка
+    предыдущей продолжается: event loop работает в отдельном потоке, а работа с
+    БД остаётся в вызывающем. Поэтому скорость ограничивает rate, а не время
+    ответа Telegram.
+    """
+
+    def __init__(self, bot, chat_id, chunk_size=DEFAULT_CHUNK_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                 rate=DEFAULT_RATE, max_retries=3, max_attempts=MAX_ATTEMPTS):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.rate = rate
+        # Сколько раз подряд ждать RetryAfter внутри одной попытки
+        self.max_retries = max_retries
+        self.max_attempts = max_attempts
+        self._loop = None
+        self._thread = None
+
+    def dispatch(self, now=None):
+        """Ставит наступившие напоминания в очередь и отправляет всё, что пора отправить"""
+        now = now or timezone.now()
+        enqueued = self.enqueue_due(now)
+        stats = self.deliver(now)
+        stats['enqueued'] = enqueued
+        return stats
+
+    # --- постановка в очередь
+
+    def _claim_notes(self, now):
+        return list(
+            Notes.objects.due(now)
+            .select_for_update(skip_locked=True)
+            .only('id', 'title', 'text', 'reminder', 'recurrence', 'next_fire_at', 'user', 'group')
+            .order_by('next_fire_at', 'id')[:self.chunk_size]
+        )
+
+    def enqueue_due(self, now=None):
+        """Переносит наступившие напоминания в outbox, возвращает их число"""
+        now = now or timezone.now()
+        enqueued = 0
+        while True:
+            with transaction.atomic():
+                notes = self._claim_notes(now)
+                if not notes:
+                    break
+                ReminderOutbox.objects.bulk_create([
+                    ReminderOutbox(note_id=note.pk, chat_id=self.chat_id, text=format_reminder(note),
+                                   next_attempt_at=now)
+                    for note in notes
+                ])
+                # Заметки уже в очереди и больше не наступившие. updated_at - время
+                # записи (now может быть задан в прошлом): от него зависят ключ
+                # карточки, ETag страницы заметки и выгрузка по since
+                updated_at = timezone.now()
+                for note in notes:
+                    self._advance(note, now)
+                    note.updated_at = updated_at
+                Notes.objects.bulk_update(notes, ['reminder', 'next_fire_at', 'updated_at'],
+                                          batch_size=self.chunk_size)
+
+            # UPDATE не отправляет сигналы, а напоминание выводится в карточках списка
+            list_cache.invalidate_notes(notes)
+            enqueued += len(notes)
+            if len(notes) < self.chunk_size:
+                break
+        return enqueued
+
+    @staticmethod
+    def _advance(note, now):
+        """
+        Следующее срабатывание после now: пропущенные за время простоя не
+        догоняются, отправляется одно напоминание. Однократное или закончившееся
+        по UNTIL напоминание сбрасывается.
+        """
+        if note.recurrence and note.reminder is not None:
+            try:
+                note.next_fire_at = next_occurrence(note.recurrence, note.reminder, now)
+            except ValueError as e:
+                # Правило записано в обход формы (импорт, update()) - считаем напоминание однократным
+                logger.warning("Некорректное правило повторения у заметки %s: %s", note.pk, e)
+                note.next_fire_at = None
+            if note.next_fire_at is not None:
+                return
+        note.reminder = note.next_fire_at = None
+
+    # --- отправка
+
+    def _claim_messages(self, now):
+        with transaction.atomic():
+            messages = list(
+                ReminderOutbox.objects.filter(status=ReminderOutbox.PENDING, next_attempt_at__lte=now)
+                .select_for_update(skip_locked=True)
+                .order_by('next_attempt_at', 'id')[:self.chunk_size]
+            )
+            if messages:
+                lease_until = timezone.now() + datetime.timedelta(seconds=LEASE_SECONDS)
+                ReminderOutbox.objects.filter(pk__in=[m.pk for m in messages]).update(next_attempt_at=lease_until)
+        return messages
+
+    def deliver(self, now=None):
+        """Отправляет сообщения outbox, которым пора; возвращает счётчики sent/failed/dead"""
+        now = now or timezone.now()
+        stats = {'sent': 0, 'failed': 0, 'dead': 0}
+        in_flight = None
+        while True:
+            messages = self._claim_messages(now)
+            future = self._submit(self._send_chunk(messages)) if messages else None
+            if in_flight is not None:
+                self._record(in_flight.result(), stats)
+            in_flight = future
+            if len(messages) < self.chunk_size:
+                break
+        if in_flight is not None:
+            self._record(in_flight.result(), stats)
+        return stats
+
+    def _record(self, results, stats):
+        """Записывает результаты порции: отправленные - одним UPDATE, ошибки - bulk_update"""
+        now = timezone.now()
+        sent = [message.pk for message, error in results if error is None]
+        if sent:
+            ReminderOutbox.objects.filter(pk__in=sent).update(
+                status=ReminderOutbox.SENT, sent_at=now, attempts=F('attempts') + 1, last_error='',
+            )
+        failed, dead = [], 0
+        for message, error in results:
+            if error is None:
+                continue
+            message.attempts += 1
+            message.last_error = str(error)
+            if isinstance(error, PERMANENT_ERRORS) or message.attempts >= self.max_attempts:
+                message.status = ReminderOutbox.DEAD
+                dead += 1
+                logger.error("Напоминание по заметке %s не отправлено (попыток %s): %s",
+                             message.note_id, message.attempts, error)
+            elif isinstance(error, RetryAfter):
+                message.next_attempt_at = now + _retry_after(error)
+            else:
+                message.next_attempt_at = now + retry_delay(message.attempts)
+            failed.append(message)
+        if failed:
+            ReminderOutbox.objects.bulk_update(failed, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+        # failed - не отправленные в этот проход, dead - те из них, что больше не повторяются
+        stats['sent'] += len(sent)
+        stats['failed'] += len(failed)
+        stats['dead'] += dead
+        REMINDERS.labels('sent').inc(len(sent))
+        REMINDERS.labels('failed').inc(len(failed) - dead)
+        REMINDERS.labels('dead').inc(dead)
+
+    # --- event loop в отдельном потоке
+
+    def _submit(self, coro):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name='reminder-sender', daemon=True)
+            self._thread.start()
+            # Один event loop на всё время жизни диспетчера: HTTP-клиент бота привязан к своему циклу
+            asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _start(self):
+        self._limiter = RateLimiter(self.rate)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if hasattr(self.bot, 'initialize'):
+            await self.bot.initialize()
+
+    def close(self):
+        if self._loop is None:
+            return
+        if hasattr(self.bot, 'shutdown'):
+            asyncio.run_coroutine_threadsafe(self.bot.shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+
+    async def _send_chunk(self, messages):
+        """[(сообщение, None или ошибка)]; семафор общий для всех порций в работе"""
+        async def send(message):
+            async with self._semaphore:
+                return message, await self._send(message)
+
+        return await asyncio.gather(*(send(message) for message in messages))
+
+    async def _send(self, message):
+        error = None
+        for _ in range(self.max_retries + 1):
+            await self._limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id=message.chat_id, text=message.text, parse_mode="HTML")
+                return None
+            except RetryAfter as e:
+                delay = _retry_after(e).total_seconds()
+                logger.warning("Telegram просит подождать %s с (заметка %s)", delay, message.note_id)
+                REMINDERS.labels('retry').inc()
+                self._limiter.pause(delay)
+                error = e
+            except TelegramError as e:
+                logger.warning("Ошибка отправки напоминания по заметке %s: %s", message.note_id, e)
+                return e
+        return error
+
+
+def _retry_after(error):
+    delay = error.retry_after
+    if not isinstance(delay, datetime.timedelta):
+        delay = datetime.timedelta(seconds=delay)
+    return delay
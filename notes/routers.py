@@ -0,0 +1,85 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Cookie «читать с основной БД»: ставится ответом на запрос, который что-то записал
+PIN_COOKIE = 'notes_primary'
+
+
+class RoutingState:
+    """Маршрутизация чтений в рамках одного HTTP-запроса"""
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Объект общий для запроса и его потоков sync_to_async (контекст копируется, объект - тот же)
+_routing = ContextVar('notes_db_routing', default=None)
+
+
+def begin_request(pinned):
+    state = RoutingState(pinned)
+    return state, _routing.set(state)
+
+
+def end_request(token):
+    _routing.reset(token)
+
+
+def pin_primary():
+    """
+    Оставшиеся чтения текущего запроса - из основной БД.
+
+    Для выборок, которые кладутся в общий кеш: отстающая реплика иначе
+    закешировала бы старые данные под уже новой версией ключа.
+    """
+    state = _routing.get()
+    if state is not None:
+        state.pinned = True
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+class PrimaryReplicaRouter:
+    """
+    Записи - в основную БД, чтения внутри HTTP-запросов - в случайную реплику.
+
+    Чтение идёт в основную БД, если:
+    - реплик нет (settings.DATABASE_REPLICAS пуст);
+    - это не HTTP-запрос (команды, планировщик напоминаний, миграции);
+    - запрос уже что-то записал или у пользователя cookie PIN_COOKIE после
+      недавней записи (видит свои изменения, пока реплика догоняет);
+    - запрос заполняет общий кеш (pin_primary);
+    - открыта транзакция на основной БД (select_for_update, atomic в формах).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        aliases = replicas()
+        if not aliases or state is None or state.pinned or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит с репликацией
+        if db in replicas():
+            return False
+        return None
@@ -0,0 +1,220 @@
+import datetime
+import heapq
+import logging
+import threading
+import time
+
+from django.db import close_old_connections, connection
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import Notes
+
+logger = logging.getLogger(__name__)
+
+# Канал Postgres LISTEN/NOTIFY, в который web-процессы сообщают об изменении напоминаний
+NOTIFY_CHANNEL = 'notes_reminders'
+
+
+def encode_notification(note):
+    return f"{note.pk}:{note.next_fire_at.isoformat() if note.next_fire_at else ''}"
+
+
+def decode_notification(payload):
+    pk, _, when = payload.partition(':')
+    return int(pk), (datetime.datetime.fromisoformat(when) if when else None)
+
+
+class SchedulerMetrics:
+    """Счётчики планировщика: глубина очереди и задержка отправки"""
+
+    def __init__(self):
+        self.queue_depth = 0
+        self.dispatched = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class ReminderScheduler:
+    """
+    Долгоживущий планировщик напоминаний.
+
+    Держит в памяти min-heap (next_fire_at, note_id) на горизонт horizon вперёд и
+    спит ровно до ближайшего напоминания, а не опрашивает таблицу по cron.
+    Изменения приходят через сигналы post_save/post_delete (в этом же процессе)
+    и через Postgres LISTEN/NOTIFY (из web-процессов). Записи в куче - только
+    подсказки: отправкой и отметкой занимается ReminderDispatcher, который сам
+    выбирает из БД всё наступившее. Поэтому устаревшая запись безвредна, а
+    после простоя все пропущенные напоминания уходят первым же проходом.
+    """
+
+    def __init__(self, dispatcher, horizon=datetime.timedelta(hours=6), refresh_interval=600):
+        self.dispatcher = dispatcher
+        self.horizon = horizon
+        self.refresh_interval = refresh_interval
+        self.metrics = SchedulerMetrics()
+        self._heap = []
+        # note_id -> актуальное время напоминания; записи кучи с другим временем устарели
+        self._scheduled = {}
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._next_refresh = 0.0
+        # [время следующего запуска (monotonic), интервал, функция]
+        self._periodic = []
+
+    # --- очередь
+
+    def schedule(self, note_id, when):
+        with self._condition:
+            if when is None:
+                self._scheduled.pop(note_id, None)
+            elif when <= timezone.now() + self.horizon:
+                self._scheduled[note_id] = when
+                heapq.heappush(self._heap, (when, note_id))
+            self.metrics.queue_depth = len(self._scheduled)
+            self._condition.notify()
+
+    def unschedule(self, note_id):
+        self.schedule(note_id, None)
+
+    def refresh(self):
+        """Перечитывает из БД все напоминания до конца горизонта (включая просроченные)"""
+        limit = timezone.now() + self.horizon
+        rows = Notes.objects.due(limit).order_by().values_list('pk', 'next_fire_at')
+        with self._condition:
+            self._scheduled = dict(rows.iterator())
+            self._heap = [(when, pk) for pk, when in self._scheduled.items()]
+            heapq.heapify(self._heap)
+            self.metrics.queue_depth = len(self._scheduled)
+        self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def _pop_due(self, now):
+        """Снимает с кучи наступившие записи и возвращает их время"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, pk = heapq.heappop(self._heap)
+            if self._scheduled.get(pk) == when:
+                del self._scheduled[pk]
+                due.append(when)
+        self.metrics.queue_depth = len(self._scheduled)
+        return due
+
+    def seconds_until_next(self, now):
+        with self._condition:
+            while self._heap and self._scheduled.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            return max((self._heap[0][0] - now).total_seconds(), 0.0)
+
+    def add_periodic(self, func, interval):
+        """Задача обслуживания в том же цикле (например, очистка истёкших сессий); первый запуск - сразу"""
+        self._periodic.append([0.0, interval, func])
+
+    def run_periodic(self):
+        """Запускает наступившие периодические задачи и возвращает время следующего запуска"""
+        now = time.monotonic()
+        for job in self._periodic:
+            if now >= job[0]:
+                job[0] = now + job[1]
+                try:
+                    job[2]()
+                except Exception:
+                    # Ошибка обслуживания не должна останавливать отправку напоминаний
+                    logger.exception("Ошибка периодической задачи %s", job[2].__name__)
+        return min((job[0] for job in self._periodic), default=None)
+
+    # --- отправка
+
+    def run_pending(self, now=None):
+        """Отправляет наступившие напоминания, если такие есть в очереди"""
+        now = now or timezone.now()
+        with self._condition:
+            due = self._pop_due(now)
+        if not due:
+            return None
+
+        stats = self.dispatcher.dispatch(now=now)
+        lag = (timezone.now() - min(due)).total_seconds()
+        self.metrics.dispatched += stats['sent']
+        self.metrics.failed += stats['failed']
+        self.metrics.last_lag = lag
+        self.metrics.max_lag = max(self.metrics.max_lag, lag)
+        logger.info("Отправлено %s напоминаний (ошибок %s), задержка %.2f с, в очереди %s",
+                    stats['sent'], stats['failed'], lag, self.metrics.queue_depth)
+        return stats
+
+    def run(self):
+        self.connect_signals()
+        listener = self._start_listener()
+        try:
+            while not self._stopping:
+                close_old_connections()
+                if time.monotonic() >= self._next_refresh:
+                    self.refresh()
+                self.run_pending()
+                next_periodic = self.run_periodic()
+
+                timeout = self.seconds_until_next(timezone.now())
+                wake_at = self._next_refresh if next_periodic is None else min(self._next_refresh, next_periodic)
+                until_wake = max(wake_at - time.monotonic(), 0.0)
+                timeout = until_wake if timeout is None else min(timeout, until_wake)
+                with self._condition:
+                    if not self._stopping:
+                        self._condition.wait(timeout)
+        finally:
+            self.disconnect_signals()
+            self.dispatcher.close()
+            if listener is not None:
+                listener.join(timeout=5)
+            close_old_connections()
+            logger.info("Планировщик остановлен: %s", self.metrics.as_dict())
+
+    def stop(self, *args):
+        """Корректная остановка: текущая порция дописывается, новые не начинаются"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+    # --- источники изменений
+
+    def _on_note_saved(self, sender, instance, **kwargs):
+        self.schedule(instance.pk, instance.next_fire_at)
+
+    def _on_note_deleted(self, sender, instance, **kwargs):
+        self.unschedule(instance.pk)
+
+    def connect_signals(self):
+        post_save.connect(self._on_note_saved, sender=Notes, weak=False, dispatch_uid='reminder_scheduler_save')
+        post_delete.connect(self._on_note_deleted, sender=Notes, weak=False, dispatch_uid='reminder_scheduler_delete')
+
+    def disconnect_signals(self):
+        post_save.disconnect(sender=Notes, dispatch_uid='reminder_scheduler_save')
+        post_delete.disconnect(sender=Notes, dispatch_uid='reminder_scheduler_delete')
+
+    def _start_listener(self):
+        if connection.vendor != 'postgresql':
+            # В SQLite нет LISTEN/NOTIFY: изменения из других процессов подхватит refresh()
+            return None
+        thread = threading.Thread(target=self._listen, name='reminder-listener', daemon=True)
+        thread.start()
+        return thread
+
+    def _listen(self):
+        import psycopg
+
+        params = connection.get_connection_params()
+        params.pop('cursor_factory', None)
+        params.pop('context', None)
+        with psycopg.connect(**params, autocommit=True) as conn:
+            conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            while not self._stopping:
+                for notify in conn.notifies(timeout=1.0):
+                    try:
+                        self.schedule(*decode_notification(notify.payload))
+                    except ValueError:
+                        logger.warning("Некорректное уведомление: %r", notify.payload)
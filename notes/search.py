@@ -0,0 +1,73 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Контент приложения русскоязычный, но встречаются и английские слова
+SEARCH_CONFIGS = ('russian', 'english')
+# Сортировка результатов поиска для keyset-пагинации
+RANKED_ORDERING = ('-rank', '-created_at', '-id')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_notes(queryset, query, fuzzy=False):
+    """
+    Полнотекстовый поиск по заголовку и тексту с ранжированием.
+
+    Возвращает queryset с аннотацией rank (чем больше, тем релевантнее).
+    В PostgreSQL используется хранимый search_vector с GIN-индексом,
+    в SQLite (dev/test) - виртуальная таблица FTS5 notes_notes_fts.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _postgres_search(queryset, query, fuzzy)
+    if vendor == 'sqlite':
+        return _sqlite_search(queryset, query, fuzzy)
+    # Прочие СУБД: прежний поиск подстроки в заголовке
+    return queryset.filter(title__icontains=query).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def _postgres_search(queryset, query, fuzzy):
+    search_query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(query, config=config, search_type='websearch')
+        search_query = part if search_query is None else search_query | part
+
+    rank = SearchRank(F('search_vector'), search_query)
+    if not fuzzy:
+        return queryset.filter(search_vector=search_query).annotate(rank=rank)
+
+    # Нечёткий режим: опечатки в заголовке через pg_trgm. Отбор - оператором %
+    # (trigram_similar, порог pg_trgm.similarity_threshold, по умолчанию 0.3): его
+    # обслуживает индекс notes_title_trgm_gin, а условие на вычисленную похожесть -
+    # нет. TrigramSimilarity - только для ранжирования
+    return queryset.annotate(rank=rank + TrigramSimilarity('title', query)).filter(
+        Q(search_vector=search_query) | Q(title__trigram_similar=query)
+    )
+
+
+def fts5_query(query, prefix=False):
+    """Экранирует пользовательский ввод в запрос FTS5: каждое слово в кавычках, через AND"""
+    tokens = _TOKEN_RE.findall(query)
+    suffix = '*' if prefix else ''
+    return ' '.join(f'"{token}"{suffix}' for token in tokens)
+
+
+def _sqlite_search(queryset, query, fuzzy):
+    match = fts5_query(query, prefix=fuzzy)
+    if not match:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    table = queryset.model._meta.db_table
+    # bm25() отрицателен и меньше для лучших совпадений; заголовок весит больше текста
+    rank = RawSQL(
+        f'SELECT -bm25(notes_notes_fts, 2.0, 1.0) FROM notes_notes_fts '
+        f'WHERE notes_notes_fts MATCH %s AND notes_notes_fts.rowid = "{table}"."id"',
+        [match],
+        output_field=FloatField(),
+    )
+    matches = RawSQL('SELECT rowid FROM notes_notes_fts WHERE notes_notes_fts MATCH %s', [match])
+    return queryset.filter(pk__in=matches).annotate(rank=rank)
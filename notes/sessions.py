@@ -0,0 +1,17 @@
+import logging
+from importlib import import_module
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def clear_expired_sessions():
+    """
+    Удаляет истёкшие сессии (то же, что manage.py clearsessions).
+
+    Для signed_cookies ничего не делает - сессии хранятся у клиента.
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    engine.SessionStore.clear_expired()
+    logger.info("Истёкшие сессии удалены (%s)", settings.SESSION_ENGINE)
@@ -0,0 +1,95 @@
+from django.contrib.auth.models import Group as AuthGroup, Permission, User
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import list_cache, membership
+from .context_processors import invalidate_group_permissions
+from .metrics import install_db_wrapper
+from .models import Categories, Group, Notes
+from .scheduler import NOTIFY_CHANNEL, encode_notification
+
+
+@receiver(post_save, sender=Notes, dispatch_uid='notes_notify_reminder_scheduler')
+def notify_reminder_scheduler(sender, instance, using, **kwargs):
+    """Сообщает планировщику напоминаний (run_reminder_scheduler) о новом напоминании"""
+    if instance.next_fire_at is None or connections[using].vendor != 'postgresql':
+        return
+    payload = encode_notification(instance)
+
+    def send():
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, payload])
+
+    transaction.on_commit(send, using=using)
+
+
+@receiver(m2m_changed, sender=Group.members.through, dispatch_uid='notes_membership_changed')
+def invalidate_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """Состав группы изменился - сбрасываем закешированные наборы групп участников"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # user.note_groups.add(...) - меняется набор одного пользователя
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # После clear() состав уже не узнать, поэтому берём участников до очистки
+        user_ids = list(instance.members.values_list('pk', flat=True))
+    else:
+        user_ids = pk_set
+    membership.invalidate(user_ids)
+    list_cache.invalidate(user_ids=user_ids)
+
+
+@receiver(pre_delete, sender=Group, dispatch_uid='notes_membership_group_deleted')
+def invalidate_membership_on_group_delete(sender, instance, **kwargs):
+    # Каскадное удаление строк связи не отправляет m2m_changed
+    member_ids = list(instance.members.values_list('pk', flat=True))
+    membership.invalidate(member_ids)
+    # Заметки группы станут личными (SET_NULL через UPDATE, без сигналов)
+    author_ids = instance.notes.order_by().values_list('user_id', flat=True).distinct()
+    list_cache.invalidate(user_ids=[*member_ids, *author_ids], group_ids=[instance.pk])
+
+
+@receiver(post_save, sender=User, dispatch_uid='notes_membership_user_created')
+def invalidate_membership_on_user_created(sender, instance, created, **kwargs):
+    # id удалённого пользователя может достаться новому - старый набор ему не подходит
+    if created:
+        membership.invalidate([instance.pk])
+        list_cache.invalidate(user_ids=[instance.pk])
+
+
+@receiver(m2m_changed, sender=AuthGroup.permissions.through, dispatch_uid='notes_group_permissions_changed')
+@receiver(post_save, sender=AuthGroup, dispatch_uid='notes_group_permissions_group_saved')
+@receiver(post_delete, sender=AuthGroup, dispatch_uid='notes_group_permissions_group_deleted')
+@receiver(post_delete, sender=Permission, dispatch_uid='notes_group_permissions_permission_deleted')
+def reset_group_permissions(sender, **kwargs):
+    """Права групп auth изменились - context processor перечитает их при следующем обращении"""
+    invalidate_group_permissions()
+
+
+@receiver(post_save, sender=Notes, dispatch_uid='notes_list_cache_note_saved')
+@receiver(post_delete, sender=Notes, dispatch_uid='notes_list_cache_note_deleted')
+def invalidate_note_lists(sender, instance, **kwargs):
+    """Заметка изменилась - сбрасываем списки её владельца, группы и прежних владельцев"""
+    user_id, group_id = getattr(instance, '_loaded_owner', (None, None))
+    list_cache.invalidate(user_ids=[instance.user_id, user_id], group_ids=[instance.group_id, group_id])
+
+
+@receiver(post_save, sender=Group, dispatch_uid='notes_list_cache_group_saved')
+def invalidate_group_lists(sender, instance, created, **kwargs):
+    # Название группы выводится в карточках её заметок
+    if not created:
+        list_cache.invalidate(group_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Categories, dispatch_uid='notes_list_cache_category_saved')
+@receiver(post_delete, sender=Categories, dispatch_uid='notes_list_cache_category_deleted')
+def invalidate_category_lists(sender, **kwargs):
+    # Категория может быть в карточках любого пользователя
+    list_cache.invalidate_all()
+
+
+# Число и время SQL-запросов для /metrics: обёртка на каждом новом соединении
+connection_created.connect(install_db_wrapper, dispatch_uid='notes_metrics_db_wrapper')
@@ -0,0 +1,87 @@
+import json
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+ICONS_DIR = 'icons/bootstrap-icons/font'
+ICONS_CSS = f'{ICONS_DIR}/bootstrap-icons.css'
+ICONS_MAP = f'{ICONS_DIR}/bootstrap-icons.json'
+ICON_FONTS = {
+    f'{ICONS_DIR}/fonts/bootstrap-icons.woff2': 'woff2',
+    f'{ICONS_DIR}/fonts/bootstrap-icons.woff': 'woff',
+}
+
+# Файлы, в которых ищутся классы иконок: шаблоны, скрипты и код форм/виджетов
+SCANNED_SUFFIXES = {'.html', '.js', '.py'}
+SKIPPED_DIRS = {'test', 'migrations', 'static', '__pycache__'}
+
+_ICON_CLASS_RE = re.compile(r'\bbi-([a-z0-9]+(?:-[a-z0-9]+)*)')
+_ICON_RULE_RE = re.compile(r'\.bi-([a-z0-9-]+)::before \{ content: "\\[0-9a-f]+"; \}\n')
+# В исходном CSS у шрифтов ?<хеш> для сброса кеша - после сборки хеш будет в имени файла
+_FONT_QUERY_RE = re.compile(r'(bootstrap-icons\.woff2?)\?[0-9a-f]+')
+
+
+def source_path(name):
+    """Исходный файл статики (без учёта STATIC_BUILD_DIR)"""
+    for root in settings.STATICFILES_DIRS:
+        if isinstance(root, (list, tuple)):
+            continue
+        path = Path(root) / name
+        if path.is_file():
+            return path
+    raise FileNotFoundError(f"{name} не найден в STATICFILES_DIRS")
+
+
+def scanned_dirs():
+    """Каталоги шаблонов из настроек и каталоги приложений проекта (не сторонних пакетов)"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    dirs = [Path(d) for engine in settings.TEMPLATES for d in engine.get('DIRS', [])]
+    dirs += [Path(config.path) for config in apps.get_app_configs()
+             if Path(config.path).resolve().is_relative_to(base_dir)]
+    return dirs
+
+
+def used_icons(dirs=None):
+    """Имена иконок (bi-<имя>), которые встречаются в шаблонах и коде и есть в наборе"""
+    known = json.loads(source_path(ICONS_MAP).read_text(encoding='utf-8'))
+    names = set()
+    for directory in dirs if dirs is not None else scanned_dirs():
+        for path in Path(directory).rglob('*'):
+            if path.suffix not in SCANNED_SUFFIXES or SKIPPED_DIRS & set(path.relative_to(directory).parts[:-1]):
+                continue
+            names.update(_ICON_CLASS_RE.findall(path.read_text(encoding='utf-8', errors='ignore')))
+    return {name: known[name] for name in sorted(names) if name in known}
+
+
+def subset_icons(icons, build_dir):
+    """
+    Пишет в build_dir шрифты только с нужными глифами и CSS только с их классами.
+
+    Возвращает {имя файла: (исходный размер, новый размер)}.
+    """
+    # fonttools (и brotli для woff2) нужны только при сборке
+    from fontTools import subset
+
+    build_dir = Path(build_dir)
+    sizes = {}
+    for name, flavor in ICON_FONTS.items():
+        source, target = source_path(name), build_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        options = subset.Options()
+        options.flavor = flavor
+        options.notdef_outline = True
+        font = subset.load_font(str(source), options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=list(icons.values()))
+        subsetter.subset(font)
+        subset.save_font(font, str(target), options)
+        sizes[name] = (source.stat().st_size, target.stat().st_size)
+
+    source = source_path(ICONS_CSS)
+    css = _ICON_RULE_RE.sub(lambda m: m.group(0) if m.group(1) in icons else '', source.read_text(encoding='utf-8'))
+    target = build_dir / ICONS_CSS
+    target.write_text(_FONT_QUERY_RE.sub(r'\1', css), encoding='utf-8')
+    sizes[ICONS_CSS] = (source.stat().st_size, target.stat().st_size)
+    return sizes
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.staticfiles.finders import BaseFinder, FileSystemFinder
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Статика с хешем в имени и заранее сжатыми .gz/.br копиями (manage.py build_static).
+
+    WhiteNoise отдаёт файлы с хешем с Cache-Control: max-age=315360000, immutable.
+    При STATIC_MANIFEST_STRICT = False (по умолчанию при DEBUG и в тестах, где
+    статика не собрана) {% static %} возвращает исходное имя файла, а не падает
+    из-за отсутствия манифеста. В production отсутствующая запись - ошибка.
+    """
+    # .map-файлов bootstrap в репозитории нет: ссылки на source map не переписываются
+    patterns = tuple(
+        (extension, tuple(pattern for pattern in extension_patterns if 'sourceMappingURL' not in str(pattern)))
+        for extension, extension_patterns in CompressedManifestStaticFilesStorage.patterns
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest_strict = getattr(settings, 'STATIC_MANIFEST_STRICT', True)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.manifest_strict:
+                raise
+            return name
+
+
+class BuildFinder(FileSystemFinder):
+    """
+    Файлы из STATIC_BUILD_DIR, сгенерированные build_static (урезанный шрифт иконок).
+
+    Стоит в STATICFILES_FINDERS первым, поэтому перекрывает одноимённые исходные
+    файлы. Каталог может отсутствовать - тогда finder ничего не находит.
+    """
+
+    def __init__(self, app_names=None, *args, **kwargs):
+        root = str(settings.STATIC_BUILD_DIR)
+        self.locations = [('', root)]
+        storage = FileSystemStorage(location=root)
+        storage.prefix = ''
+        self.storages = {root: storage}
+        BaseFinder.__init__(self, *args, **kwargs)
+
+    def check(self, **kwargs):
+        return []
@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from notes.models import Categories, Notes, Group
+from notes.preferences import VIEW_TYPE_COOKIE
+from notes.test.utils import SyncHopsMixin
+
+
+class AsyncViewsTest(TestCase):
+    """Тесты асинхронных представлений на асинхронном ORM"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        self.note = Notes.objects.create(title="Моя", text="Текст", user=self.user)
+        self.foreign = Notes.objects.create(title="Чужая", text="Текст", user=self.other)
+        self.group_note = Notes.objects.create(title="Групповая", text="Текст", user=self.other, group=self.group)
+        self.client.force_login(self.user)
+
+    def test_anonymous_redirected_to_login(self):
+        """Тест перенаправления неавторизованного пользователя"""
+        self.client.logout()
+        response = self.client.get(reverse('notes:index'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('?next=', response.url)
+
+    def test_detail_access(self):
+        """Тест доступа к заметке: автор и член группы - да, посторонний - нет"""
+        response = self.client.get(reverse('notes:note_detail', kwargs={'pk': self.group_note.pk}))
+        self.assertContains(response, "Групповая")
+        response = self.client.get(reverse('notes:note_detail', kwargs={'pk': self.foreign.pk}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_update(self):
+        """Тест редактирования: успешное сохранение, ошибки формы и чужая заметка"""
+        url = reverse('notes:note_update', kwargs={'pk': self.note.pk})
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        response = self.client.post(url, {'title': 'Новая', 'text': 'Новый текст'})
+        self.assertRedirects(response, reverse('notes:index'), fetch_redirect_response=False)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'Новая')
+
+        response = self.client.post(url, {'title': '', 'text': 'Текст'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+
+        response = self.client.post(reverse('notes:note_update', kwargs={'pk': self.foreign.pk}), {'title': 'x'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_add_and_delete(self):
+        """Тест создания и удаления заметки"""
+        response = self.client.post(reverse('notes:add_note'), {'title': 'Добавленная', 'text': 'Текст'})
+        self.assertEqual(response.status_code, 302)
+        note = Notes.objects.get(title='Добавленная')
+        self.assertEqual(note.user, self.user)
+
+        response = self.client.post(reverse('notes:note_delete', kwargs={'pk': note.pk}))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Notes.objects.filter(pk=note.pk).exists())
+
+    def test_toggle_view(self):
+        """Тест переключения личных и групповых заметок: выбор хранится в cookie, без записи сессии"""
+        response = self.client.get(reverse('notes:toggle_view'))
+        self.assertEqual(response.cookies[VIEW_TYPE_COOKIE].value, 'group')
+        self.assertNotIn('view_type', self.client.session)
+        response = self.client.get(reverse('notes:index'))
+        self.assertContains(response, "Групповая")
+        self.assertNotContains(response, "Моя")
+
+
+class AsyncSyncHopsTest(SyncHopsMixin, TestCase):
+    """Тесты числа переходов асинхронных страниц в синхронный поток"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.note = Notes.objects.create(title="Моя", text="Текст", user=self.user)
+        self.async_client.force_login(self.user)
+
+    def test_list(self):
+        """Тест списка: кеш страницы читается и заполняется без перехода на каждое обращение"""
+        url = reverse('notes:index')
+        # Ключ, страница из кеша и версия членства; счётчики; страница заметок; рендеринг
+        self.assertSyncHops(4, url)
+        # Ключ, страница из кеша и версия членства; рендеринг
+        response = self.assertSyncHops(2, url)
+        self.assertContains(response, "Моя")
+        self.assertSyncHops(1, url, headers={'if-none-match': response['ETag']})
+
+    def test_list_with_category(self):
+        """Тест: проверка категории в форме не добавляет перехода"""
+        category = Categories.objects.create(title="Работа")
+        Notes.objects.filter(pk=self.note.pk).update(category=category)
+        response = self.assertSyncHops(4, f"{reverse('notes:index')}?category={category.pk}")
+        self.assertContains(response, "Моя")
+        self.assertEqual(response.context['form'].cleaned_data['category'], category)
+
+    def test_detail(self):
+        """Тест страницы заметки: валидаторы (заметка, группы, версия членства) - одним переходом"""
+        url = reverse('notes:note_detail', kwargs={'pk': self.note.pk})
+        # Валидаторы, загрузка заметки, рендеринг - и без кеша членства, и с ним
+        self.assertSyncHops(3, url)
+        response = self.assertSyncHops(3, url)
+        self.assertContains(response, "Моя")
+        self.assertSyncHops(1, url, headers={'if-none-match': response['ETag']})
@@ -0,0 +1,118 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes import list_cache
+from notes.models import Notes, Categories, Group, ReminderOutbox
+
+
+class BulkNotesTest(TestCase):
+    """Тесты массовых действий над заметками"""
+
+    url = '/notes/api/bulk/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        self.category = Categories.objects.create(title="Работа")
+        self.notes = [Notes.objects.create(title=f"Заметка {i}", text="Текст", user=self.user) for i in range(3)]
+        self.foreign = Notes.objects.create(title="Чужая", text="Текст", user=self.other)
+        self.client.force_login(self.user)
+
+    def post(self, payload, url=None):
+        return self.client.post(url or self.url, json.dumps(payload), content_type='application/json')
+
+    def test_delete(self):
+        """Тест удаления: свои удаляются, чужие и несуществующие - в результатах"""
+        ids = [note.pk for note in self.notes] + [self.foreign.pk, 999999]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post({'action': 'delete', 'ids': ids})
+        # Проверка владельцев, выборка для сигналов и удаление - по одному запросу на все заметки
+        notes_queries = [q['sql'] for q in ctx.captured_queries if 'notes_notes' in q['sql']]
+        self.assertEqual(len(notes_queries), 3)
+        self.assertNotIn('"text"', notes_queries[1])
+        self.assertTrue(notes_queries[2].startswith('DELETE'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['affected'], 3)
+        self.assertEqual(data['results'][str(self.notes[0].pk)], 'ok')
+        self.assertEqual(data['results'][str(self.foreign.pk)], 'forbidden')
+        self.assertEqual(data['results']['999999'], 'not_found')
+        self.assertEqual(list(Notes.objects.all()), [self.foreign])
+
+    def test_delete_sends_signals_and_cancels_reminders(self):
+        """Тест: удаление отправляет post_delete и снимает ещё не отправленные напоминания"""
+        pending = ReminderOutbox.objects.create(note_id=self.notes[0].pk, chat_id='1', text="Текст")
+        sent = ReminderOutbox.objects.create(note_id=self.notes[0].pk, chat_id='1', text="Текст",
+                                             status=ReminderOutbox.SENT)
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.pk)
+
+        post_delete.connect(receiver, sender=Notes)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Notes)
+        self.post({'action': 'delete', 'ids': [self.notes[0].pk, self.notes[1].pk]})
+
+        self.assertEqual(sorted(deleted), [self.notes[0].pk, self.notes[1].pk])
+        pending.refresh_from_db()
+        sent.refresh_from_db()
+        self.assertEqual(pending.status, ReminderOutbox.DEAD)
+        self.assertEqual(sent.status, ReminderOutbox.SENT)
+
+    def test_move_to_group(self):
+        """Тест переноса в группу и обратно в личные"""
+        ids = [self.notes[0].pk, self.notes[1].pk]
+        response = self.post({'action': 'move', 'ids': ids, 'group': self.group.pk})
+        self.assertEqual(response.json()['affected'], 2)
+        moved = Notes.objects.get(pk=self.notes[0].pk)
+        self.assertEqual(moved.group, self.group)
+        self.assertGreater(moved.updated_at, self.notes[0].updated_at)
+
+        self.post({'action': 'move', 'ids': ids, 'group': None})
+        self.assertFalse(Notes.objects.filter(group__isnull=False).exists())
+
+    def test_move_to_foreign_group(self):
+        """Тест запрета переноса в группу, где пользователь не состоит"""
+        strangers = Group.objects.create(name="Чужая группа")
+        response = self.post({'action': 'move', 'ids': [self.notes[0].pk], 'group': strangers.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Notes.objects.filter(group=strangers).exists())
+
+    def test_recategorize(self):
+        """Тест смены категории; чужая заметка не меняется"""
+        response = self.post({'action': 'recategorize', 'ids': [self.notes[2].pk, self.foreign.pk],
+                              'category': self.category.pk})
+        self.assertEqual(response.json()['affected'], 1)
+        self.assertEqual(Notes.objects.get(pk=self.notes[2].pk).category, self.category)
+        self.assertIsNone(Notes.objects.get(pk=self.foreign.pk).category)
+
+    def test_bad_payload(self):
+        """Тест ошибок запроса"""
+        for payload in ({'action': 'archive', 'ids': [1]}, {'action': 'delete', 'ids': []},
+                        {'action': 'delete', 'ids': ['1']}, {'action': 'move', 'ids': [1]},
+                        {'action': 'recategorize', 'ids': [1], 'category': 999999}, [1, 2]):
+            self.assertEqual(self.post(payload).status_code, 400, payload)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_invalidates_list_cache(self):
+        """Тест сброса кешированного списка после массового изменения"""
+        key = list_cache.page_key(self.user, 'personal', {})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({'action': 'delete', 'ids': [self.notes[0].pk]})
+        self.assertNotEqual(list_cache.page_key(self.user, 'personal', {}), key)
+
+    async def test_async(self):
+        """Тест асинхронного варианта"""
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.post('/notes/api/abulk/', json.dumps({'action': 'delete', 'ids': [self.notes[0].pk]}),
+                                     content_type='application/json')
+        self.assertEqual(response.json()['affected'], 1)
+        self.assertFalse(await Notes.objects.filter(pk=self.notes[0].pk).aexists())
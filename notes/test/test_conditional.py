@@ -0,0 +1,132 @@
+import datetime
+
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.messages.storage import default_storage
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from notes import conditional
+from notes.models import Categories, Notes, Group
+from notes.reminders import ReminderDispatcher
+from notes.test.test_reminders import FakeBot
+
+
+class ConditionalGetTest(TestCase):
+    """Тесты ETag/Last-Modified и ответов 304"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        self.note = Notes.objects.create(title="Личная", text="Текст", user=self.user)
+        self.group_note = Notes.objects.create(title="Групповая", text="Текст", group=self.group)
+        self.client.force_login(self.user)
+        # Первый ответ выставляет CSRF-cookie, она входит в ETag
+        self.client.get('/notes/')
+
+    def revalidate(self, url, response):
+        return self.client.get(url, headers={'if-none-match': response['ETag']})
+
+    def test_detail_not_modified(self):
+        """Тест 304 для неизменённой заметки на sync и async маршрутах"""
+        for url in (f'/notes/note/{self.note.pk}/', reverse('notes:note_detail', kwargs={'pk': self.note.pk})):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response)
+            # пользователь и валидаторы заметки (сессия - из кеша); без загрузки заметки и рендеринга
+            with self.assertNumQueries(2):
+                second = self.revalidate(url, response)
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(second['ETag'], response['ETag'])
+            self.assertEqual(second.content, b'')
+
+    def test_detail_changed_after_update(self):
+        """Тест: после изменения заметки ETag другой и страница отдаётся целиком"""
+        url = f'/notes/note/{self.note.pk}/'
+        response = self.client.get(url)
+        self.note.text = "Новый текст"
+        self.note.save()
+        second = self.revalidate(url, response)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], response['ETag'])
+
+    def test_detail_changed_after_category_rename(self):
+        """Тест: переименование категории меняет ETag страницы заметки"""
+        category = Categories.objects.create(title="Работа")
+        Notes.objects.filter(pk=self.note.pk).update(category=category)
+        url = f'/notes/note/{self.note.pk}/'
+        response = self.client.get(url)
+        category.title = "Дом"
+        category.save()
+        second = self.revalidate(url, response)
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "Дом")
+
+    def test_detail_changed_after_membership_change(self):
+        """Тест: при изменении членства старый ETag недействителен"""
+        url = f'/notes/note/{self.group_note.pk}/'
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.members.remove(self.user)
+        self.assertEqual(self.revalidate(url, response).status_code, 403)
+
+    def test_changed_after_reminder_dispatch(self):
+        """Тест: после постановки напоминания в очередь карточка и страница заметки не устаревают"""
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Notes.objects.create(title="Позвонить", text="Текст", user=self.user,
+                                        reminder=timezone.now() - datetime.timedelta(minutes=1))
+        url = f'/notes/note/{note.pk}/'
+        self.assertContains(self.client.get('/notes/'), "Напоминание:")
+        response = self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(ReminderDispatcher(FakeBot(), 'channel').enqueue_due(), 1)
+
+        self.assertNotContains(self.client.get('/notes/'), "Напоминание:")
+        second = self.revalidate(url, response)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], response['ETag'])
+
+    def test_etag_depends_on_user(self):
+        """Тест: другой пользователь не получает 304 по чужому ETag"""
+        url = f'/notes/note/{self.group_note.pk}/'
+        response = self.client.get(url)
+        other = User.objects.create_user(username='other', password='12345')
+        self.group.members.add(other)
+        self.client.force_login(other)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_list_not_modified(self):
+        """Тест 304 для списка и смены ETag при добавлении заметки"""
+        for url in ('/notes/', reverse('notes:index')):
+            response = self.client.get(url)
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        response = self.client.get('/notes/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Notes.objects.create(title="Ещё одна", text="Текст", user=self.user)
+        second = self.revalidate('/notes/', response)
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "Ещё одна")
+
+    def test_list_etag_depends_on_filters(self):
+        """Тест: ETag зависит от фильтров"""
+        response = self.client.get('/notes/')
+        filtered = self.client.get('/notes/?search_query=Личная', headers={'if-none-match': response['ETag']})
+        self.assertEqual(filtered.status_code, 200)
+        self.assertNotEqual(filtered['ETag'], response['ETag'])
+
+    def test_pending_messages_disable_304(self):
+        """Тест: при непоказанных сообщениях страница отдаётся целиком"""
+        request = RequestFactory().get('/', headers={'if-none-match': '"etag"'})
+        request.session = self.client.session
+        request._messages = default_storage(request)
+        validators = conditional.Validators('"etag"', None)
+        self.assertEqual(conditional.not_modified(request, validators).status_code, 304)
+
+        messages.success(request, "Заметка сохранена")
+        self.assertIsNone(conditional.not_modified(request, validators))
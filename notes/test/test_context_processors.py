@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes import context_processors
+from notes.context_processors import can_group_add_notes, group_permissions
+
+
+def permission_queries(context):
+    # Запросы context processor: поиск группы Editor и проверка её права add_notes
+    return [q['sql'] for q in context.captured_queries if "'Editor'" in q['sql'] or "'add_notes'" in q['sql']]
+
+
+class GroupPermissionsContextProcessorTest(TestCase):
+    """Тесты ленивого и закешированного can_group_add_notes"""
+
+    def setUp(self):
+        # Сброс сразу, без ожидания фиксации: TestCase не фиксирует транзакцию
+        context_processors._next_generation()
+        self.editor = Group.objects.create(name='Editor')
+        self.user = User.objects.create_user(username='writer', password='12345')
+        self.client.force_login(self.user)
+
+    def test_lazy_until_used(self):
+        """Тест: без обращения к значению запросов нет"""
+        with self.assertNumQueries(0):
+            group_permissions(None)
+
+    def test_warm_page_render_issues_no_queries(self):
+        """Тест: при тёплом кеше страница не запрашивает права группы"""
+        self.client.get('/notes/')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/notes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(permission_queries(context), [])
+
+    def test_invalidated_by_permission_change(self):
+        """Тест сброса кеша при изменении прав группы"""
+        can_group_add_notes()
+        with self.assertNumQueries(0):
+            can_group_add_notes()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editor.permissions.add(Permission.objects.get(codename='add_notes'))
+        with self.assertNumQueries(2):
+            can_group_add_notes()
+
+    def test_invalidation_during_query(self):
+        """Тест: значение, прочитанное до сброса, не переживает сброс до конца TTL"""
+        query = context_processors._query_can_group_add_notes
+
+        def racing_query():
+            value = query()
+            # Права изменились и транзакция зафиксирована, пока шёл запрос
+            with self.captureOnCommitCallbacks(execute=True):
+                self.editor.permissions.add(Permission.objects.get(codename='add_notes'))
+            return value
+
+        with mock.patch.object(context_processors, '_query_can_group_add_notes', side_effect=racing_query):
+            self.assertFalse(can_group_add_notes())
+        with self.assertNumQueries(2):
+            can_group_add_notes()
+
+    def test_expires_after_ttl(self):
+        """Тест повторного запроса после истечения TTL"""
+        can_group_add_notes()
+        later = context_processors.time.monotonic() + context_processors.GROUP_PERMISSIONS_TTL + 1
+        with mock.patch.object(context_processors.time, 'monotonic', return_value=later):
+            with self.assertNumQueries(2):
+                can_group_add_notes()
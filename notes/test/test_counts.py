@@ -0,0 +1,79 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.counts import EstimatedCountPaginator, estimated_count
+from notes.models import Notes, Categories, Group
+
+
+class FacetsTest(TestCase):
+    """Тесты счётчиков списка: число найденных и счётчики категорий одним запросом"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        self.work = Categories.objects.create(title="Работа")
+        self.home = Categories.objects.create(title="Дом")
+        reminder = timezone.now() + datetime.timedelta(days=1)
+        for i in range(3):
+            Notes.objects.create(title=f"Работа {i}", text="Текст", user=self.user, category=self.work,
+                                 reminder=reminder if i == 0 else None)
+        Notes.objects.create(title="Дом", text="Текст", user=self.user, category=self.home)
+        Notes.objects.create(title="Без категории", text="Текст", user=self.user)
+        Notes.objects.create(title="Групповая", text="Текст", group=self.group, category=self.home)
+        self.client.force_login(self.user)
+
+    def test_single_query(self):
+        """Тест: счётчики - один запрос без текста заметок"""
+        with CaptureQueriesContext(connection) as context:
+            facets = Notes.objects.personal(self.user).facets()
+        self.assertEqual(len(context), 1)
+        self.assertNotIn('"text"', context.captured_queries[0]['sql'])
+        self.assertEqual(facets.count, 5)
+        self.assertEqual(facets.with_reminder, 1)
+        self.assertEqual(facets.state[0], Notes.objects.personal(self.user).latest('updated_at').updated_at)
+
+    def test_selected_category(self):
+        """Тест: число найденных - по выбранной категории, счётчики категорий - без её фильтра"""
+        facets = Notes.objects.personal(self.user).facets(self.work.pk)
+        self.assertEqual(facets.count, 3)
+        self.assertEqual(facets.total, 5)
+        items = facets.categories(QueryDict('category=1&cursor=abc&search_query=x'))
+        self.assertEqual([(item['title'], item['count']) for item in items],
+                         [("Работа", 3), ("Дом", 1), ("Без категории", 1)])
+        self.assertTrue(items[0]['selected'])
+        self.assertEqual(QueryDict(items[1]['query']).dict(), {'category': str(self.home.pk), 'search_query': 'x'})
+        self.assertIsNone(items[2]['query'])
+
+    async def test_async(self):
+        """Тест асинхронного варианта"""
+        facets = await Notes.objects.for_groups(self.user).afacets()
+        self.assertEqual(facets.count, 1)
+        self.assertEqual(facets.groups(), [{'name': "Команда", 'count': 1}])
+
+    def test_list_sidebar(self):
+        """Тест боковой панели и заголовка в синхронном и асинхронном списке"""
+        for url in ('/notes/', reverse('notes:index')):
+            response = self.client.get(url, {'category': self.work.pk})
+            self.assertContains(response, "Найдено заметок: 3, с напоминанием: 1")
+            self.assertContains(response, "note-facets")
+            self.assertContains(response, f'?category={self.home.pk}')
+            self.assertContains(response, 'class="card note-card', count=3)
+
+
+class EstimatedCountTest(TestCase):
+    """Тесты оценки числа строк для админки"""
+
+    def test_fallback_to_exact_count(self):
+        """Тест: без статистики PostgreSQL - точный COUNT"""
+        user = User.objects.create_user(username='owner', password='12345')
+        Notes.objects.create(title="Заметка", text="Текст", user=user)
+        self.assertIsNone(estimated_count(Notes))
+        self.assertEqual(EstimatedCountPaginator(Notes.objects.all(), 10).count, 1)
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TestCase
+
+from notes.dbpool import pool_stats
+
+
+class FakePool:
+    def get_stats(self):
+        return {'pool_min': 2, 'pool_max': 4, 'pool_size': 3, 'pool_available': 1,
+                'requests_num': 4, 'requests_wait_ms': 10, 'connections_num': 3, 'connections_ms': 30}
+
+
+class DbPoolStatsTest(TestCase):
+    """Тесты счётчиков пула соединений"""
+
+    def test_without_pool(self):
+        """Тест: без пула (SQLite, постоянные соединения) счётчиков нет"""
+        self.assertIsNone(pool_stats())
+
+    def test_stats(self):
+        """Тест расчёта выданных соединений и среднего ожидания"""
+        with mock.patch.object(connections['default'], 'pool', FakePool(), create=True):
+            stats = pool_stats()
+        self.assertEqual(stats['checked_out'], 2)
+        self.assertEqual(stats['wait_ms_avg'], 2.5)
+        self.assertEqual(stats['connect_ms_avg'], 10)
+        self.assertEqual(stats['timeouts'], 0)
+
+    def test_view_staff_only(self):
+        """Тест доступа к счётчикам только для персонала"""
+        user = User.objects.create_user(username='user', password='12345')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/notes/api/db-pool/').status_code, 302)
+        user.is_staff = True
+        user.save()
+        response = self.client.get('/notes/api/db-pool/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('default', response.json())
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.template.defaultfilters import truncatewords
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes.models import Notes, note_excerpt
+
+LONG_TEXT = ' '.join(f"слово{i}" for i in range(200))
+
+
+class ExcerptTest(TestCase):
+    """Тесты начала текста для карточек списка"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='12345')
+
+    def test_same_as_truncatewords(self):
+        """Тест: результат как у фильтра truncatewords:30"""
+        self.assertEqual(note_excerpt(LONG_TEXT), truncatewords(LONG_TEXT, 30))
+        self.assertLessEqual(len(note_excerpt('x' * 10000)), 500)
+
+    def test_save(self):
+        """Тест обновления при сохранении, в том числе с update_fields"""
+        note = Notes.objects.create(title="Заметка", text=LONG_TEXT, user=self.user)
+        self.assertEqual(note.excerpt, note_excerpt(LONG_TEXT))
+        note.text = "Новый текст"
+        note.save(update_fields=['text'])
+        note.refresh_from_db()
+        self.assertEqual(note.excerpt, "Новый текст")
+
+    def test_save_with_deferred_text(self):
+        """Тест: заметка из списка (text не загружен) сохраняется без чтения text"""
+        note = Notes.objects.create(title="Заметка", text=LONG_TEXT, user=self.user)
+        listed = Notes.objects.for_list().get(pk=note.pk)
+        listed.title = "Новый заголовок"
+        with CaptureQueriesContext(connection) as context:
+            listed.save()
+        self.assertFalse(any('"text"' in query['sql'] for query in context.captured_queries))
+        note.refresh_from_db()
+        self.assertEqual(note.excerpt, note_excerpt(LONG_TEXT))
+
+    def test_bulk_writes(self):
+        """Тест bulk_create и bulk_update"""
+        Notes.objects.bulk_create([Notes(title="Заметка", text=LONG_TEXT, user=self.user)])
+        note = Notes.objects.get()
+        self.assertEqual(note.excerpt, note_excerpt(LONG_TEXT))
+        note.text = "Другой текст"
+        Notes.objects.bulk_update([note], ['text'])
+        self.assertEqual(Notes.objects.get().excerpt, "Другой текст")
+
+    def test_list_does_not_load_text(self):
+        """Тест: список заметок не читает колонку text"""
+        Notes.objects.create(title="Заметка", text=LONG_TEXT, user=self.user)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/notes/')
+        self.assertContains(response, note_excerpt(LONG_TEXT))
+        self.assertFalse(any('"notes_notes"."text"' in query['sql'] for query in context.captured_queries))
@@ -0,0 +1,100 @@
+import datetime
+import json
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+
+from notes.models import Notes, Categories, Group
+
+
+class ExportTest(TestCase):
+    """Тесты потоковой выгрузки заметок"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        category = Categories.objects.create(title="Работа")
+        self.personal = Notes.objects.create(title="Личная", text="Текст", user=self.user, category=category)
+        self.group_note = Notes.objects.create(title="Групповая", text="Текст", user=self.other, group=self.group)
+        Notes.objects.create(title="Чужая", text="Текст", user=self.other)
+        self.client.force_login(self.user)
+
+    def read_ndjson(self, response):
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_ndjson(self):
+        """Тест выгрузки NDJSON: только доступные заметки, по возрастанию updated_at"""
+        response = self.client.get('/notes/api/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = self.read_ndjson(response)
+        self.assertEqual([row['id'] for row in rows], [self.personal.pk, self.group_note.pk])
+        self.assertEqual(rows[0]['category_title'], "Работа")
+        self.assertEqual(rows[1]['group_name'], "Команда")
+
+    def test_json(self):
+        """Тест выгрузки JSON-массивом"""
+        response = self.client.get('/notes/api/export/', {'format': 'json'})
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual({row['title'] for row in data}, {"Личная", "Групповая"})
+
+    def test_json_empty(self):
+        """Тест пустого JSON-массива"""
+        self.client.force_login(User.objects.create_user(username='empty', password='12345'))
+        response = self.client.get('/notes/api/export/', {'format': 'json'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+    def test_since(self):
+        """Тест инкрементальной выгрузки по updated_at"""
+        since = timezone.now()
+        Notes.objects.filter(pk=self.personal.pk).update(updated_at=since + datetime.timedelta(seconds=1))
+        rows = self.read_ndjson(self.client.get('/notes/api/export/', {'since': since.isoformat()}))
+        self.assertEqual([row['id'] for row in rows], [self.personal.pk])
+
+    def test_resume_from_cursor(self):
+        """Тест продолжения по курсору (updated_at, id): строки с тем же updated_at не теряются"""
+        same = timezone.now()
+        Notes.objects.filter(pk__in=[self.personal.pk, self.group_note.pk]).update(updated_at=same)
+        first, second = sorted([self.personal.pk, self.group_note.pk])
+        rows = self.read_ndjson(self.client.get('/notes/api/export/', {'since': same.isoformat(), 'since_id': first}))
+        self.assertEqual([row['id'] for row in rows], [second])
+        # Без since_id граничные строки приходят повторно, но не теряются
+        rows = self.read_ndjson(self.client.get('/notes/api/export/', {'since': same.isoformat()}))
+        self.assertEqual([row['id'] for row in rows], [first, second])
+
+    def test_resume_with_microseconds(self):
+        """Тест: updated_at выгружается с микросекундами, продолжение с последней строки ничего не повторяет"""
+        base = timezone.now().replace(microsecond=123456)
+        Notes.objects.filter(pk=self.personal.pk).update(updated_at=base)
+        # В той же миллисекунде: при обрезке до миллисекунд строки были бы неразличимы
+        Notes.objects.filter(pk=self.group_note.pk).update(updated_at=base + datetime.timedelta(microseconds=333))
+        rows = self.read_ndjson(self.client.get('/notes/api/export/'))
+        self.assertEqual(datetime.datetime.fromisoformat(rows[0]['updated_at']), base)
+
+        rows = self.read_ndjson(self.client.get('/notes/api/export/', {'since': rows[0]['updated_at'],
+                                                                        'since_id': rows[0]['id']}))
+        self.assertEqual([row['id'] for row in rows], [self.group_note.pk])
+
+    def test_bad_params(self):
+        """Тест ошибок параметров"""
+        self.assertEqual(self.client.get('/notes/api/export/', {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/notes/api/export/', {'since': 'вчера'}).status_code, 400)
+        self.assertEqual(self.client.get('/notes/api/export/', {'since_id': '5'}).status_code, 400)
+        self.assertEqual(self.client.get('/notes/api/export/', {'since': '2026-01-01', 'since_id': 'x'}).status_code, 400)
+
+    def test_requires_login(self):
+        """Тест доступа только для авторизованных"""
+        self.client.logout()
+        self.assertEqual(self.client.get('/notes/api/export/').status_code, 302)
+
+    async def test_async_export(self):
+        """Тест асинхронного варианта"""
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get('/notes/api/aexport/')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(body.splitlines()), 2)
@@ -0,0 +1,140 @@
+import datetime
+import io
+import json
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from notes.importer import NotesImporter, iter_json_records
+from notes.models import Notes, Categories, Group
+from notes.search import search_notes
+
+
+def dump_record(pk, title, **fields):
+    fields.setdefault('text', "Текст")
+    fields.setdefault('created_at', '2025-04-01T10:00:00Z')
+    fields.setdefault('updated_at', '2025-04-02T10:00:00Z')
+    return {'model': 'notes.notes', 'pk': pk, 'fields': {'title': title, **fields}}
+
+
+class JsonStreamTest(TestCase):
+    """Тесты потокового разбора JSON и NDJSON"""
+
+    records = [{'id': 1, 'title': "Первая"}, {'id': 2, 'title': "Вторая, с [скобками]"}]
+
+    def test_array_and_ndjson(self):
+        """Тест одинакового результата для массива и NDJSON при любой длине куска"""
+        array = json.dumps(self.records, ensure_ascii=False, indent=2)
+        ndjson = '\n'.join(json.dumps(record, ensure_ascii=False) for record in self.records) + '\n'
+        for text in (array, ndjson):
+            for read_size in (1, 7, 4096):
+                self.assertEqual(list(iter_json_records(io.StringIO(text), read_size)), self.records)
+
+    def test_empty(self):
+        """Тест пустого массива и пустого файла"""
+        self.assertEqual(list(iter_json_records(io.StringIO('[]'))), [])
+        self.assertEqual(list(iter_json_records(io.StringIO(''))), [])
+
+    def test_broken(self):
+        """Тест обрезанного файла"""
+        with self.assertRaises(ValueError):
+            list(iter_json_records(io.StringIO('[{"id": 1}, {"id": '), 4))
+
+
+class ImportNotesTest(TestCase):
+    """Тесты пакетной загрузки заметок"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.category = Categories.objects.create(title="Работа")
+        self.group = Group.objects.create(name="Команда")
+
+    def run_import(self, records, **options):
+        return NotesImporter(method='bulk', batch_size=2, **options).run(iter(records))
+
+    def test_dumpdata_records(self):
+        """Тест загрузки записей dumpdata с сохранением id и дат"""
+        stats = self.run_import([
+            {'model': 'auth.user', 'pk': 99, 'fields': {'username': 'skip'}},
+            dump_record(100, "Отчёт", user=self.user.pk, category=self.category.pk, group=self.group.pk),
+            dump_record(101, "Покупки", user=self.user.pk, reminder='2025-05-01T09:00:00Z'),
+            dump_record(102, "Идеи", user=self.user.pk),
+        ])
+        self.assertEqual((stats['imported'], stats['skipped']), (3, 1))
+        note = Notes.objects.get(pk=100)
+        self.assertEqual((note.category, note.group, note.user), (self.category, self.group, self.user))
+        self.assertEqual(note.created_at, datetime.datetime(2025, 4, 1, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(note.updated_at, datetime.datetime(2025, 4, 2, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(Notes.objects.get(pk=101).reminder.day, 1)
+        # auto_now восстановлен после загрузки
+        self.assertTrue(Notes._meta.get_field('updated_at').auto_now)
+
+    def test_sequence_and_search(self):
+        """Тест счётчика id и полнотекстового индекса после загрузки"""
+        self.run_import([dump_record(500, "Квартальный отчёт", user=self.user.pk)])
+        created = Notes.objects.create(title="Новая", text="Текст", user=self.user)
+        self.assertGreater(created.pk, 500)
+        self.assertEqual(list(search_notes(Notes.objects.all(), "квартальный")), [Notes.objects.get(pk=500)])
+
+    def test_missing_foreign_keys(self):
+        """Тест: ссылка на отсутствующего пользователя или группу - ошибка, с null_missing_fk - обнуление"""
+        for fields in ({'user': 12345}, {'user': self.user.pk, 'group': 999}):
+            with self.assertRaisesMessage(ValueError, "--null-missing-fk"):
+                self.run_import([dump_record(1, "Сирота", **fields)])
+        self.assertFalse(Notes.objects.exists())
+
+        stats = self.run_import([dump_record(1, "Сирота", user=12345, category=999, group=999)], null_missing_fk=True)
+        note = Notes.objects.get(pk=1)
+        self.assertEqual((note.user, note.category, note.group), (None, None, None))
+        self.assertEqual(stats['fk_nulled'], 3)
+
+    def test_missing_category_is_counted(self):
+        """Тест: отсутствующая категория обнуляется без ошибки и учитывается в fk_nulled"""
+        stats = self.run_import([
+            dump_record(1, "Без категории", user=self.user.pk, category=999),
+            dump_record(2, "С категорией", user=self.user.pk, category=self.category.pk),
+            dump_record(3, "Без ссылки", user=self.user.pk),
+        ])
+        self.assertIsNone(Notes.objects.get(pk=1).category)
+        self.assertEqual(stats['fk_nulled'], 1)
+
+    def test_upsert(self):
+        """Тест обновления существующих заметок по id"""
+        note = Notes.objects.create(title="Старая", text="Текст", user=self.user)
+        self.run_import([dump_record(note.pk, "Новая", user=self.user.pk)], upsert=True)
+        note.refresh_from_db()
+        self.assertEqual(note.title, "Новая")
+        self.assertEqual(Notes.objects.count(), 1)
+
+    def test_export_roundtrip(self):
+        """Тест загрузки строк выгрузки /notes/api/export/: категория находится по названию"""
+        self.run_import([{
+            'id': None, 'title': "Из выгрузки", 'text': "Текст", 'reminder': None,
+            'created_at': timezone.now().isoformat(), 'updated_at': timezone.now().isoformat(),
+            'user_id': self.user.pk, 'category_id': 777, 'category_title': "Работа",
+            'group_id': None, 'group_name': None,
+        }])
+        self.assertEqual(Notes.objects.get(title="Из выгрузки").category, self.category)
+
+    def test_command_with_fixture(self):
+        """Тест команды на фикстуре проекта"""
+        path = os.path.join(settings.BASE_DIR, 'data_2025-04-09.json')
+        with open(path, encoding='utf-8-sig') as fp:
+            expected = sum(1 for record in json.load(fp) if record['model'] == 'notes.notes')
+        # В пустой базе нет авторов заметок: без --null-missing-fk - ошибка, а не заметки без владельца
+        with self.assertRaisesMessage(CommandError, "--null-missing-fk"):
+            call_command('import_notes', path, '--method', 'bulk', stdout=io.StringIO())
+        self.assertFalse(Notes.objects.exists())
+
+        out = io.StringIO()
+        call_command('import_notes', path, '--method', 'bulk', '--null-missing-fk', stdout=out)
+        self.assertEqual(Notes.objects.count(), expected)
+        self.assertIn("строк/с", out.getvalue())
+
+        # Повторная загрузка тех же id без --upsert - понятная ошибка команды
+        with self.assertRaisesMessage(CommandError, "--upsert"):
+            call_command('import_notes', path, '--method', 'bulk', '--null-missing-fk', stdout=io.StringIO())
@@ -0,0 +1,120 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes import list_cache
+from notes.models import Notes, Categories, Group
+
+
+def notes_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'notes_notes' in q['sql']]
+
+
+class ListCacheTest(TestCase):
+    """Тесты кеша отрендеренной страницы списка"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        self.category = Categories.objects.create(title="Работа")
+        self.note = Notes.objects.create(title="Личная", text="Текст", user=self.user, category=self.category)
+        self.group_note = Notes.objects.create(title="Групповая", text="Текст", group=self.group)
+        self.client.force_login(self.user)
+
+    def get(self, url='/notes/'):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, notes_queries(context)
+
+    def test_hit_does_not_query_notes(self):
+        """Тест: повторный просмотр отдаётся из кеша без запросов к заметкам"""
+        hits = list_cache.stats.hits
+        _, queries = self.get()
+        self.assertTrue(queries)
+        response, queries = self.get()
+        self.assertEqual(queries, [])
+        self.assertContains(response, "Личная")
+        self.assertEqual(list_cache.stats.hits, hits + 1)
+
+    def test_async_view_shares_cache(self):
+        """Тест: асинхронный список использует тот же кеш"""
+        self.get('/notes/')
+        _, queries = self.get(reverse('notes:index'))
+        self.assertEqual(queries, [])
+
+    def test_invalidated_by_note_changes(self):
+        """Тест сброса при создании, изменении и удалении заметки"""
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            new_note = Notes.objects.create(title="Новая", text="Текст", user=self.user)
+        response, _ = self.get()
+        self.assertContains(response, "Новая")
+
+        new_note.title = "Переименованная"
+        with self.captureOnCommitCallbacks(execute=True):
+            new_note.save()
+        response, _ = self.get()
+        self.assertContains(response, "Переименованная")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_note.delete()
+        response, _ = self.get()
+        self.assertNotContains(response, "Переименованная")
+
+    def test_moving_note_invalidates_previous_owner(self):
+        """Тест: перенос заметки из группы сбрасывает и список группы"""
+        self.client.get(reverse('notes:toggle_view'))
+        response, _ = self.get()
+        self.assertContains(response, "Групповая")
+
+        note = Notes.objects.get(pk=self.group_note.pk)
+        note.group = None
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        response, _ = self.get()
+        self.assertNotContains(response, "Групповая")
+
+    def test_invalidated_by_membership_change(self):
+        """Тест сброса группового списка при выходе из группы"""
+        self.client.get(reverse('notes:toggle_view'))
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.members.remove(self.user)
+        response, _ = self.get()
+        self.assertNotContains(response, "Групповая")
+
+    def test_invalidated_by_category_rename(self):
+        """Тест сброса при переименовании категории"""
+        self.get()
+        self.category.title = "Дом"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        response, _ = self.get()
+        self.assertContains(response, "Дом")
+
+    def test_invalidated_after_commit(self):
+        """Тест: версия списка меняется только после фиксации транзакции записи"""
+        key = list_cache.page_key(self.user, 'personal', {})
+        with self.captureOnCommitCallbacks(execute=True):
+            Notes.objects.create(title="Новая", text="Текст", user=self.user)
+            # Страница, собранная до фиксации, кешируется под прежним ключом
+            self.assertEqual(list_cache.page_key(self.user, 'personal', {}), key)
+        self.assertNotEqual(list_cache.page_key(self.user, 'personal', {}), key)
+
+    def test_normalized_params(self):
+        """Тест нормализации параметров: порядок, пробелы и пустые значения не важны"""
+        self.assertEqual(
+            list_cache.normalized_params(QueryDict('category=&search_query=%20план%20%20встреч&fuzzy=on')),
+            list_cache.normalized_params(QueryDict('fuzzy=on&search_query=план встреч&utm=1')),
+        )
+        self.assertNotEqual(
+            list_cache.page_key(self.user, 'personal', QueryDict('search_query=план')),
+            list_cache.page_key(self.user, 'personal', QueryDict('search_query=отчёт')),
+        )
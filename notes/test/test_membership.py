@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from notes import membership
+from notes.middleware import group_membership_middleware
+from notes.models import Notes, Group
+
+
+class GroupMembershipCacheTest(TestCase):
+    """Тесты кеша множества групп пользователя"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='member', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.other_group = Group.objects.create(name="Другая")
+        self.group.members.add(self.user)
+
+    def fresh_user(self):
+        # Новый объект - как request.user следующего запроса
+        return User.objects.get(pk=self.user.pk)
+
+    def test_computed_once_and_shared(self):
+        """Тест: один запрос к БД, дальше - память запроса и общий кеш"""
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertEqual(membership.group_ids(user), {self.group.pk})
+            self.assertEqual(membership.group_ids(user), {self.group.pk})
+        next_request_user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(membership.group_ids(next_request_user), {self.group.pk})
+
+    def test_invalidated_by_membership_changes(self):
+        """Тест сброса кеша при изменении состава групп с обеих сторон связи"""
+        membership.group_ids(self.fresh_user())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_group.members.add(self.user)
+        self.assertEqual(membership.group_ids(self.fresh_user()), {self.group.pk, self.other_group.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.note_groups.remove(self.group)
+        self.assertEqual(membership.group_ids(self.fresh_user()), {self.other_group.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_group.members.clear()
+        self.assertEqual(membership.group_ids(self.fresh_user()), set())
+
+    def test_version_changes_after_commit(self):
+        """Тест: версия меняется только после фиксации транзакции записи"""
+        before = membership.version(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.members.remove(self.user)
+            # Параллельный запрос до фиксации закеширует старый набор под прежней версией
+            self.assertEqual(membership.version(self.user), before)
+        self.assertNotEqual(membership.version(self.user), before)
+
+    def test_invalidated_by_group_delete(self):
+        """Тест сброса кеша при удалении группы"""
+        membership.group_ids(self.fresh_user())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+        self.assertEqual(membership.group_ids(self.fresh_user()), set())
+
+    def test_access_check_without_queries(self):
+        """Тест проверки доступа к групповой заметке по закешированному набору"""
+        note = Notes.objects.create(title="Групповая", text="Текст", group=self.group)
+        foreign = Notes.objects.create(title="Чужая", text="Текст", group=self.other_group)
+        user = self.fresh_user()
+        membership.group_ids(user)
+        with self.assertNumQueries(0):
+            self.assertTrue(note.is_visible_to(user))
+            self.assertFalse(foreign.is_visible_to(user))
+
+    def test_middleware_is_lazy(self):
+        """Тест: middleware не обращается к кешу и БД, пока набор не нужен"""
+        request = RequestFactory().get('/')
+        request.user = self.fresh_user()
+        middleware = group_membership_middleware(lambda request: request)
+        with self.assertNumQueries(0):
+            middleware(request)
+        with self.assertNumQueries(1):
+            self.assertIn(self.group.pk, request.note_group_ids)
+
+    def test_note_form_offers_member_groups(self):
+        """Тест: форма заметки (sync и async) предлагает только группы пользователя из кеша членства"""
+        self.client.force_login(self.user)
+        for url in ('/notes/add-note/', '/notes/aadd-note/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('user_groups', response.context)
+            choices = list(response.context['form'].fields['group'].queryset)
+            self.assertEqual(choices, [self.group])
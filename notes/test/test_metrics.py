@@ -0,0 +1,72 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+
+from notes.metrics import timed_sync_to_async
+from notes.models import Notes
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+    """Тесты метрик Prometheus"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='12345')
+        Notes.objects.create(title="Заметка", text="Текст", user=self.user)
+        self.client.force_login(self.user)
+
+    def test_request_latency_sync_and_async(self):
+        """Тест: задержка и SQL-запросы по маршруту - отдельно для синхронного и асинхронного списка"""
+        for route in ('notes/', 'notes/a/'):
+            labels = {'view': 'notes:index', 'route': route}
+            before = sample('notes_request_duration_seconds_count', method='GET', **labels)
+            queries_before = sample('notes_request_db_queries_sum', **labels)
+            self.assertEqual(self.client.get('/' + route).status_code, 200)
+            self.assertEqual(sample('notes_request_duration_seconds_count', method='GET', **labels), before + 1)
+            self.assertGreater(sample('notes_request_db_queries_sum', **labels), queries_before)
+            self.assertGreater(sample('notes_requests_total', method='GET', status='200', **labels), 0)
+
+    def test_template_render(self):
+        """Тест времени рендеринга шаблона страницы"""
+        before = sample('notes_template_render_seconds_count', template='notes/notes_list.html')
+        self.client.get('/notes/')
+        self.assertEqual(sample('notes_template_render_seconds_count', template='notes/notes_list.html'), before + 1)
+
+    def test_sync_to_async_wait(self):
+        """Тест ожидания потока в sync_to_async"""
+        def work(value):
+            return value * 2
+
+        before = sample('notes_sync_to_async_wait_seconds_count', function=work.__qualname__)
+        self.assertEqual(async_to_sync(timed_sync_to_async(work))(21), 42)
+        self.assertEqual(sample('notes_sync_to_async_wait_seconds_count', function=work.__qualname__), before + 1)
+
+    def test_endpoint(self):
+        """Тест /metrics: текстовый формат Prometheus"""
+        self.client.get('/notes/')
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'notes_request_duration_seconds_bucket', response.content)
+        self.assertIn(b'notes_list_cache_lookups_total', response.content)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_endpoint_without_token(self):
+        """Тест: без токена /metrics закрыт для всех, кроме сотрудников (или при DEBUG)"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_token(self):
+        """Тест доступа к /metrics по токену"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,115 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from notes.models import Notes, Categories, Group
+from notes.pagination import KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+    """Тесты курсорной пагинации"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='12345')
+        self.notes = [
+            Notes.objects.create(title=f"Заметка {i}", text="Текст", user=self.user)
+            for i in range(7)
+        ]
+
+    def test_pages_cover_all_rows_once(self):
+        """Тест обхода всех страниц без пропусков и повторов"""
+        paginator = KeysetPaginator(Notes.objects.all(), per_page=3)
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.get_page(cursor)
+            seen.extend(note.pk for note in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(Notes.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_size_and_has_next(self):
+        """Тест размера страницы и признака следующей страницы"""
+        paginator = KeysetPaginator(Notes.objects.all(), per_page=7)
+        page = paginator.get_page()
+        self.assertEqual(len(page), 7)
+        self.assertFalse(page.has_next)
+        self.assertIsNone(page.next_cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Тест некорректного курсора"""
+        paginator = KeysetPaginator(Notes.objects.all(), per_page=3)
+        self.assertEqual(
+            [note.pk for note in paginator.get_page('не-курсор')],
+            [note.pk for note in paginator.get_page()],
+        )
+
+    def test_cursor_roundtrip(self):
+        """Тест кодирования и декодирования курсора"""
+        paginator = KeysetPaginator(Notes.objects.all())
+        note = self.notes[0]
+        self.assertEqual(
+            paginator.decode_cursor(paginator.encode_cursor(note)),
+            [note.created_at, note.pk],
+        )
+
+
+class PaginatedIndexTest(TestCase):
+    """Тесты постраничного списка в sync и async представлениях"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='12345')
+        self.category = Categories.objects.create(title="Работа")
+        for i in range(30):
+            Notes.objects.create(
+                title=f"Заметка {i}", text="Текст", user=self.user,
+                category=self.category if i % 10 else None,
+            )
+        self.client.force_login(self.user)
+
+    def test_sync_index_is_paginated(self):
+        """Тест первой и второй страницы синхронного списка"""
+        response = self.client.get('/notes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['notes']), 20)
+        self.assertEqual(response.context['notes_count'], 30)
+        self.assertIsNotNone(response.context['next_page_query'])
+
+        response = self.client.get('/notes/?' + response.context['next_page_query'])
+        self.assertEqual(len(response.context['notes']), 10)
+        self.assertIsNone(response.context['next_page_query'])
+
+    def test_async_index_is_paginated(self):
+        """Тест постраничного асинхронного списка"""
+        response = self.client.get(reverse('notes:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['notes']), 20)
+        self.assertEqual(response.context['notes_count'], 30)
+
+    def test_filters_are_kept_in_cursor_link(self):
+        """Тест сохранения фильтров при переходе на следующую страницу"""
+        response = self.client.get(f'/notes/?category={self.category.pk}')
+        self.assertEqual(response.context['notes_count'], 27)
+        self.assertIn(f'category={self.category.pk}', response.context['next_page_query'])
+
+        response = self.client.get('/notes/?' + response.context['next_page_query'])
+        self.assertEqual(len(response.context['notes']), 7)
+        self.assertTrue(all(note.category_id == self.category.pk for note in response.context['notes']))
+
+    def test_group_view_is_paginated(self):
+        """Тест постраничного списка групповых заметок"""
+        group = Group.objects.create(name="Команда")
+        group.members.add(self.user)
+        for i in range(21):
+            Notes.objects.create(title=f"Групповая {i}", text="Текст", group=group)
+
+        self.client.get('/notes/toggle-view/')
+        response = self.client.get('/notes/')
+        self.assertEqual(response.context['view_type'], 'group')
+        self.assertEqual(len(response.context['notes']), 20)
+        self.assertEqual(response.context['notes_count'], 21)
@@ -0,0 +1,105 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.forms import NoteSearchForm
+from notes.models import Notes, Categories, Group
+from notes.test.utils import QueryBudgetMixin
+
+
+class NotesQuerySetTest(TestCase):
+    """Тесты общих выборок NotesQuerySet"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        self.personal = Notes.objects.create(title="Личная", text="Текст", user=self.user)
+        self.group_note = Notes.objects.create(title="Групповая", text="Текст", user=self.other, group=self.group)
+        self.foreign = Notes.objects.create(title="Чужая", text="Текст", user=self.other)
+
+    def test_personal(self):
+        """Тест выборки личных заметок"""
+        self.assertEqual(list(Notes.objects.personal(self.user)), [self.personal])
+
+    def test_for_groups(self):
+        """Тест выборки заметок групп пользователя"""
+        self.assertEqual(list(Notes.objects.for_groups(self.user)), [self.group_note])
+        self.assertEqual(list(Notes.objects.for_groups(self.other)), [])
+
+    def test_visible_to(self):
+        """Тест выборки всех доступных заметок"""
+        self.assertEqual(set(Notes.objects.visible_to(self.user)), {self.personal, self.group_note})
+        self.assertTrue(self.group_note.is_visible_to(self.user))
+        self.assertFalse(self.foreign.is_visible_to(self.user))
+
+    def test_reminder_filter_is_index_range(self):
+        """Тест фильтра по дате напоминания как диапазона по колонке"""
+        tomorrow = timezone.now() + datetime.timedelta(days=1)
+        self.personal.reminder = tomorrow
+        self.personal.save()
+
+        form = NoteSearchForm({'reminder_filter': tomorrow.date().isoformat()})
+        queryset = form.filter_queryset(Notes.objects.personal(self.user))
+        self.assertEqual(list(queryset), [self.personal])
+        self.assertIn('"next_fire_at" >=', str(queryset.query))
+
+    def test_for_list_defers_unused_columns(self):
+        """Тест ограничения колонок в списке"""
+        note = Notes.objects.for_list().get(pk=self.personal.pk)
+        self.assertIn('search_vector', note.get_deferred_fields())
+        self.assertIn('text', note.get_deferred_fields())
+        self.assertIn('user_id', note.get_deferred_fields())
+        # updated_at нужен для ключа кеша карточки
+        self.assertNotIn('updated_at', note.get_deferred_fields())
+
+
+class ListQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Число запросов страниц не зависит от числа заметок"""
+
+    # сессия, пользователь, 2 запроса perms, context processor, счётчики (GROUP BY), страница, категории формы
+    LIST_BUDGET = 8
+    # сессия, пользователь, валидаторы ETag, набор групп (при пустом кеше), заметка,
+    # 2 запроса perms, context processor
+    DETAIL_BUDGET = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.group = Group.objects.create(name="Команда")
+        self.group.members.add(self.user)
+        categories = [Categories.objects.create(title=f"Категория {i}") for i in range(3)]
+        for i in range(15):
+            Notes.objects.create(title=f"Личная {i}", text="Текст", user=self.user, category=categories[i % 3])
+            Notes.objects.create(title=f"Групповая {i}", text="Текст", group=self.group, category=categories[i % 3])
+        self.group_note = Notes.objects.filter(group=self.group).first()
+        self.client.force_login(self.user)
+
+    def test_sync_personal_list(self):
+        with self.assertQueryBudget(self.LIST_BUDGET):
+            response = self.client.get('/notes/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_personal_list(self):
+        with self.assertQueryBudget(self.LIST_BUDGET):
+            response = self.client.get(reverse('notes:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_sync_group_list(self):
+        self.client.get('/notes/toggle-view/')
+        with self.assertQueryBudget(self.LIST_BUDGET):
+            response = self.client.get('/notes/')
+        self.assertContains(response, "Группа: Команда")
+
+    def test_sync_detail(self):
+        with self.assertQueryBudget(self.DETAIL_BUDGET):
+            response = self.client.get(f'/notes/note/{self.group_note.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_detail(self):
+        with self.assertQueryBudget(self.DETAIL_BUDGET):
+            response = self.client.get(reverse('notes:note_detail', kwargs={'pk': self.group_note.pk}))
+        self.assertEqual(response.status_code, 200)
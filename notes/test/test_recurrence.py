@@ -0,0 +1,138 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from notes.forms import NotesForm
+from notes.models import Notes, ReminderOutbox
+from notes.recurrence import Rule, next_occurrence, parse_rule
+from notes.reminders import ReminderDispatcher
+from notes.test.test_reminders import FakeBot
+
+
+def local(*args):
+    return timezone.make_aware(datetime.datetime(*args))
+
+
+class RecurrenceRuleTest(TestCase):
+    """Тесты разбора правила и расчёта следующего срабатывания"""
+
+    def test_parse_rule(self):
+        """Тест разбора FREQ/INTERVAL/UNTIL и ошибок"""
+        self.assertIsNone(parse_rule(''))
+        self.assertEqual(parse_rule('FREQ=WEEKLY'), Rule('WEEKLY'))
+        rule = parse_rule('RRULE:freq=daily;interval=3;until=20271231T000000Z')
+        self.assertEqual((rule.freq, rule.interval), ('DAILY', 3))
+        self.assertEqual(rule.until, datetime.datetime(2027, 12, 31, tzinfo=datetime.timezone.utc))
+        for value in ('FREQ=HOURLY', 'FREQ=DAILY;INTERVAL=0', 'FREQ=DAILY;COUNT=5', 'INTERVAL=2', 'FREQ'):
+            with self.assertRaises(ValueError, msg=value):
+                parse_rule(value)
+
+    def test_daily_skips_missed_occurrences(self):
+        """Тест: после простоя следующее срабатывание - ближайшее будущее, без перебора пропущенных"""
+        start = local(2020, 1, 1, 9, 0)
+        self.assertEqual(next_occurrence('FREQ=DAILY', start, local(2026, 3, 5, 8, 0)), local(2026, 3, 5, 9, 0))
+        self.assertEqual(next_occurrence('FREQ=DAILY', start, local(2026, 3, 5, 9, 0)), local(2026, 3, 6, 9, 0))
+        self.assertEqual(next_occurrence('FREQ=WEEKLY;INTERVAL=2', start, start), local(2020, 1, 15, 9, 0))
+        # Начало ещё не наступило - первое срабатывание и есть start
+        self.assertEqual(next_occurrence('FREQ=DAILY', start, local(2019, 1, 1)), start)
+
+    def test_monthly_keeps_day_of_month(self):
+        """Тест: 31-е число сдвигается на конец короткого месяца, но не «съезжает» дальше"""
+        start = local(2026, 1, 31, 10, 0)
+        self.assertEqual(next_occurrence('FREQ=MONTHLY', start, start), local(2026, 2, 28, 10, 0))
+        self.assertEqual(next_occurrence('FREQ=MONTHLY', start, local(2026, 3, 1)), local(2026, 3, 31, 10, 0))
+        self.assertEqual(next_occurrence('FREQ=YEARLY', local(2024, 2, 29), local(2024, 3, 1)), local(2025, 2, 28))
+        self.assertEqual(next_occurrence('FREQ=YEARLY', local(2024, 2, 29), local(2027, 3, 1)), local(2028, 2, 29))
+
+    def test_until(self):
+        """Тест окончания правила по UNTIL"""
+        start = local(2026, 1, 1, 9, 0)
+        self.assertEqual(next_occurrence('FREQ=DAILY;UNTIL=20260103', start, local(2026, 1, 1, 10)),
+                         local(2026, 1, 2, 9, 0))
+        self.assertIsNone(next_occurrence('FREQ=DAILY;UNTIL=20260103', start, local(2026, 1, 2, 10)))
+
+
+class RecurringReminderTest(TestCase):
+    """Тесты next_fire_at у заметок и его сдвига диспетчером"""
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_next_fire_at_follows_reminder(self):
+        """Тест: next_fire_at задаётся при изменении напоминания и не сбрасывается при правке текста"""
+        note = Notes.objects.create(title="Полить цветы", text="Текст", reminder=self.now, recurrence='FREQ=DAILY')
+        self.assertEqual(note.next_fire_at, self.now)
+
+        advanced = self.now + datetime.timedelta(days=1)
+        Notes.objects.filter(pk=note.pk).update(next_fire_at=advanced)
+        note = Notes.objects.get(pk=note.pk)
+        note.title = "Полить все цветы"
+        note.save()
+        self.assertEqual(Notes.objects.get(pk=note.pk).next_fire_at, advanced)
+
+        note.reminder = self.now + datetime.timedelta(hours=3)
+        note.save(update_fields=['reminder'])
+        self.assertEqual(Notes.objects.get(pk=note.pk).next_fire_at, note.reminder)
+
+        note.reminder = None
+        note.save()
+        self.assertIsNone(Notes.objects.get(pk=note.pk).next_fire_at)
+
+    def test_dispatcher_advances_recurring_notes(self):
+        """Тест: повторяющиеся сдвигаются на следующее срабатывание, однократные сбрасываются - одним UPDATE"""
+        daily = Notes.objects.create(title="Каждый день", text="Текст", reminder=self.now - datetime.timedelta(days=3, hours=1),
+                                     recurrence='FREQ=DAILY')
+        once = Notes.objects.create(title="Один раз", text="Текст", reminder=self.now)
+        finished = Notes.objects.create(title="Закончилось", text="Текст", reminder=self.now - datetime.timedelta(days=10),
+                                        recurrence='FREQ=WEEKLY;UNTIL=20000101')
+
+        bot = FakeBot()
+        dispatcher = ReminderDispatcher(bot, 'channel', rate=1000)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(dispatcher.enqueue_due(self.now), 3)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "notes_notes"')]
+        self.assertEqual(len(updates), 1)
+
+        daily.refresh_from_db()
+        self.assertEqual(daily.next_fire_at, self.now + datetime.timedelta(hours=23))
+        self.assertIsNotNone(daily.reminder)
+        once.refresh_from_db()
+        finished.refresh_from_db()
+        self.assertEqual((once.reminder, once.next_fire_at), (None, None))
+        self.assertIsNone(finished.next_fire_at)
+        self.assertEqual(ReminderOutbox.objects.count(), 3)
+
+        # Следующий проход в тот же день ничего не ставит в очередь, через сутки - снова
+        self.assertEqual(dispatcher.enqueue_due(self.now + datetime.timedelta(hours=1)), 0)
+        self.assertEqual(dispatcher.enqueue_due(daily.next_fire_at), 1)
+
+    def test_due_query_uses_next_fire_index(self):
+        """Тест: выборка наступивших - диапазон по индексу notes_next_fire_idx"""
+        if connection.vendor != 'sqlite':
+            self.skipTest("План запроса проверяется для SQLite")
+        sql, params = Notes.objects.due(self.now).order_by('next_fire_at').values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('notes_next_fire_idx', plan)
+        self.assertNotIn('SCAN', plan)
+
+    def test_form_rule(self):
+        """Тест формы: готовые варианты, своё правило и ошибка в правиле"""
+        data = {'title': "Заметка", 'text': "Текст", 'reminder': '2026-10-20', 'recurrence': 'FREQ=WEEKLY'}
+        form = NotesForm(data)
+        self.assertTrue(form.is_valid(), form.errors)
+        note = form.save()
+        self.assertEqual(note.next_fire_at, note.reminder)
+        self.assertEqual(note.recurrence_display(), "Каждую неделю")
+
+        form = NotesForm({**data, 'recurrence': 'FREQ=SECONDLY'})
+        self.assertIn('recurrence', form.errors)
+
+        note.recurrence = 'FREQ=MONTHLY;INTERVAL=3'
+        note.save()
+        self.assertIn(('FREQ=MONTHLY;INTERVAL=3', 'FREQ=MONTHLY;INTERVAL=3'),
+                      NotesForm(instance=note).fields['recurrence'].widget.choices)
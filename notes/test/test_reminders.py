@@ -0,0 +1,268 @@
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs
+
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from notes.models import Notes, ReminderOutbox
+from notes.reminders import ReminderDispatcher, make_bot
+
+
+class FakeBot:
+    """Локальная замена telegram.Bot: запоминает сообщения вместо отправки"""
+
+    def __init__(self, fail_titles=(), retry_after_titles=(), flaky_titles=()):
+        self.sent = []
+        self.fail_titles = set(fail_titles)
+        self.retry_after_titles = set(retry_after_titles)
+        self.flaky_titles = set(flaky_titles)
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        title = text.split('<b>')[1].split('</b>')[0]
+        if title in self.fail_titles:
+            raise BadRequest("chat not found")
+        if title in self.retry_after_titles:
+            self.retry_after_titles.discard(title)
+            raise RetryAfter(0)
+        if title in self.flaky_titles:
+            self.flaky_titles.discard(title)
+            raise NetworkError("Bad Gateway")
+        self.sent.append((chat_id, text))
+
+
+class ReminderDispatcherTest(TestCase):
+    """Тесты очереди напоминаний и её отправки"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.due = [
+            Notes.objects.create(title=f"Напоминание {i}", text="Текст", reminder=self.now - datetime.timedelta(minutes=i))
+            for i in range(5)
+        ]
+        self.future = Notes.objects.create(title="Потом", text="Текст", reminder=self.now + datetime.timedelta(days=1))
+        self.plain = Notes.objects.create(title="Без напоминания", text="Текст")
+
+    def dispatch(self, bot, now=None, **kwargs):
+        kwargs.setdefault('rate', 1000)
+        dispatcher = ReminderDispatcher(bot, 'channel', **kwargs)
+        try:
+            return dispatcher.dispatch(now=now or self.now)
+        finally:
+            dispatcher.close()
+
+    def test_sends_due_notes_in_chunks(self):
+        """Тест отправки всех наступивших напоминаний порциями"""
+        bot = FakeBot()
+        stats = self.dispatch(bot, chunk_size=2)
+
+        self.assertEqual(stats, {'enqueued': 5, 'sent': 5, 'failed': 0, 'dead': 0})
+        self.assertEqual(len(bot.sent), 5)
+        self.assertFalse(Notes.objects.due(self.now).exists())
+        self.assertEqual(ReminderOutbox.objects.filter(status=ReminderOutbox.SENT, attempts=1).count(), 5)
+        self.future.refresh_from_db()
+        self.assertIsNotNone(self.future.reminder)
+
+    def test_clearing_touches_updated_at(self):
+        """Тест: сброс напоминания обновляет updated_at (карточка, ETag, выгрузка по since)"""
+        note = self.due[0]
+        self.dispatch(FakeBot())
+        refreshed = Notes.objects.get(pk=note.pk)
+        self.assertIsNone(refreshed.reminder)
+        self.assertGreater(refreshed.updated_at, note.updated_at)
+
+    def test_enqueue_is_transactional(self):
+        """Тест: если очередь не записалась, напоминание остаётся у заметки"""
+        dispatcher = ReminderDispatcher(FakeBot(), 'channel')
+        with mock.patch.object(ReminderOutbox.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                dispatcher.enqueue_due(self.now)
+        self.assertEqual(Notes.objects.due(self.now).count(), 5)
+        self.assertFalse(ReminderOutbox.objects.exists())
+
+    def test_permanent_error_is_dead_lettered(self):
+        """Тест: постоянная ошибка (chat not found) - сразу dead, остальные отправлены"""
+        bot = FakeBot(fail_titles={"Напоминание 2"})
+        stats = self.dispatch(bot, chunk_size=2)
+
+        self.assertEqual(stats, {'enqueued': 5, 'sent': 4, 'failed': 1, 'dead': 1})
+        dead = ReminderOutbox.objects.get(status=ReminderOutbox.DEAD)
+        self.assertEqual(dead.note_id, self.due[2].pk)
+        self.assertIn("chat not found", dead.last_error)
+        self.assertFalse(Notes.objects.due(self.now).exists())
+
+    def test_transient_error_is_retried_with_backoff(self):
+        """Тест: временная ошибка - повтор с задержкой, потом доставка"""
+        bot = FakeBot(flaky_titles={"Напоминание 1"})
+        stats = self.dispatch(bot)
+        self.assertEqual(stats, {'enqueued': 5, 'sent': 4, 'failed': 1, 'dead': 0})
+        message = ReminderOutbox.objects.get(status=ReminderOutbox.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreaterEqual(message.next_attempt_at, self.now + datetime.timedelta(seconds=15))
+
+        # До срока повтора сообщение не берётся
+        self.assertEqual(self.dispatch(bot)['sent'], 0)
+        stats = self.dispatch(bot, now=message.next_attempt_at)
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(len(bot.sent), 5)
+
+    def test_dead_after_max_attempts(self):
+        """Тест: после max_attempts неудачных попыток сообщение - dead"""
+        bot = FakeBot(flaky_titles={"Напоминание 0"})
+        stats = self.dispatch(bot, max_attempts=1)
+        self.assertEqual(stats['dead'], 1)
+        self.assertEqual(ReminderOutbox.objects.get(status=ReminderOutbox.DEAD).attempts, 1)
+
+    def test_second_run_is_idempotent(self):
+        """Тест повторного запуска: уже отправленное не дублируется"""
+        bot = FakeBot()
+        self.dispatch(bot)
+        self.dispatch(bot)
+        self.assertEqual(len(bot.sent), 5)
+
+    def test_claimed_messages_are_leased(self):
+        """Тест: захваченное другим воркером сообщение не отправляется повторно до конца аренды"""
+        dispatcher = ReminderDispatcher(FakeBot(), 'channel')
+        dispatcher.enqueue_due(self.now)
+        self.assertEqual(len(dispatcher._claim_messages(self.now)), 5)
+        self.assertEqual(dispatcher._claim_messages(timezone.now()), [])
+
+    def test_deleted_note_is_not_sent(self):
+        """Тест: сообщение удалённой заметки не отправляется"""
+        dispatcher = ReminderDispatcher(FakeBot(), 'channel', rate=1000)
+        dispatcher.enqueue_due(self.now)
+        Notes.objects.get(pk=self.due[0].pk).delete()
+        bot = FakeBot()
+        stats = self.dispatch(bot)
+        self.assertEqual(stats['sent'], 4)
+        self.assertEqual(ReminderOutbox.objects.get(note_id=self.due[0].pk).status, ReminderOutbox.DEAD)
+
+    def test_retry_after_is_honoured(self):
+        """Тест повторной отправки после RetryAfter"""
+        bot = FakeBot(retry_after_titles={"Напоминание 1"})
+        stats = self.dispatch(bot)
+        self.assertEqual(stats['sent'], 5)
+
+    def test_message_is_html_escaped(self):
+        """Тест экранирования HTML в тексте заметки"""
+        Notes.objects.all().delete()
+        Notes.objects.create(title="a < b", text="<script>", reminder=self.now)
+        bot = FakeBot()
+        self.dispatch(bot)
+        self.assertIn("a &lt; b", bot.sent[0][1])
+        self.assertIn("&lt;script&gt;", bot.sent[0][1])
+
+
+class TelegramStandIn(ThreadingHTTPServer):
+    """
+    Локальный HTTP-сервер вместо api.telegram.org.
+
+    Отвечает на getMe и sendMessage с задержкой delay, считает одновременные
+    запросы. Текст с FAIL - 400 chat not found, с FLOOD - один раз 429.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.05):
+        super().__init__(('127.0.0.1', 0), TelegramHandler)
+        self.delay = delay
+        self.messages = []
+        self.flooded = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/bot'
+
+
+class TelegramHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        params = {key: values[0] for key, values in parse_qs(body).items()}
+        method = self.path.rsplit('/', 1)[-1]
+        if method == 'getMe':
+            return self.reply(200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'Bot',
+                                                           'username': 'notes_bot'}})
+
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            text = params.get('text', '')
+            if 'FAIL' in text:
+                return self.reply(400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: chat not found'})
+            if 'FLOOD' in text and text not in server.flooded:
+                server.flooded.add(text)
+                return self.reply(429, {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                                        'parameters': {'retry_after': 1}})
+            with server.lock:
+                server.messages.append(text)
+            self.reply(200, {'ok': True, 'result': {'message_id': len(server.messages), 'date': int(time.time()),
+                                                    'chat': {'id': -100, 'type': 'channel'}, 'text': text}})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TelegramStandInTest(TestCase):
+    """Тесты отправки настоящим telegram.Bot через локальный HTTP-сервер"""
+
+    def setUp(self):
+        self.server = TelegramStandIn()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.now = timezone.now()
+
+    def dispatch(self, **kwargs):
+        dispatcher = ReminderDispatcher(make_bot('123:token', 10, self.server.base_url), '-100',
+                                        concurrency=10, rate=1000, **kwargs)
+        try:
+            return dispatcher.dispatch(now=self.now)
+        finally:
+            dispatcher.close()
+
+    def test_concurrent_delivery(self):
+        """Тест: отправки идут параллельно, время не равно сумме задержек сервера"""
+        for i in range(40):
+            Notes.objects.create(title=f"Напоминание {i}", text="Текст", reminder=self.now)
+        started = time.monotonic()
+        stats = self.dispatch(chunk_size=15)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(stats['sent'], 40)
+        self.assertEqual(len(self.server.messages), 40)
+        self.assertGreater(self.server.max_in_flight, 1)
+        # Последовательно было бы 40 * 0.05 = 2 с
+        self.assertLess(elapsed, 1.5)
+
+    def test_errors(self):
+        """Тест: 400 - dead, 429 - повтор после паузы retry_after"""
+        Notes.objects.create(title="FAIL", text="Текст", reminder=self.now)
+        Notes.objects.create(title="FLOOD", text="Текст", reminder=self.now)
+        stats = self.dispatch()
+        self.assertEqual(stats, {'enqueued': 2, 'sent': 1, 'failed': 1, 'dead': 1})
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertIn("FLOOD", self.server.messages[0])
@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from notes import membership
+from notes.models import Group, Notes
+from notes.preferences import VIEW_TYPE_COOKIE
+from notes.routers import PIN_COOKIE
+
+REPLICA = 'replica'
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Тесты маршрутизации чтений в реплику.
+
+    Реплика - отдельная SQLite-база, «репликация» в тестах выполняется вручную:
+    заметка в реплике со старым заголовком изображает отставание реплики.
+    TransactionTestCase: в TestCase открыта транзакция, и роутер читал бы из основной БД.
+    Псевдоним реплики добавляется в setUpClass, поэтому databases = '__all__':
+    явный список баз проверяется раньше, при запуске тестов.
+    """
+
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        configured = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': f'{cls.tmpdir}/replica.sqlite3'},
+        })
+        connections.settings[REPLICA] = configured[REPLICA]
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        for alias in ('default', 'templates'):
+            caches[alias].clear()
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.note = Notes.objects.create(title="Новая", text="Текст", user=self.user)
+        # Реплика отстала: в ней заметка ещё со старым заголовком
+        User.objects.using(REPLICA).create(pk=self.user.pk, username='owner', password=self.user.password)
+        Notes.objects.using(REPLICA).create(pk=self.note.pk, title="Старая", text="Текст", user_id=self.user.pk)
+
+        self.client.force_login(self.user)
+        override = self.settings(DATABASE_REPLICAS=[REPLICA], REPLICA_PIN_SECONDS=15)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_reads_from_replica(self):
+        """Тест: GET-запросы синхронных и асинхронных представлений читают из реплики"""
+        for url in (f'/notes/note/{self.note.pk}/', reverse('notes:note_detail', kwargs={'pk': self.note.pk})):
+            response = self.client.get(url)
+            self.assertContains(response, "Старая")
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_read_your_writes(self):
+        """Тест: после изменения заметки её автор читает из основной БД, пока есть cookie"""
+        response = self.client.post(f'/notes/note/{self.note.pk}/update/', {'title': "Правка", 'text': "Текст"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 15)
+        self.assertEqual(Notes.objects.using(REPLICA).get(pk=self.note.pk).title, "Старая")
+
+        self.assertContains(self.client.get(response.url), "Правка")
+        self.assertContains(self.client.get('/notes/'), "Правка")
+
+        # Окно закончилось (cookie истекла) - снова реплика
+        del self.client.cookies[PIN_COOKIE]
+        self.assertContains(self.client.get(f'/notes/note/{self.note.pk}/'), "Старая")
+
+    def test_post_reads_primary(self):
+        """Тест: форма редактирования загружает заметку из основной БД, а не из реплики"""
+        self.client.post(f'/notes/note/{self.note.pk}/update/', {'title': "Правка", 'text': "Новый текст"})
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.title, self.note.text), ("Правка", "Новый текст"))
+
+    def test_stale_replica_does_not_poison_caches(self):
+        """Тест: набор групп и страница списка кешируются из основной БД, а не из отстающей реплики"""
+        group = Group.objects.create(name="Семья")
+        group.members.add(self.user)
+        Notes.objects.create(title="Групповая", text="Текст", user=self.user, group=group)
+        # В реплику ещё не дошло членство пользователя в группе
+        Group.objects.using(REPLICA).create(pk=group.pk, name="Семья")
+
+        for url in ('/notes/', '/notes/a/'):
+            caches['default'].clear()
+            self.client.force_login(self.user)
+            self.client.cookies[VIEW_TYPE_COOKIE] = 'group'
+            self.assertContains(self.client.get(url), "Групповая")
+            self.assertEqual(membership.group_ids(User.objects.get(pk=self.user.pk)), {group.pk})
+            # Повторный запрос - из кеша, по-прежнему с заметкой группы
+            self.assertContains(self.client.get(url), "Групповая")
+
+        # Страница личных заметок тоже собрана по основной БД
+        self.client.cookies[VIEW_TYPE_COOKIE] = 'personal'
+        self.assertContains(self.client.get('/notes/'), "Новая")
+
+    def test_outside_requests(self):
+        """Тест: вне HTTP-запросов (команды, планировщик) чтения идут в основную БД"""
+        self.assertEqual(router.db_for_read(Notes), DEFAULT_DB_ALIAS)
+        self.assertEqual(Notes.objects.get(pk=self.note.pk).title, "Новая")
+        self.assertFalse(router.allow_migrate(REPLICA, 'notes'))
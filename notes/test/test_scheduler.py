@@ -0,0 +1,101 @@
+import datetime
+import time
+
+from django.test import TestCase
+from django.utils import timezone
+
+from notes.models import Notes
+from notes.scheduler import ReminderScheduler, decode_notification, encode_notification
+
+
+class FakeDispatcher:
+    """Замена ReminderDispatcher: запоминает вызовы"""
+
+    def __init__(self):
+        self.calls = []
+
+    def dispatch(self, now=None):
+        self.calls.append(now)
+        return {'sent': 1, 'failed': 0}
+
+    def close(self):
+        pass
+
+
+class ReminderSchedulerTest(TestCase):
+    """Тесты планировщика напоминаний"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.dispatcher = FakeDispatcher()
+        self.scheduler = ReminderScheduler(self.dispatcher, horizon=datetime.timedelta(hours=1))
+
+    def test_refresh_loads_overdue_and_upcoming_within_horizon(self):
+        """Тест загрузки очереди: просроченные (догоняем после простоя) и ближайшие"""
+        overdue = Notes.objects.create(title="Просрочено", text="Текст", reminder=self.now - datetime.timedelta(days=2))
+        soon = Notes.objects.create(title="Скоро", text="Текст", reminder=self.now + datetime.timedelta(minutes=10))
+        Notes.objects.create(title="Нескоро", text="Текст", reminder=self.now + datetime.timedelta(days=2))
+
+        self.scheduler.refresh()
+
+        self.assertEqual(self.scheduler.metrics.queue_depth, 2)
+        self.assertEqual(self.scheduler.seconds_until_next(self.now), 0.0)
+        self.scheduler.run_pending(self.now)
+        self.assertEqual(len(self.dispatcher.calls), 1)
+        self.assertAlmostEqual(self.scheduler.seconds_until_next(self.now), 600, delta=1)
+        self.assertIn(soon.pk, self.scheduler._scheduled)
+        self.assertNotIn(overdue.pk, self.scheduler._scheduled)
+
+    def test_run_pending_waits_for_due_time(self):
+        """Тест: до наступления напоминания диспетчер не вызывается"""
+        self.scheduler.schedule(1, self.now + datetime.timedelta(minutes=5))
+        self.assertIsNone(self.scheduler.run_pending(self.now))
+        self.assertEqual(self.dispatcher.calls, [])
+
+        self.scheduler.run_pending(self.now + datetime.timedelta(minutes=5))
+        self.assertEqual(len(self.dispatcher.calls), 1)
+        self.assertEqual(self.scheduler.metrics.dispatched, 1)
+
+    def test_rescheduled_entry_is_ignored(self):
+        """Тест: перенесённое напоминание не срабатывает по старому времени"""
+        self.scheduler.schedule(1, self.now)
+        self.scheduler.schedule(1, self.now + datetime.timedelta(minutes=30))
+        self.assertIsNone(self.scheduler.run_pending(self.now))
+        self.assertAlmostEqual(self.scheduler.seconds_until_next(self.now), 1800, delta=1)
+
+        self.scheduler.unschedule(1)
+        self.assertIsNone(self.scheduler.seconds_until_next(self.now))
+
+    def test_signals_update_queue(self):
+        """Тест обновления очереди по post_save/post_delete"""
+        self.scheduler.connect_signals()
+        self.addCleanup(self.scheduler.disconnect_signals)
+
+        note = Notes.objects.create(title="Новая", text="Текст", reminder=self.now + datetime.timedelta(minutes=1))
+        self.assertEqual(self.scheduler._scheduled, {note.pk: note.reminder})
+
+        note.delete()
+        self.assertEqual(self.scheduler._scheduled, {})
+
+    def test_periodic_jobs(self):
+        """Тест периодической задачи: первый запуск сразу, следующий - через интервал; ошибка не прерывает цикл"""
+        calls = []
+
+        def failing():
+            raise RuntimeError("сбой")
+
+        self.scheduler.add_periodic(lambda: calls.append(1), 3600)
+        self.scheduler.add_periodic(failing, 60)
+        with self.assertLogs('notes.scheduler', level='ERROR'):
+            next_run = self.scheduler.run_periodic()
+        self.assertEqual(calls, [1])
+        self.scheduler.run_periodic()
+        self.assertEqual(calls, [1])
+        self.assertGreater(next_run, time.monotonic() + 30)
+
+    def test_notification_roundtrip(self):
+        """Тест формата уведомления LISTEN/NOTIFY"""
+        note = Notes(pk=7, title="Заметка", text="Текст", next_fire_at=self.now)
+        self.assertEqual(decode_notification(encode_notification(note)), (7, self.now))
+        note.next_fire_at = None
+        self.assertEqual(decode_notification(encode_notification(note)), (7, None))
@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from notes.forms import NoteSearchForm
+from notes.models import Notes
+from notes.pagination import KeysetPaginator
+from notes.search import fts5_query, search_notes
+
+
+class SearchNotesTest(TestCase):
+    """Тесты полнотекстового поиска (в SQLite - через FTS5)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='12345')
+        self.in_title = Notes.objects.create(title="Отчёт по проекту", text="Сдать в пятницу", user=self.user)
+        self.in_text = Notes.objects.create(title="Пятница", text="Подготовить отчёт для отдела", user=self.user)
+        self.other = Notes.objects.create(title="Покупки", text="Молоко, хлеб", user=self.user)
+
+    def test_searches_title_and_text(self):
+        """Тест поиска и по заголовку, и по тексту"""
+        found = set(search_notes(Notes.objects.all(), "отчёт"))
+        self.assertEqual(found, {self.in_title, self.in_text})
+
+    def test_title_match_ranks_higher(self):
+        """Тест ранжирования: совпадение в заголовке выше совпадения в тексте"""
+        results = list(search_notes(Notes.objects.all(), "отчёт").order_by('-rank'))
+        self.assertEqual(results[0], self.in_title)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Тест синхронизации индекса при изменении и удалении заметки"""
+        self.other.text = "Купить отчёт"
+        self.other.save()
+        self.assertIn(self.other, search_notes(Notes.objects.all(), "отчёт"))
+
+        self.in_title.delete()
+        self.assertEqual(set(search_notes(Notes.objects.all(), "отчёт")), {self.in_text, self.other})
+
+    def test_fuzzy_mode_matches_prefixes(self):
+        """Тест нечёткого режима"""
+        self.assertFalse(search_notes(Notes.objects.all(), "покуп").exists())
+        self.assertEqual(list(search_notes(Notes.objects.all(), "покуп", fuzzy=True)), [self.other])
+
+    def test_fuzzy_mode_uses_trigram_operator(self):
+        """Тест: в PostgreSQL нечёткий отбор - оператор % по заголовку (индекс notes_title_trgm_gin)"""
+        if connection.vendor != 'postgresql':
+            self.skipTest("Оператор pg_trgm проверяется в PostgreSQL")
+        sql = str(search_notes(Notes.objects.all(), "покупки", fuzzy=True).query)
+        self.assertIn('"notes_notes"."title" %', sql)
+        self.assertNotIn('SIMILARITY', sql.split('WHERE', 1)[1].upper())
+
+    def test_query_is_escaped(self):
+        """Тест экранирования синтаксиса FTS5 в пользовательском вводе"""
+        self.assertEqual(fts5_query('отчёт" OR NEAR(*'), '"отчёт" "OR" "NEAR"')
+        self.assertFalse(search_notes(Notes.objects.all(), '"*(').exists())
+
+    def test_form_uses_ranked_ordering_for_pagination(self):
+        """Тест постраничного вывода результатов поиска по релевантности"""
+        form = NoteSearchForm({'search_query': 'отчёт'})
+        queryset = form.filter_queryset(Notes.objects.personal(self.user))
+        paginator = KeysetPaginator(queryset.for_list(), ordering=form.ordering, per_page=1)
+
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual([note.pk for note in first], [self.in_title.pk])
+        self.assertEqual([note.pk for note in second], [self.in_text.pk])
+        self.assertFalse(second.has_next)
@@ -0,0 +1,67 @@
+import datetime
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from notes.models import Notes, Group
+from notes.preferences import VIEW_TYPE_COOKIE
+from notes.sessions import clear_expired_sessions
+
+
+class SessionOverheadTest(TestCase):
+    """Тесты: сессия читается из кеша, переключение списка не пишет сессию"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='12345')
+        group = Group.objects.create(name="Команда")
+        group.members.add(self.user)
+        Notes.objects.create(title="Моя", text="Текст", user=self.user)
+        Notes.objects.create(title="Групповая", text="Текст", user=self.user, group=group)
+        self.client.force_login(self.user)
+
+    def session_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        return response, [q['sql'] for q in ctx.captured_queries if 'django_session' in q['sql']]
+
+    def test_session_read_from_cache(self):
+        """Тест: страница списка не обращается к таблице сессий"""
+        _, queries = self.session_queries('/notes/')
+        self.assertEqual(queries, [])
+
+    def test_toggle_without_session_write(self):
+        """Тест переключения через cookie"""
+        response, queries = self.session_queries('/notes/toggle-view/')
+        self.assertEqual(queries, [])
+        self.assertEqual(response.cookies[VIEW_TYPE_COOKIE].value, 'group')
+
+        response = self.client.get('/notes/')
+        self.assertEqual(response.context['view_type'], 'group')
+        self.assertContains(response, "Групповая")
+
+        self.client.get('/notes/toggle-view/')
+        self.assertEqual(self.client.get('/notes/').context['view_type'], 'personal')
+
+    def test_unknown_cookie_value(self):
+        """Тест: произвольное значение cookie - личные заметки"""
+        self.client.cookies[VIEW_TYPE_COOKIE] = 'admin'
+        self.assertEqual(self.client.get('/notes/').context['view_type'], 'personal')
+
+
+class ClearExpiredSessionsTest(TestCase):
+    """Тест очистки истёкших сессий"""
+
+    def test_clear_expired(self):
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store['key'] = 'value'
+        store.create()
+        Session.objects.create(session_key='expired', session_data='',
+                               expire_date=timezone.now() - datetime.timedelta(days=1))
+        clear_expired_sessions()
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [store.session_key])
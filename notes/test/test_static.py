@@ -0,0 +1,103 @@
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from notes.static_build import ICONS_CSS, source_path
+from notes.storage import StaticFilesStorage
+
+FONT = 'icons/bootstrap-icons/font/fonts/bootstrap-icons.woff2'
+
+
+class StaticBuildTest(TestCase):
+    """Тесты сборки статики: хеши в именах, сжатые копии, долгий кеш, урезанный шрифт"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=str(Path(cls.tmp) / 'root'),
+            STATIC_BUILD_DIR=Path(cls.tmp) / 'build',
+        )
+        cls.settings_override.enable()
+        call_command('build_static', verbosity=0, stdout=io.StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+        super().tearDownClass()
+
+    def fetch(self, name, encoding):
+        response = self.client.get(f'/static/{name}', HTTP_ACCEPT_ENCODING=encoding)
+        body = b''.join(response.streaming_content)
+        response.close()
+        return response, body
+
+    def test_hashed_assets_are_immutable_and_compressed(self):
+        """Тест заголовков: brotli или gzip по Accept-Encoding, Cache-Control immutable"""
+        name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        self.assertNotEqual(name, 'css/bootstrap.min.css')
+        original = source_path('css/bootstrap.min.css').stat().st_size
+
+        response, body = self.fetch(name, 'gzip, deflate, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=315360000', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(body), original / 5)
+
+        response, body = self.fetch(name, 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertLess(len(body), original / 4)
+
+    def test_unhashed_name_is_not_immutable(self):
+        """Тест: файл без хеша в имени не кешируется навсегда"""
+        response, _ = self.fetch('css/bootstrap.min.css', 'br')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_icon_font_subset(self):
+        """Тест урезанного шрифта и CSS иконок: только иконки из шаблонов"""
+        font = staticfiles_storage.stored_name(FONT)
+        response, body = self.fetch(font, 'br')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertLess(len(body), source_path(FONT).stat().st_size / 20)
+
+        _, css = self.fetch(staticfiles_storage.stored_name(ICONS_CSS), 'identity')
+        css = css.decode()
+        self.assertIn('.bi-plus-circle::before', css)
+        self.assertNotIn('.bi-alarm::before', css)
+        # Ссылка на шрифт переписана на имя с хешем
+        self.assertIn(font.rsplit('/', 1)[1], css)
+
+    def test_pages_reference_hashed_names(self):
+        """Тест: страницы подключают файлы по именам с хешем"""
+        self.client.force_login(User.objects.create_user(username='owner', password='12345'))
+        response = self.client.get('/notes/')
+        self.assertContains(response, staticfiles_storage.url('css/bootstrap.min.css'))
+        self.assertContains(response, staticfiles_storage.url('js/bootstrap.bundle.min.js'))
+
+
+class ManifestStrictTest(TestCase):
+    """Тесты отказа от исходных имён статики вне разработки и тестов"""
+
+    def storage(self, root):
+        return StaticFilesStorage(location=root)
+
+    def test_missing_manifest(self):
+        """Тест: без манифеста исходное имя - только при STATIC_MANIFEST_STRICT = False"""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        with override_settings(STATIC_MANIFEST_STRICT=False):
+            self.assertEqual(self.storage(root).stored_name('css/app.css'), 'css/app.css')
+        with override_settings(STATIC_MANIFEST_STRICT=True):
+            with self.assertRaises(ValueError):
+                self.storage(root).stored_name('css/app.css')
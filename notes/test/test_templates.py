@@ -0,0 +1,65 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from notes import list_cache
+from notes.models import Notes, Categories
+
+
+class TemplateLoadersTest(TestCase):
+    """Тест настройки загрузчиков шаблонов"""
+
+    def test_cached_loader(self):
+        """Тест: шаблоны компилируются один раз на процесс"""
+        loaders = engines['django'].engine.template_loaders
+        self.assertEqual(len(loaders), 1)
+        self.assertIsInstance(loaders[0], CachedLoader)
+
+
+class NoteCardCacheTest(TestCase):
+    """Тесты кеша карточек заметок в списке"""
+
+    def setUp(self):
+        caches['templates'].clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='owner', password='12345')
+        self.category = Categories.objects.create(title="Работа")
+        self.note = Notes.objects.create(title="Заметка", text="Текст", user=self.user, category=self.category)
+        self.client.force_login(self.user)
+
+    def refetch(self):
+        # Кеш страниц сбрасываем, чтобы каждый раз рендерить карточки заново
+        with self.captureOnCommitCallbacks(execute=True):
+            list_cache.invalidate_all()
+        return self.client.get('/notes/')
+
+    def test_card_link(self):
+        """Тест ссылки карточки: та же, что даёт reverse()"""
+        self.assertContains(self.client.get('/notes/'),
+                            f'href="{reverse("notes:note_detail", kwargs={"pk": self.note.pk})}"')
+
+    def test_card_is_refreshed_when_note_changes(self):
+        """Тест: ключ карточки - все выводимые поля, изменение в обход save() тоже её обновляет"""
+        self.assertContains(self.client.get('/notes/'), "Заметка")
+
+        Notes.objects.filter(pk=self.note.pk).update(title="Без даты")
+        response = self.refetch()
+        self.assertContains(response, "Без даты")
+        self.assertNotContains(response, "Заметка")
+
+        reminder = timezone.now() + datetime.timedelta(days=1)
+        Notes.objects.filter(pk=self.note.pk).update(reminder=reminder, next_fire_at=reminder, recurrence='FREQ=DAILY')
+        self.assertContains(self.refetch(), "(каждый день)")
+
+    def test_category_rename(self):
+        """Тест: переименование категории меняет ключ карточки"""
+        self.client.get('/notes/')
+        self.category.title = "Дом"
+        self.category.save()
+        self.assertContains(self.client.get('/notes/'), "Дом")
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from asgiref.sync import SyncToAsync, async_to_sync
+from django.db import connections
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class QueryBudgetMixin:
+    """Проверка, что код укладывается в фиксированное число SQL-запросов"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using='default'):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"Превышен бюджет запросов: {executed} > {budget}\n{queries}")
+
+
+class SyncHopsMixin:
+    """
+    Проверка числа переходов асинхронного представления в синхронный поток.
+
+    Асинхронные кеш и ORM переходят в поток на каждое обращение, поэтому
+    считаются все вызовы sync_to_async. Переходы middleware и загрузки
+    пользователя общие для всех страниц и вычитаются: их даёт запрос
+    анонимного пользователя, который представление сразу перенаправляет.
+    """
+
+    def _count_sync_hops(self, client, url, **extra):
+        hops = []
+        original = SyncToAsync.__call__
+
+        def counting(sync_to_async_call, *args, **kwargs):
+            hops.append(sync_to_async_call)
+            return original(sync_to_async_call, *args, **kwargs)
+
+        with mock.patch.object(SyncToAsync, '__call__', counting):
+            response = async_to_sync(client.get)(url, **extra)
+        return response, len(hops)
+
+    def assertSyncHops(self, expected, url, **extra):
+        """Запрос self.async_client; проверяет переходы самого представления, возвращает ответ"""
+        _, overhead = self._count_sync_hops(AsyncClient(), reverse('notes:index'))
+        response, hops = self._count_sync_hops(self.async_client, url, **extra)
+        self.assertEqual(hops - overhead, expected, f"Переходов в синхронный поток: {hops - overhead}")
+        return response
@@ -4,6 +4,9 @@ from django.conf.urls.static import static
 
 from . import views
 from . import async_views
+from . import export
+from . import bulk
+from . import dbpool
 
 
 
@@ -16,6 +19,9 @@ urlpatterns = [
     path('note/<int:pk>/delete/', views.NoteDeleteView.as_view(), name='note_delete'),
     path("add-note/", views.AddNotesView.as_view(), name="add_note"),
     path('toggle-view/', views.toggle_view, name='toggle_view'),
+    path('api/export/', export.export_notes, name='export'),
+    path('api/bulk/', bulk.bulk_notes, name='bulk'),
+    path('api/db-pool/', dbpool.db_pool_stats, name='db_pool'),
 
     # Асинхронные представления
     path("a/", async_views.index, name="index"),
@@ -24,6 +30,8 @@ urlpatterns = [
     path('anote/<int:pk>/delete/', async_views.AsyncNoteDeleteView.as_view(), name='note_delete'),
     path("aadd-note/", async_views.AsyncAddNotesView.as_view(), name="add_note"),
     path('atoggle-view/', async_views.toggle_view, name='toggle_view'),
+    path('api/aexport/', export.aexport_notes, name='export'),
+    path('api/abulk/', bulk.abulk_notes, name='bulk'),
 ]
 
 
@@ -16,8 +16,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 
 from django.http import HttpResponseForbidden
 
+from . import conditional, list_cache, routers
+from .counts import all_categories_query
 from .models import Notes
 from .forms import NotesForm, NoteSearchForm
+from .pagination import KeysetPaginator, page_querystring
+from .preferences import get_view_type, set_view_type, toggled_view_type
 
 from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
@@ -42,10 +46,14 @@ class AddNotesView(LoginRequiredMixin, CreateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Добавить новую заметку'
-        # Добавляем доступные группы пользователя в контекст
-        context['user_groups'] = self.request.user.note_groups.all()
         return context
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        # Группы пользователя из кеша членства (group_membership_middleware)
+        kwargs['group_ids'] = self.request.note_group_ids
+        return kwargs
+
     def form_valid(self, form):
         # Привязываем заметку к текущему пользователю
         form.instance.user = self.request.user
@@ -65,12 +73,14 @@ class NoteUpdateView(LoginRequiredMixin, UpdateView):
     def dispatch(self, request, *args, **kwargs):
         try:
             note = Notes.objects.get(pk=self.kwargs['pk'])
-            if note.user != self.request.user:
+            if note.user_id != self.request.user.pk:
                 context = {
                     'message': 'У вас нет прав для редактирования этой заметки',
                     'title': 'Доступ запрещен'
                 }
                 return render(request, 'notes/access_denied.html', context, status=403)
+            # Заметка уже загружена - get_object не будет запрашивать её повторно
+            self.object = note
             return super().dispatch(request, *args, **kwargs)
         except Notes.DoesNotExist:
             context = {
@@ -79,6 +89,9 @@ class NoteUpdateView(LoginRequiredMixin, UpdateView):
             }
             return render(request, 'notes/access_denied.html', context, status=404)
 
+    def get_object(self, queryset=None):
+        return self.object
+
     # def get_object(self, queryset=None):
     #     # Получаем объект заметки и проверяем, принадлежит ли он текущему пользователю
     #     obj = super().get_object(queryset)
@@ -89,10 +102,14 @@ class NoteUpdateView(LoginRequiredMixin, UpdateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Редактирование заметки'
-        # Добавляем доступные группы пользователя в контекст
-        context['user_groups'] = self.request.user.note_groups.all()
         return context
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        # Группы пользователя из кеша членства (group_membership_middleware)
+        kwargs['group_ids'] = self.request.note_group_ids
+        return kwargs
+
     def form_valid(self, form):
         messages.success(self.request, 'Заметка успешно обновлена!')
         return super().form_valid(form)
@@ -113,7 +130,7 @@ class NoteDeleteView(LoginRequiredMixin, DeleteView):
         obj = get_object_or_404(Notes, pk=self.kwargs['pk'])
 
         # Проверяем, принадлежит ли заметка текущему пользователю
-        if obj.user != self.request.user:
+        if obj.user_id != self.request.user.pk:
             # Если нет - вызываем исключение PermissionDenied
             raise PermissionDenied("У вас нет прав для удаления этой заметки")
 
@@ -134,17 +151,20 @@ class NoteDetailView(LoginRequiredMixin, DetailView):
     template_name = 'notes/note_detail.html'
     context_object_name = 'note'
 
-    def get_object(self, queryset=None):
-        # Получаем объект заметки
-        obj = get_object_or_404(Notes, pk=self.kwargs['pk'])
+    def get(self, request, *args, **kwargs):
+        # Если у браузера актуальная копия - 304 без загрузки заметки и рендеринга
+        validators = conditional.note_validators(request, self.kwargs['pk'])
+        not_modified = conditional.not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+        return conditional.set_validators(super().get(request, *args, **kwargs), validators)
 
-        # Проверяем, имеет ли пользователь доступ к заметке
-        user_has_access = (
-                obj.user == self.request.user or  # Автор заметки
-                (obj.group and obj.group in self.request.user.note_groups.all())  # Член группы
-        )
+    def get_object(self, queryset=None):
+        # Получаем объект заметки вместе с категорией и группой
+        obj = get_object_or_404(Notes.objects.for_detail(), pk=self.kwargs['pk'])
 
-        if not user_has_access:
+        # Проверяем, имеет ли пользователь доступ к заметке (автор или член группы)
+        if not obj.is_visible_to(self.request.user):
             raise PermissionDenied("У вас нет прав для просмотра этой заметки")
 
         return obj
@@ -158,50 +178,62 @@ class NoteDetailView(LoginRequiredMixin, DetailView):
 
 @login_required
 def index(request):
-    # Получаем тип отображения из сессии или по умолчанию показываем личные заметки
-    view_type = request.session.get('view_type', 'personal')
+    # Тип отображения - из cookie, по умолчанию личные заметки
+    view_type = get_view_type(request)
 
     if view_type == 'personal':
         # Только личные заметки пользователя (без группы)
-        notes_list = Notes.objects.filter(user=request.user, group=None)
+        notes_list = Notes.objects.personal(request.user)
         title = "Ваши личные заметки"
     else:
         # Заметки групп, в которых состоит пользователь
-        user_groups = request.user.note_groups.all()
-        notes_list = Notes.objects.filter(group__in=user_groups)
+        notes_list = Notes.objects.for_groups(request.user)
         title = "Групповые заметки"
 
     form = NoteSearchForm(request.GET)
-
-    if form.is_valid():
-        # Поиск по заголовку
-        search_query = form.cleaned_data.get('search_query')
-        if search_query:
-            notes_list = notes_list.filter(title__icontains=search_query)
-
-        # Фильтр по категории
-        category = form.cleaned_data.get('category')
-        if category:
-            notes_list = notes_list.filter(category=category)
-
-        reminder_filter = form.cleaned_data.get('reminder_filter')
-        if reminder_filter:
-            notes_list = notes_list.filter(reminder__date=reminder_filter.date())
-
-    return render(request, "notes/notes_list.html", {
-        "notes": notes_list,
-        "form": form,
-        "title": title,
-        "view_type": view_type
-    })
+    context = {"form": form, "title": title, "view_type": view_type}
+
+    # Счётчик, карточки и навигация - из кеша, пока данные пользователя не менялись
+    cache_key, entry = list_cache.lookup(request.user, view_type, request.GET)
+    if entry is None:
+        # Страница пойдёт в общий кеш - выборка из основной БД, не из отстающей реплики
+        routers.pin_primary()
+        notes_list = form.filter_queryset(notes_list, category=False)
+        # Число найденных, счётчики категорий и состояние выборки - один GROUP BY
+        facets = notes_list.facets(form.category_id)
+        state = facets.state
+        if form.category_id is not None:
+            notes_list = notes_list.filter(category=form.category_id)
+    else:
+        state = entry['state']
+
+    validators = conditional.list_validators(request, cache_key, state)
+    not_modified = conditional.not_modified(request, validators)
+    if not_modified is not None:
+        return not_modified
+
+    if entry is None:
+        # Одна страница по курсору вместо всего списка
+        page = KeysetPaginator(notes_list.for_list(), ordering=form.ordering).get_page(request.GET.get('cursor'))
+        context.update({
+            "notes": page,
+            "notes_count": state[1],
+            "facets": facets,
+            "categories": facets.categories(request.GET),
+            "all_categories_query": all_categories_query(request.GET),
+            "next_page_query": page_querystring(request.GET, page.next_cursor) if page.has_next else None,
+            "first_page_query": page_querystring(request.GET, None) if request.GET.get('cursor') else None,
+        })
+        entry = list_cache.render_page(cache_key, context, state)
+
+    context["notes_page_html"] = entry['html']
+    return conditional.set_validators(render(request, "notes/notes_list.html", context), validators)
 
 # Добавим новое представление для переключения между личными и групповыми заметками
 @login_required
 def toggle_view(request):
     # Переключение между личными и групповыми заметками
-    current_view = request.session.get('view_type', 'personal')
-    request.session['view_type'] = 'group' if current_view == 'personal' else 'personal'
-    return redirect('notes:index')
+    return set_view_type(redirect('notes:index'), toggled_view_type(request))
 
 def custom_404(request, exception):
     return render(request, '404.html', status=404)
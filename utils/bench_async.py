@@ -0,0 +1,156 @@
+"""
+Бенчмарк асинхронных представлений под uvicorn.
+
+Поднимает uvicorn с текущим кодом и (опционально) второй uvicorn с кодом из
+другой git-ревизии (через git worktree), затем для каждого уровня
+конкурентности держит N одновременных соединений и печатает RPS, p50/p95 и
+число ошибок. Так сравнивается новая версия notes/async_views.py с прежней:
+
+    python utils/bench_async.py --compare-ref HEAD~1 --concurrency 50 200 1000
+
+Пользователь и заметка должны существовать в БД из mysite/settings.py.
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ENDPOINTS = ["/notes/a/", "/notes/anote/{pk}/", "/notes/anote/{pk}/update/"]
+
+
+def start_server(source_dir, port, workers):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'mysite.asgi:application',
+         '--port', str(port), '--workers', str(workers), '--no-access-log', '--log-level', 'warning'],
+        cwd=source_dir,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'mysite.settings'},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/accounts/login/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn на порту {port} не запустился")
+
+
+async def login(client, username, password):
+    response = await client.get("/accounts/login/")
+    csrf_token = client.cookies.get('csrftoken')
+    if not csrf_token:
+        match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.text)
+        csrf_token = match.group(1) if match else ''
+    await client.post(
+        "/accounts/login/",
+        data={'username': username, 'password': password, 'csrfmiddlewaretoken': csrf_token},
+        headers={'Referer': str(client.base_url) + "/accounts/login/"},
+    )
+    if 'sessionid' not in client.cookies:
+        raise RuntimeError("Не удалось войти: проверьте --username/--password")
+
+
+async def load(base_url, cookies, endpoint, concurrency, duration):
+    """concurrency воркеров в цикле запрашивают endpoint в течение duration секунд"""
+    timings = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=60) as client:
+        stop_at = time.monotonic() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(endpoint)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'rps': len(timings) / elapsed,
+        'p50': statistics.median(timings) if timings else 0.0,
+        'p95': timings[int(len(timings) * 0.95) - 1] if timings else 0.0,
+        'errors': errors,
+    }
+
+
+async def bench(label, base_url, args):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        await login(client, args.username, args.password)
+        cookies = dict(client.cookies)
+
+    results = {}
+    for endpoint in args.endpoints:
+        endpoint = endpoint.format(pk=args.pk)
+        for concurrency in args.concurrency:
+            stats = await load(base_url, cookies, endpoint, concurrency, args.duration)
+            results[(endpoint, concurrency)] = stats
+            print(f"[{label}] {endpoint:<28} c={concurrency:<5} {stats['rps']:>8.1f} rps  "
+                  f"p50 {stats['p50']:>8.1f} мс  p95 {stats['p95']:>8.1f} мс  ошибок {stats['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность async-представлений под uvicorn")
+    parser.add_argument('--compare-ref', help='git-ревизия для сравнения (например HEAD~1)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--duration', type=float, default=20.0, help='Секунд на каждый замер')
+    parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS)
+    parser.add_argument('--pk', type=int, default=1, help='id заметки пользователя для detail/update')
+    parser.add_argument('--workers', type=int, default=1, help='Воркеров uvicorn')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    args = parser.parse_args()
+
+    targets = [('текущий', ROOT, args.port)]
+    worktree = None
+    if args.compare_ref:
+        worktree = tempfile.mkdtemp(prefix='notes-bench-')
+        subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.compare_ref], cwd=ROOT, check=True)
+        targets.append((args.compare_ref, Path(worktree), args.port + 1))
+
+    results = {}
+    try:
+        for label, source_dir, port in targets:
+            server = start_server(source_dir, port, args.workers)
+            try:
+                results[label] = asyncio.run(bench(label, f"http://127.0.0.1:{port}", args))
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        if worktree:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=ROOT)
+
+    if len(results) == 2:
+        current, previous = results['текущий'], results[args.compare_ref]
+        print(f"\n===== RPS: {args.compare_ref} -> текущий =====")
+        for key, stats in current.items():
+            before = previous[key]['rps']
+            ratio = stats['rps'] / before if before else float('inf')
+            print(f"{key[0]:<28} c={key[1]:<5} {before:>8.1f} -> {stats['rps']:>8.1f}  (x{ratio:.2f})")
+
+
+if __name__ == "__main__":
+    main()
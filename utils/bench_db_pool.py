@@ -0,0 +1,156 @@
+"""
+Бенчмарк соединений с PostgreSQL: новое соединение на запрос, постоянные
+соединения (CONN_MAX_AGE) и пул psycopg.
+
+Каждый поток имитирует запросы Django: request_started, короткий запрос к БД,
+request_finished (после него Django закрывает или возвращает соединение).
+Печатает p50/p95/p99 и пропускную способность для каждого режима; у пула -
+ещё и счётчики notes.dbpool.pool_stats().
+
+    python utils/bench_db_pool.py --threads 16 --requests 500
+    python utils/bench_db_pool.py --local        # временный кластер через initdb/pg_ctl
+
+Без --local используется БД из mysite/settings.py (переменные DB_HOST, DB_PORT и т.д.).
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MODES = ('fresh', 'persistent', 'pool')
+
+
+@contextmanager
+def local_postgres():
+    """Временный кластер PostgreSQL на свободном порту, удаляется после прогона"""
+    initdb, pg_ctl = shutil.which('initdb'), shutil.which('pg_ctl')
+    if not initdb or not pg_ctl:
+        sys.exit("initdb/pg_ctl не найдены в PATH: укажите существующий сервер через DB_HOST/DB_PORT")
+    workdir = tempfile.mkdtemp(prefix='bench_db_pool_')
+    data = os.path.join(workdir, 'data')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    subprocess.run([initdb, '-D', data, '-U', 'bench', '--auth=trust', '-E', 'UTF8'],
+                   check=True, stdout=subprocess.DEVNULL)
+    subprocess.run([pg_ctl, '-D', data, '-l', os.path.join(workdir, 'postgres.log'), '-w', 'start',
+                    '-o', f"-p {port} -k {workdir} -c listen_addresses=127.0.0.1 -c max_connections=200"],
+                   check=True, stdout=subprocess.DEVNULL)
+    try:
+        yield {'DB_HOST': '127.0.0.1', 'DB_PORT': str(port), 'DB_NAME': 'postgres', 'DB_USER': 'bench', 'DB_PASSWORD': ''}
+    finally:
+        subprocess.run([pg_ctl, '-D', data, '-m', 'fast', 'stop'], stdout=subprocess.DEVNULL)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def configure(threads):
+    """Три псевдонима БД на один сервер - по одному на режим; возвращает доступные режимы"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+    from mysite import settings as project_settings
+
+    base = {key: value for key, value in project_settings.DATABASES['default'].items() if key != 'OPTIONS'}
+    base.pop('CONN_MAX_AGE', None)
+    databases = {
+        'default': project_settings.DATABASES['default'],
+        'fresh': {**base, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+        'persistent': {**base, 'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True},
+    }
+    modes = ['fresh', 'persistent']
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        print("psycopg_pool не установлен - режим pool пропущен")
+    else:
+        databases['pool'] = {**base, 'OPTIONS': {'pool': {'min_size': threads, 'max_size': threads, 'timeout': 10}}}
+        modes.append('pool')
+    project_settings.DATABASES = databases
+
+    import django
+    django.setup()
+    return modes
+
+
+def run_mode(alias, threads, requests, query):
+    from django.core.signals import request_finished, request_started
+    from django.db import connections
+
+    def worker(_):
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            request_started.send(sender=None)
+            with connections[alias].cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchall()
+            request_finished.send(sender=None)
+            latencies.append((time.perf_counter() - started) * 1000)
+        connections.close_all()
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        latencies = [value for chunk in executor.map(worker, range(threads)) for value in chunk]
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'p50': quantiles[49],
+        'p95': quantiles[94],
+        'p99': quantiles[98],
+        'throughput': len(latencies) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пула соединений PostgreSQL")
+    parser.add_argument('--threads', type=int, default=16, help='Одновременных «запросов»')
+    parser.add_argument('--requests', type=int, default=300, help='Запросов на поток')
+    parser.add_argument('--query', default='SELECT 1', help='SQL одного запроса')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--local', action='store_true', help='Поднять временный кластер через initdb/pg_ctl')
+    parser.add_argument('-o', '--output', help='Сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    with (local_postgres() if args.local else _no_server()) as env:
+        os.environ.update(env)
+        available = configure(args.threads)
+        results = {}
+        for mode in args.modes:
+            if mode not in available:
+                continue
+            # Прогрев: у пула - открытие min_size соединений, у остальных - импорт драйвера
+            run_mode(mode, args.threads, 1, args.query)
+            results[mode] = run_mode(mode, args.threads, args.requests, args.query)
+            row = results[mode]
+            print(f"{mode:<11} p50 {row['p50']:.2f} мс  p95 {row['p95']:.2f} мс  p99 {row['p99']:.2f} мс  "
+                  f"{row['throughput']:.0f} запросов/с")
+            if mode == 'pool':
+                from notes.dbpool import pool_stats
+                results[mode]['pool_stats'] = stats = pool_stats('pool')
+                print(f"{'':<11} ожидание соединения в среднем {stats['wait_ms_avg']:.2f} мс, "
+                      f"открыто соединений {stats['connections_opened']}, таймаутов {stats['timeouts']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'threads': args.threads, 'requests': args.requests, 'modes': results}, f, indent=2)
+
+
+@contextmanager
+def _no_server():
+    yield {}
+
+
+if __name__ == "__main__":
+    main()
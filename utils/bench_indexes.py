@@ -0,0 +1,169 @@
+"""
+Бенчмарк составных индексов заметок (миграция 0005_notes_access_path_indexes).
+
+Засевает таблицу notes_notes (по умолчанию 1 000 000 строк), затем для каждого
+горячего запроса печатает EXPLAIN ANALYZE и задержки p50/p95 сначала без
+индексов, потом с ними. Нужен PostgreSQL из mysite/settings.py:
+
+    python utils/bench_indexes.py --rows 1000000
+    python utils/bench_indexes.py --cleanup   # удалить засеянные данные
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from notes.forms import NoteSearchForm  # noqa: E402
+from notes.models import Notes, Group  # noqa: E402
+
+BENCH_PREFIX = 'bench_user_'
+
+
+def seed(rows, users, groups):
+    """Засевает заметки одним INSERT ... SELECT generate_series на стороне БД"""
+    existing = Notes.objects.filter(user__username__startswith=BENCH_PREFIX).count()
+    if existing >= rows:
+        print(f"Используем уже засеянные данные: {existing} строк")
+        return
+
+    User.objects.bulk_create(
+        [User(username=f"{BENCH_PREFIX}{i}") for i in range(users)], ignore_conflicts=True
+    )
+    user_ids = list(User.objects.filter(username__startswith=BENCH_PREFIX).values_list('pk', flat=True))
+    group_objs = Group.objects.bulk_create([Group(name=f"bench_group_{i}") for i in range(groups)])
+    group_ids = [group.pk for group in group_objs]
+    through = Group.members.through
+    through.objects.bulk_create(
+        [through(group_id=gid, user_id=user_ids[(i * 7 + j) % len(user_ids)])
+         for i, gid in enumerate(group_ids) for j in range(10)],
+        ignore_conflicts=True,
+    )
+
+    print(f"Засеваем {rows} заметок...")
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO notes_notes (title, text, reminder, recurrence, next_fire_at, created_at, updated_at,
+                                     user_id, group_id, category_id)
+            SELECT
+                'Заметка ' || g,
+                repeat('текст заметки ', 20),
+                r,
+                -- Каждое четвёртое напоминание повторяется каждый день
+                CASE WHEN r IS NOT NULL AND g %% 4 = 0 THEN 'FREQ=DAILY' END,
+                r,
+                now() - g * interval '1 second',
+                now() - g * interval '1 second',
+                (%s::bigint[])[1 + g %% %s],
+                CASE WHEN g %% 3 = 0 THEN (%s::bigint[])[1 + g %% %s] END,
+                NULL
+            FROM (
+                SELECT g, CASE WHEN random() < 0.1 THEN now() + (random() * 60 - 30) * interval '1 day' END AS r
+                FROM generate_series(1, %s) AS g
+            ) AS seed
+            """,
+            [user_ids, len(user_ids), group_ids, len(group_ids), rows],
+        )
+        cursor.execute("ANALYZE notes_notes")
+    print(f"Готово за {time.perf_counter() - started:.1f} с")
+
+
+def cleanup():
+    Notes.objects.filter(user__username__startswith=BENCH_PREFIX).delete()
+    Group.objects.filter(name__startswith='bench_group_').delete()
+    User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+    print("Засеянные данные удалены")
+
+
+def hot_queries():
+    """Запросы в том виде, в каком их выполняют представления и send_notes"""
+    user = User.objects.filter(username__startswith=BENCH_PREFIX).order_by('pk').first()
+    now = timezone.now()
+    form = NoteSearchForm({'reminder_filter': now.date().isoformat()})
+    return {
+        'personal list': Notes.objects.personal(user).for_list().order_by('-created_at', '-id')[:21],
+        'group list': Notes.objects.for_groups(user).for_list().order_by('-created_at', '-id')[:21],
+        'due reminders': Notes.objects.due(now).order_by('next_fire_at').values_list('pk', flat=True)[:500],
+        'reminder date filter': form.filter_queryset(Notes.objects.personal(user)).values_list('pk', flat=True),
+    }
+
+
+def measure(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def run(label, repeat):
+    print(f"\n===== {label} =====")
+    results = {}
+    for name, queryset in hot_queries().items():
+        print(f"\n--- {name}")
+        print(queryset.explain(analyze=True, buffers=True))
+        results[name] = measure(queryset, repeat)
+        print(f"p50 {results[name][0]:.2f} мс, p95 {results[name][1]:.2f} мс")
+    return results
+
+
+def set_indexes(enabled):
+    with connection.schema_editor() as editor:
+        for index in Notes._meta.indexes:
+            if enabled:
+                editor.add_index(Notes, index)
+            else:
+                editor.remove_index(Notes, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE notes_notes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN и задержки запросов к заметкам до и после индексов")
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Сколько заметок засеять')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50, help='Повторов каждого запроса')
+    parser.add_argument('--cleanup', action='store_true', help='Удалить засеянные данные и выйти')
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit("Бенчмарк рассчитан на PostgreSQL")
+
+    if args.cleanup:
+        cleanup()
+        return
+
+    seed(args.rows, args.users, args.groups)
+
+    set_indexes(False)
+    try:
+        before = run("Без индексов", args.repeat)
+    finally:
+        set_indexes(True)
+    after = run("С индексами", args.repeat)
+
+    print("\n===== Итог (p50 / p95, мс) =====")
+    for name in before:
+        print(f"{name:<22} {before[name][0]:>9.2f} / {before[name][1]:<9.2f} -> "
+              f"{after[name][0]:>9.2f} / {after[name][1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
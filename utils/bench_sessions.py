@@ -0,0 +1,100 @@
+"""
+Стоимость сессии на запрос для разных SESSION_ENGINE.
+
+Для каждого движка создаёт сессию с данными авторизации, затем N раз
+имитирует запрос: загрузка сессии (как в AuthenticationMiddleware) и,
+отдельно, запись (как прежний toggle_view, хранивший view_type в сессии).
+Печатает p50/p95 в микросекундах и число SQL-запросов на операцию:
+
+    python utils/bench_sessions.py --iterations 2000
+    python utils/bench_sessions.py --engines db cached_db
+
+Было: db + запись при переключении списка. Стало: cached_db, view_type в
+cookie - запись сессии не нужна. Нужны БД и кеш из mysite/settings.py.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from importlib import import_module
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+def measure(operation, iterations):
+    """Возвращает (время операций в мкс, SQL-запросов на операцию)"""
+    timings = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings, len(ctx.captured_queries) / iterations
+
+
+def bench_engine(engine, iterations):
+    store_class = import_module(engine).SessionStore
+    store = store_class()
+    store.update({'_auth_user_id': '1', '_auth_user_backend': 'django.contrib.auth.backends.ModelBackend',
+                  '_auth_user_hash': 'x' * 64})
+    store.save()
+    session_key = store.session_key
+
+    def read():
+        store_class(session_key).get('_auth_user_id')
+
+    toggled = {'value': 'personal'}
+
+    def write():
+        session = store_class(session_key)
+        toggled['value'] = 'group' if toggled['value'] == 'personal' else 'personal'
+        session['view_type'] = toggled['value']
+        session.save()
+
+    results = {}
+    for name, operation in (('read', read), ('write', write)):
+        operation()  # прогрев кеша и соединения
+        timings, queries = measure(operation, iterations)
+        quantiles = statistics.quantiles(timings, n=100)
+        results[name] = {'p50': quantiles[49], 'p95': quantiles[94], 'queries': queries}
+    store.delete()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стоимость сессии на запрос")
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    args = parser.parse_args()
+
+    for name in args.engines:
+        results = bench_engine(ENGINES[name], args.iterations)
+        print(f"{name:<15}" + '  '.join(
+            f"{operation}: p50 {row['p50']:.0f} мкс, p95 {row['p95']:.0f} мкс, {row['queries']:.2f} SQL"
+            for operation, row in results.items()
+        ))
+
+    if 'db' in args.engines and 'cached_db' in args.engines:
+        print("\nБыло: db, чтение на каждый запрос и запись при переключении списка.")
+        print("Стало: cached_db, чтение из кеша; переключение списка пишет только cookie.")
+
+
+if __name__ == "__main__":
+    main()
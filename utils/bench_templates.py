@@ -0,0 +1,114 @@
+"""
+Время рендеринга фрагмента списка заметок (notes/_notes_page.html).
+
+Рендерит 1 000 и 10 000 карточек (объекты в памяти, без БД) в трёх режимах:
+«холодный» кеш карточек, «тёплый» кеш и, с --compare-ref, шаблон из другой
+git-ревизии (например, до кеша карточек и вынесения {% url %} из цикла):
+
+    python utils/bench_templates.py --compare-ref HEAD~1
+    python utils/bench_templates.py --cards 1000 10000 --repeat 5
+"""
+import argparse
+import datetime
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.template import engines  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from notes.list_cache import PAGE_TEMPLATE, note_url_parts  # noqa: E402
+from notes.models import Notes, Categories, Group, note_excerpt  # noqa: E402
+
+
+def make_notes(count):
+    """Карточки со всеми вариантами разметки: с категорией/без, в группе/личные, с напоминанием"""
+    categories = [Categories(pk=i, title=f"Категория {i}") for i in range(1, 6)]
+    groups = [Group(pk=i, name=f"Группа {i}") for i in range(1, 4)]
+    now = timezone.now()
+    notes = []
+    for i in range(count):
+        notes.append(Notes(
+            pk=i + 1,
+            title=f"Заметка {i}",
+            excerpt=note_excerpt("Текст заметки " * 20),
+            created_at=now,
+            updated_at=now,
+            reminder=now + datetime.timedelta(days=1) if i % 3 == 0 else None,
+            category=categories[i % 5] if i % 4 else None,
+            group=groups[i % 3] if i % 2 else None,
+        ))
+    return notes
+
+
+def context_for(notes):
+    return {
+        'notes': notes,
+        'notes_count': len(notes),
+        'view_type': 'personal',
+        'next_page_query': None,
+        'first_page_query': None,
+    }
+
+
+def timed(render, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время рендеринга карточек заметок")
+    parser.add_argument('--cards', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3, help='Прогонов на режим (берётся медиана)')
+    parser.add_argument('--compare-ref', help='git-ревизия для сравнения шаблона')
+    args = parser.parse_args()
+
+    old_template = None
+    if args.compare_ref:
+        source = subprocess.run(
+            ['git', 'show', f'{args.compare_ref}:notes/templates/{PAGE_TEMPLATE}'],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        old_template = engines['django'].from_string(source)
+
+    card_cache = caches['templates']
+    for count in args.cards:
+        notes = make_notes(count)
+        context = context_for(notes)
+
+        def render():
+            return render_to_string(PAGE_TEMPLATE, {**context, 'note_url': note_url_parts()})
+
+        def render_cold():
+            card_cache.clear()
+            return render()
+
+        render()  # компиляция шаблона загрузчиком
+        results = {'холодный кеш': timed(render_cold, args.repeat)}
+        render()
+        results['тёплый кеш'] = timed(render, args.repeat)
+        if old_template is not None:
+            results[args.compare_ref] = timed(lambda: old_template.render(context), args.repeat)
+
+        print(f"{count} карточек: " + '  '.join(f"{name} {ms:.1f} мс" for name, ms in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Сравнение двух прогонов utils/loadtest.py.
+
+    python utils/compare_time.py before.json after.json --threshold 10
+
+Для каждого сценария печатает изменение p50/p95/p99, пропускной способности и
+доли ошибок. Регрессией считается рост задержки или падение пропускной
+способности больше чем на threshold процентов, а также рост доли ошибок больше
+чем на --error-threshold процентных пунктов. При регрессиях код выхода 1 -
+удобно для CI.
+"""
+import argparse
+import json
+import sys
+
+# метрика -> True, если «больше - хуже»
+METRICS = {'p50': True, 'p95': True, 'p99': True, 'throughput': False}
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(before, after, threshold, error_threshold):
+    """Возвращает строки таблицы и список регрессий"""
+    rows, regressions = [], []
+    for scenario in sorted(set(before['scenarios']) | set(after['scenarios'])):
+        old, new = before['scenarios'].get(scenario), after['scenarios'].get(scenario)
+        if old is None or new is None:
+            rows.append(f"{scenario:<14} есть только {'во втором' if old is None else 'в первом'} прогоне")
+            continue
+
+        cells = []
+        for metric, higher_is_worse in METRICS.items():
+            a, b = old.get(metric), new.get(metric)
+            if not a or b is None:
+                cells.append(f"{metric} -")
+                continue
+            change = (b - a) / a * 100
+            cells.append(f"{metric} {a:.1f}->{b:.1f} ({change:+.1f}%)")
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append(f"{scenario}: {metric} {change:+.1f}%")
+
+        error_change = (new['error_rate'] - old['error_rate']) * 100
+        cells.append(f"ошибки {old['error_rate']:.1%}->{new['error_rate']:.1%}")
+        if error_change > error_threshold:
+            regressions.append(f"{scenario}: доля ошибок +{error_change:.1f} п.п.")
+        rows.append(f"{scenario:<14} " + '  '.join(cells))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение двух прогонов нагрузочного теста")
+    parser.add_argument('before', help='JSON базового прогона')
+    parser.add_argument('after', help='JSON нового прогона')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Допустимое ухудшение, %%')
+    parser.add_argument('--error-threshold', type=float, default=1.0, help='Допустимый рост ошибок, п.п.')
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    for label, run in (('до', before), ('после', after)):
+        meta = run.get('meta', {})
+        print(f"{label}: ревизия {meta.get('revision')}, {meta.get('started_at')}, "
+              f"конкурентность {meta.get('concurrency')}, интенсивность {meta.get('rate')}")
+    if {k: before['meta'].get(k) for k in ('concurrency', 'rate', 'users')} != \
+            {k: after['meta'].get(k) for k in ('concurrency', 'rate', 'users')}:
+        print("Внимание: прогоны выполнены с разными параметрами нагрузки")
+
+    rows, regressions = compare(before, after, args.threshold, args.error_threshold)
+    print()
+    print('\n'.join(rows))
+
+    if regressions:
+        print(f"\nРегрессии (порог {args.threshold}%):")
+        print('\n'.join(f"  {item}" for item in regressions))
+        sys.exit(1)
+    print("\nРегрессий нет")
+
+
+if __name__ == "__main__":
+    main()
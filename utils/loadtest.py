@@ -0,0 +1,309 @@
+"""
+Нагрузочное тестирование синхронных (/notes/...) и асинхронных (/notes/a...) представлений.
+
+Заменяет utils/client_sync.py и utils/client_async.py:
+
+* засевает воспроизводимый набор данных (пользователи loadtest_user_N, их
+  личные и групповые заметки; генератор случайных чисел с фиксированным seed);
+* логинит N виртуальных пользователей, каждый ходит только по своим заметкам;
+* держит фиксированную конкурентность (--concurrency, закрытая модель) или
+  фиксированную интенсивность прихода запросов (--rate, открытая модель:
+  задержка считается от запланированного момента, а не от фактической
+  отправки, поэтому очередь на сервере не прячется);
+* печатает p50/p95/p99, пропускную способность и долю ошибок по сценариям
+  и сохраняет результат в JSON для utils/compare_time.py.
+
+    python utils/loadtest.py --seed-data --users 20
+    python utils/loadtest.py --url http://localhost:8000 --concurrency 50 --duration 30 -o before.json
+    python utils/loadtest.py --rate 200 --scenarios async_list async_detail -o after.json
+    python utils/compare_time.py before.json after.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+USER_PREFIX = 'loadtest_user_'
+PASSWORD = 'loadtest-password'
+SEARCH_WORDS = ['отчёт', 'встреча', 'проект', 'покупки', 'идея', 'задача', 'план', 'звонок']
+
+
+# --- данные
+
+def seed_data(users, notes_per_user, seed):
+    """Засевает одинаковый при одинаковом seed набор данных (повторный запуск пересоздаёт его)"""
+    sys.path.insert(0, str(ROOT))
+    import os
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from notes.models import Categories, Group, Notes
+
+    rng = random.Random(seed)
+    with transaction.atomic():
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        Group.objects.filter(name__startswith='loadtest_group_').delete()
+
+        categories = list(Categories.objects.all()[:5]) or [
+            Categories.objects.create(title=f"Категория {i}") for i in range(5)
+        ]
+        accounts = [User(username=f"{USER_PREFIX}{i}") for i in range(users)]
+        for account in accounts:
+            account.set_password(PASSWORD)
+        accounts = User.objects.bulk_create(accounts)
+
+        groups = []
+        for i in range(0, users, 5):
+            group = Group.objects.create(name=f"loadtest_group_{i // 5}")
+            group.members.add(*accounts[i:i + 5])
+            groups.append(group)
+
+        notes = []
+        for i, account in enumerate(accounts):
+            for n in range(notes_per_user):
+                words = rng.sample(SEARCH_WORDS, 3)
+                notes.append(Notes(
+                    title=f"{words[0].capitalize()} {n}",
+                    text=' '.join(words) + ' ' + 'текст заметки ' * rng.randint(5, 50),
+                    user=account,
+                    category=rng.choice(categories + [None]),
+                    group=groups[i // 5] if rng.random() < 0.3 else None,
+                ))
+        Notes.objects.bulk_create(notes, batch_size=1000)
+    print(f"Засеяно: {users} пользователей, {users * notes_per_user} заметок (seed={seed})")
+
+
+# --- сценарии: имя -> (метод, функция построения URL и данных)
+
+def _note_form(vu):
+    return {'title': f"Нагрузка {vu.rng.randint(0, 10**6)}", 'text': 'Обновлено нагрузочным тестом'}
+
+
+SCENARIOS = {
+    'sync_list': lambda vu: ('GET', "/notes/", None),
+    'async_list': lambda vu: ('GET', "/notes/a/", None),
+    'sync_search': lambda vu: ('GET', f"/notes/?search_query={vu.rng.choice(SEARCH_WORDS)}", None),
+    'async_search': lambda vu: ('GET', f"/notes/a/?search_query={vu.rng.choice(SEARCH_WORDS)}", None),
+    'sync_detail': lambda vu: ('GET', f"/notes/note/{vu.note_id()}/", None),
+    'async_detail': lambda vu: ('GET', f"/notes/anote/{vu.note_id()}/", None),
+    'sync_update': lambda vu: ('POST', f"/notes/note/{vu.note_id()}/update/", _note_form(vu)),
+    'async_update': lambda vu: ('POST', f"/notes/anote/{vu.note_id()}/update/", _note_form(vu)),
+}
+READ_SCENARIOS = [name for name in SCENARIOS if not name.endswith('_update')]
+
+
+class VirtualUser:
+    """Залогиненный клиент со своей сессией, CSRF-токеном и списком своих заметок"""
+
+    def __init__(self, base_url, username, seed, max_connections):
+        self.username = username
+        self.rng = random.Random(f"{seed}:{username}")
+        self.client = httpx.AsyncClient(
+            base_url=base_url, timeout=60,
+            limits=httpx.Limits(max_connections=max_connections),
+        )
+        self.csrf_token = None
+        self.note_ids = []
+
+    async def login(self):
+        response = await self.client.get("/accounts/login/")
+        token = self.client.cookies.get('csrftoken')
+        if not token:
+            match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.text)
+            token = match.group(1) if match else ''
+        await self.client.post(
+            "/accounts/login/",
+            data={'username': self.username, 'password': PASSWORD, 'csrfmiddlewaretoken': token},
+            headers={'Referer': f"{self.client.base_url}/accounts/login/"},
+        )
+        if 'sessionid' not in self.client.cookies:
+            raise RuntimeError(f"Не удалось войти пользователем {self.username}")
+        # После входа Django меняет CSRF-токен; он действует всю сессию, повторно не запрашиваем
+        self.csrf_token = self.client.cookies.get('csrftoken') or token
+
+        page = await self.client.get("/notes/")
+        self.note_ids = [int(pk) for pk in dict.fromkeys(re.findall(r'/notes/a?note/(\d+)/', page.text))]
+        if not self.note_ids:
+            raise RuntimeError(f"У пользователя {self.username} нет заметок: запустите --seed-data")
+
+    def note_id(self):
+        return self.rng.choice(self.note_ids)
+
+    async def request(self, scenario):
+        method, url, data = SCENARIOS[scenario](self)
+        headers = {}
+        if method == 'POST':
+            headers = {'X-CSRFToken': self.csrf_token, 'Referer': f"{self.client.base_url}{url}"}
+        response = await self.client.request(method, url, data=data, headers=headers)
+        # Успешный POST формы отвечает редиректом
+        return response.status_code < 400
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, scenario, latency_ms, ok):
+        self.latencies.setdefault(scenario, [])
+        self.errors.setdefault(scenario, 0)
+        if ok:
+            self.latencies[scenario].append(latency_ms)
+        else:
+            self.errors[scenario] += 1
+
+
+async def timed(vu, scenario, recorder, scheduled=None):
+    started = time.perf_counter()
+    try:
+        ok = await vu.request(scenario)
+    except httpx.HTTPError:
+        ok = False
+    # В открытой модели задержка включает ожидание от запланированного момента
+    origin = scheduled if scheduled is not None else started
+    recorder.record(scenario, (time.perf_counter() - origin) * 1000, ok)
+
+
+async def run_closed(vus, scenarios, concurrency, duration, recorder):
+    stop_at = time.monotonic() + duration
+
+    async def worker(i):
+        vu = vus[i % len(vus)]
+        while time.monotonic() < stop_at:
+            await timed(vu, vu.rng.choice(scenarios), recorder)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+
+async def run_open(vus, scenarios, rate, duration, recorder, seed):
+    rng = random.Random(seed)
+    tasks = []
+    started = time.perf_counter()
+    next_at = started
+    while next_at - started < duration:
+        # Пуассоновский поток: экспоненциальные интервалы между приходами
+        next_at += rng.expovariate(rate)
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        vu = rng.choice(vus)
+        tasks.append(asyncio.create_task(timed(vu, rng.choice(scenarios), recorder, scheduled=next_at)))
+    await asyncio.gather(*tasks)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed):
+    summary = {}
+    for scenario, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        total = len(latencies) + recorder.errors[scenario]
+        summary[scenario] = {
+            'requests': total,
+            'throughput': len(latencies) / elapsed,
+            'error_rate': recorder.errors[scenario] / total if total else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'сценарий':<14} {'запросов':>9} {'rps':>9} {'ошибки':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+    for scenario, stats in summary.items():
+        p = [f"{stats[k]:9.1f}" if stats[k] is not None else f"{'-':>9}" for k in ('p50', 'p95', 'p99')]
+        print(f"{scenario:<14} {stats['requests']:>9} {stats['throughput']:>9.1f} "
+              f"{stats['error_rate']:>7.1%} {' '.join(p)}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args):
+    vus = [VirtualUser(args.url, f"{USER_PREFIX}{i}", args.seed, args.concurrency or 100)
+           for i in range(args.users)]
+    try:
+        await asyncio.gather(*(vu.login() for vu in vus))
+        print(f"Вошли {len(vus)} виртуальных пользователей, сценарии: {', '.join(args.scenarios)}")
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        if args.rate:
+            await run_open(vus, args.scenarios, args.rate, args.duration, recorder, args.seed)
+        else:
+            await run_closed(vus, args.scenarios, args.concurrency, args.duration, recorder)
+        return summarize(recorder, time.perf_counter() - started)
+    finally:
+        await asyncio.gather(*(vu.close() for vu in vus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест синхронных и асинхронных представлений")
+    parser.add_argument('--url', default='http://localhost:8000', help='Базовый URL приложения')
+    parser.add_argument('--users', type=int, default=20, help='Виртуальных пользователей')
+    parser.add_argument('--seed', type=int, default=42, help='Seed данных и выбора сценариев')
+    parser.add_argument('--seed-data', action='store_true', help='Засеять данные (через mysite.settings) и выйти')
+    parser.add_argument('--notes-per-user', type=int, default=50)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--concurrency', type=int, default=20, help='Одновременных запросов (закрытая модель)')
+    mode.add_argument('--rate', type=float, help='Запросов в секунду (открытая модель)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Длительность замера, секунд')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=READ_SCENARIOS)
+    parser.add_argument('-o', '--output', help='Файл JSON для результатов')
+    args = parser.parse_args()
+
+    if args.seed_data:
+        seed_data(args.users, args.notes_per_user, args.seed)
+        return
+    if args.rate:
+        args.concurrency = None
+
+    summary = asyncio.run(main_async(args))
+    print_summary(summary)
+
+    if args.output:
+        result = {
+            'meta': {
+                'url': args.url,
+                'revision': git_revision(),
+                'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'users': args.users,
+                'seed': args.seed,
+                'concurrency': args.concurrency,
+                'rate': args.rate,
+                'duration': args.duration,
+            },
+            'scenarios': summary,
+        }
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\nРезультаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()